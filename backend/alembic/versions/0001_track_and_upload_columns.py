@@ -0,0 +1,68 @@
+"""Per-track incident columns and upload content hashes
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16
+
+Tables themselves are created by Base.metadata.create_all at startup; this
+adds the columns introduced since to databases created before them. Columns
+that already exist (fresh databases) are skipped.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = {
+    "incidents": [
+        sa.Column("track_key", sa.String(64), nullable=True),
+        sa.Column("frame_count", sa.Integer(), nullable=True, server_default="1"),
+        sa.Column("last_seen_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("ended_at", sa.DateTime(timezone=True), nullable=True),
+    ],
+    "analysis_jobs": [
+        sa.Column("content_hash", sa.String(64), nullable=True),
+        sa.Column("file_size", sa.BigInteger(), nullable=True, server_default="0"),
+    ],
+}
+
+
+def _existing(table):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return None, set()
+    columns = {c["name"] for c in inspector.get_columns(table)}
+    indexes = {i["name"] for i in inspector.get_indexes(table)}
+    indexes |= {u["name"] for u in inspector.get_unique_constraints(table)}
+    return columns, indexes
+
+
+def upgrade():
+    for table, columns in COLUMNS.items():
+        existing, _ = _existing(table)
+        if existing is None:
+            continue  # create_all will build the table with these columns
+        for column in columns:
+            if column.name not in existing:
+                op.add_column(table, column)
+
+    _, indexes = _existing("incidents")
+    if "ix_incidents_track_key" not in indexes:
+        op.create_index("ix_incidents_track_key", "incidents", ["track_key"], unique=True)
+    _, indexes = _existing("analysis_jobs")
+    if "ix_analysis_jobs_content_hash" not in indexes:
+        op.create_index("ix_analysis_jobs_content_hash", "analysis_jobs", ["content_hash"])
+
+
+def downgrade():
+    op.drop_index("ix_analysis_jobs_content_hash", table_name="analysis_jobs")
+    op.drop_index("ix_incidents_track_key", table_name="incidents")
+    for table, columns in COLUMNS.items():
+        for column in reversed(columns):
+            op.drop_column(table, column.name)
@@ -0,0 +1,45 @@
+"""Composite indexes for incident listing and keyset pagination
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16
+
+Each index leads with the column a listing filters on and ends with
+(detected_at, id), the keyset pagination order. On PostgreSQL they are built
+CONCURRENTLY so a large incidents table stays writable during the upgrade.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = {
+    "ix_incidents_detected_at_id": ["detected_at", "id"],
+    "ix_incidents_camera_detected_at": ["camera_id", "detected_at", "id"],
+    "ix_incidents_category_detected_at": ["category", "detected_at", "id"],
+    "ix_incidents_severity_detected_at": ["severity", "detected_at", "id"],
+    "ix_incidents_status_detected_at": ["status", "detected_at", "id"],
+}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("incidents"):
+        return
+    existing = {i["name"] for i in inspector.get_indexes("incidents")}
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            if name not in existing:
+                op.create_index(name, "incidents", columns, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name="incidents", postgresql_concurrently=True)
@@ -0,0 +1,36 @@
+"""Hourly incident rollup table
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16
+
+The application backfills the table from existing incidents on start
+whenever its total doesn't match them (rollup_service.rebuild_if_stale).
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("incident_hourly"):
+        return
+    severity = sa.Enum("LOW", "MEDIUM", "HIGH", "CRITICAL", name="severity", create_type=False)
+    op.create_table(
+        "incident_hourly",
+        sa.Column("hour", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("camera_id", sa.Integer(), primary_key=True),
+        sa.Column("category", sa.String(50), primary_key=True),
+        sa.Column("severity", severity, primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade():
+    op.drop_table("incident_hourly")
@@ -8,7 +8,7 @@ import numpy as np
 from typing import List, Dict, Any, Optional
 from ultralytics import YOLO
 
-from app.config import settings
+from app.detection.model_registry import model_registry
 
 
 class ANPRDetector:
@@ -21,10 +21,7 @@ class ANPRDetector:
 
     def load_models(self):
         """Load plate detection model and OCR reader."""
-        import os
-        if os.path.exists(settings.YOLO_PLATE_MODEL):
-            self.plate_model = YOLO(settings.YOLO_PLATE_MODEL)
-            print(f"  ANPR plate model loaded: {settings.YOLO_PLATE_MODEL}")
+        self.plate_model = model_registry.get("plate")
 
         try:
             import easyocr
@@ -0,0 +1,140 @@
+"""
+FireSight — Inference Backends
+Exports YOLO weights to CPU-optimised runtimes (ONNX Runtime, OpenVINO IR,
+optionally INT8-quantised) and caches the exported models on disk. Exported
+models load through Ultralytics like the PyTorch weights, so predictions
+come back as the same Results objects.
+"""
+
+import glob
+import os
+import shutil
+import tempfile
+import threading
+from typing import Dict
+
+from app.config import settings
+
+
+# Backend name -> (Ultralytics export format, INT8)
+BACKENDS = {
+    "pytorch": (None, False),
+    "onnx": ("onnx", False),
+    "openvino": ("openvino", False),
+    "openvino_int8": ("openvino", True),
+}
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+_export_lock = threading.Lock()
+
+
+def backend_for(model_name: str) -> str:
+    """Configured backend for a model: per-model override, then the default."""
+    backend = settings.INFERENCE_BACKENDS.get(model_name, settings.INFERENCE_BACKEND)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend for {model_name}: {backend}")
+    return backend
+
+
+def export_target(model_name: str, checksum: str, backend: str, imgsz: int) -> str:
+    """Cache location of an exported model.
+
+    The weights checksum is part of the name, so retrained weights are
+    re-exported instead of silently reusing a stale export.
+    """
+    fmt, _ = BACKENDS[backend]
+    stem = f"{model_name}-{checksum[:16]}-{backend}-{imgsz}"
+    if fmt == "onnx":
+        return os.path.join(settings.MODEL_EXPORT_PATH, f"{stem}.onnx")
+    return os.path.join(settings.MODEL_EXPORT_PATH, f"{stem}_openvino_model")
+
+
+def calibration_images(model_name: str) -> str:
+    """Directory of representative frames for INT8 calibration.
+
+    A ``<INT8_CALIBRATION_PATH>/<model_name>`` subdirectory is preferred so
+    e.g. the fire model calibrates on fire footage; otherwise the shared root
+    is used.
+    """
+    for path in (os.path.join(settings.INT8_CALIBRATION_PATH, model_name), settings.INT8_CALIBRATION_PATH):
+        if os.path.isdir(path) and any(
+            f.lower().endswith(IMAGE_EXTENSIONS) for f in os.listdir(path)
+        ):
+            return os.path.abspath(path)
+    raise FileNotFoundError(
+        f"No INT8 calibration images for {model_name} in {settings.INT8_CALIBRATION_PATH}"
+    )
+
+
+def _write_calibration_yaml(directory: str, images: str, class_names: Dict[int, str]) -> str:
+    """Minimal Ultralytics dataset file pointing train/val at the calibration frames."""
+    path = os.path.join(directory, "calibration.yaml")
+    with open(path, "w") as f:
+        f.write(f"path: {images}\ntrain: .\nval: .\nnames:\n")
+        for cls_id, name in sorted(class_names.items()):
+            f.write(f"  {cls_id}: {name!r}\n")
+    return path
+
+
+def export_model(model_name: str, weights_path: str, checksum: str, backend: str,
+                 imgsz: int = None) -> str:
+    """Return the exported model for ``backend``, exporting it on first use."""
+    fmt, int8 = BACKENDS[backend]
+    if fmt is None:
+        return weights_path
+    imgsz = imgsz or settings.INFERENCE_IMAGE_SIZE
+    target = export_target(model_name, checksum, backend, imgsz)
+    if os.path.exists(target):
+        return target
+
+    with _export_lock:
+        if os.path.exists(target):
+            return target
+
+        from ultralytics import YOLO
+
+        os.makedirs(settings.MODEL_EXPORT_PATH, exist_ok=True)
+        # Ultralytics writes exports next to the weights, so export a private copy
+        workdir = tempfile.mkdtemp(prefix=f".{model_name}-", dir=settings.MODEL_EXPORT_PATH)
+        try:
+            local_weights = os.path.join(workdir, os.path.basename(weights_path))
+            shutil.copyfile(weights_path, local_weights)
+            model = YOLO(local_weights)
+
+            kwargs = {"format": fmt, "imgsz": imgsz, "dynamic": True}
+            if int8:
+                images = calibration_images(model_name)
+                kwargs["int8"] = True
+                kwargs["data"] = _write_calibration_yaml(workdir, images, dict(model.names))
+
+            print(f"  Exporting {model_name} model to {backend} ...")
+            exported = model.export(**kwargs)
+            if not exported or not os.path.exists(exported):
+                # Older Ultralytics versions don't return the path
+                matches = glob.glob(os.path.join(workdir, "*.onnx" if fmt == "onnx" else "*_openvino_model"))
+                if not matches:
+                    raise RuntimeError(f"{backend} export produced no output")
+                exported = matches[0]
+            try:
+                os.replace(exported, target)
+            except OSError:
+                # Another worker process finished the same export first
+                if not os.path.exists(target):
+                    raise
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return target
+
+
+def path_size(path: str) -> int:
+    """Size of a model file, or the total of an exported model directory."""
+    if os.path.isdir(path):
+        return sum(
+            os.path.getsize(os.path.join(root, f))
+            for root, _, files in os.walk(path) for f in files
+        )
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
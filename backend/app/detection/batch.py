@@ -0,0 +1,150 @@
+"""
+FireSight — Detection Batches
+Compact struct-of-arrays container for one frame's detections. Models fill
+it in bulk, the tracker, event rules and analytics work on its arrays, and
+dicts are only built when detections are serialised (WebSocket, database).
+"""
+
+import threading
+import numpy as np
+from typing import Dict, Any, Iterable, List, Optional
+
+from app.detection.categories import SEVERITY_MAP, get_severity
+
+
+# Category id <-> name; ids index the arrays below
+CATEGORIES: List[str] = list(SEVERITY_MAP)
+CATEGORY_IDS: Dict[str, int] = {name: i for i, name in enumerate(CATEGORIES)}
+CATEGORY_NAMES = np.array(CATEGORIES, dtype=object)
+CATEGORY_SEVERITIES = np.array([get_severity(c) for c in CATEGORIES], dtype=object)
+
+# Process-local interned class labels ("person", "Fire", ...)
+_labels: List[str] = []
+_label_ids: Dict[str, int] = {}
+_labels_lock = threading.Lock()
+
+
+def category_id(name: str) -> int:
+    return CATEGORY_IDS[name]
+
+
+def category_ids(names: Iterable[str]) -> np.ndarray:
+    """Ids of the given category names (unknown names are ignored)."""
+    return np.array([CATEGORY_IDS[n] for n in names if n in CATEGORY_IDS], dtype=np.int16)
+
+
+def label_id(name: str) -> int:
+    """Intern a class label and return its id."""
+    label = _label_ids.get(name)
+    if label is None:
+        with _labels_lock:
+            label = _label_ids.get(name)
+            if label is None:
+                label = len(_labels)
+                _labels.append(name)
+                _label_ids[name] = label
+    return label
+
+
+def label_name(label: int) -> str:
+    return _labels[label]
+
+
+class DetectionBatch:
+    """One frame's detections as parallel NumPy arrays.
+
+    ``track_ids`` is 0 for detections the tracker hasn't seen yet. Label ids
+    are interned per process, so pickling (e.g. results coming back from an
+    analysis worker process) carries the label strings and re-interns them.
+    """
+
+    __slots__ = ("boxes", "scores", "class_ids", "category_ids", "label_ids", "track_ids")
+
+    def __init__(self, boxes, scores, class_ids, category_ids, label_ids, track_ids=None):
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        self.scores = np.asarray(scores, dtype=np.float32)
+        self.class_ids = np.asarray(class_ids, dtype=np.int32)
+        self.category_ids = np.asarray(category_ids, dtype=np.int16)
+        self.label_ids = np.asarray(label_ids, dtype=np.int32)
+        self.track_ids = (
+            np.zeros(len(self.scores), dtype=np.int64) if track_ids is None
+            else np.asarray(track_ids, dtype=np.int64)
+        )
+
+    @classmethod
+    def empty(cls) -> "DetectionBatch":
+        return cls(np.empty((0, 4)), [], [], [], [])
+
+    @classmethod
+    def concat(cls, batches: List["DetectionBatch"]) -> "DetectionBatch":
+        batches = [b for b in batches if len(b)]
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+        return cls(*(np.concatenate([getattr(b, name) for b in batches]) for name in cls.__slots__))
+
+    @classmethod
+    def from_dicts(cls, detections: List[Dict[str, Any]]) -> "DetectionBatch":
+        """Build a batch from detection dicts (e.g. legacy callers)."""
+        if not detections:
+            return cls.empty()
+        return cls(
+            [d["bbox"] for d in detections],
+            [d.get("confidence", 0.0) for d in detections],
+            [d.get("class_id", -1) for d in detections],
+            [CATEGORY_IDS[d["category"]] for d in detections],
+            [label_id(d.get("class_name") or d["category"]) for d in detections],
+            [d.get("track_id") or 0 for d in detections],
+        )
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def __getstate__(self):
+        state = {name: getattr(self, name) for name in self.__slots__}
+        unique, inverse = np.unique(self.label_ids, return_inverse=True)
+        state["label_ids"] = inverse.astype(np.int32)
+        state["labels"] = [label_name(i) for i in unique.tolist()]
+        return state
+
+    def __setstate__(self, state):
+        labels = np.array([label_id(name) for name in state.pop("labels")], dtype=np.int32)
+        label_ids = state.pop("label_ids")
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.label_ids = labels[label_ids] if len(labels) else label_ids
+
+    def select(self, index) -> "DetectionBatch":
+        """Subset by boolean mask or index array."""
+        return DetectionBatch(*(getattr(self, name)[index] for name in self.__slots__))
+
+    def category_mask(self, *categories: str) -> np.ndarray:
+        return np.isin(self.category_ids, category_ids(categories))
+
+    def centres(self) -> np.ndarray:
+        """(N, 2) box centre points."""
+        return (self.boxes[:, :2] + self.boxes[:, 2:]) / 2
+
+    def to_dicts(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Serialise to the detection dicts used by the API and database."""
+        n = len(self) if limit is None else min(limit, len(self))
+        if n == 0:
+            return []
+        categories = CATEGORY_NAMES[self.category_ids[:n]]
+        severities = CATEGORY_SEVERITIES[self.category_ids[:n]]
+        track_ids = [t or None for t in self.track_ids[:n].tolist()]
+        return [
+            {
+                "category": category,
+                "confidence": score,
+                "bbox": bbox,
+                "class_name": _labels[label],
+                "severity": severity,
+                "track_id": track_id,
+            }
+            for category, score, bbox, label, severity, track_id in zip(
+                categories, self.scores[:n].tolist(), self.boxes[:n].tolist(),
+                self.label_ids[:n].tolist(), severities, track_ids,
+            )
+        ]
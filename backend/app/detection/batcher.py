@@ -0,0 +1,181 @@
+"""
+FireSight — Cross-Camera Inference Batcher
+Gathers the latest frame from each live camera and runs them through a model
+in a single batched forward pass, then hands each result back to its caller.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.config import settings
+from app.detection.model_registry import model_registry
+
+
+class _PendingFrame:
+    """A frame waiting for a batch slot."""
+
+    __slots__ = ("key", "frame", "kwargs", "future", "submitted_at")
+
+    def __init__(self, key, frame, kwargs: Dict[str, Any]):
+        self.key = key
+        self.frame = frame
+        self.kwargs = kwargs
+        self.future: Future = Future()
+        self.submitted_at = time.perf_counter()
+
+
+class InferenceBatcher:
+    """Batches frames for one model across cameras.
+
+    A batch is dispatched as soon as it holds ``max_batch_size`` frames or the
+    oldest frame has waited ``max_wait_ms``. Only the newest frame per camera
+    is kept: a second submission for the same key supersedes (and cancels)
+    the one still waiting.
+    """
+
+    def __init__(self, model_name: str, max_batch_size: int = None, max_wait_ms: float = None, registry=None):
+        self.model_name = model_name
+        self.max_batch_size = max(1, max_batch_size or settings.BATCH_MAX_SIZE)
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else settings.BATCH_MAX_WAIT_MS) / 1000.0
+        self.registry = registry or model_registry
+
+        self._pending: Dict[Any, _PendingFrame] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        self.batches_run = 0
+        self.frames_run = 0
+        self.frames_superseded = 0
+        self.total_wait_seconds = 0.0
+        self.max_batch_seen = 0
+
+    def submit(self, frame, key=None, **kwargs) -> Future:
+        """Queue a frame; the returned future resolves to its Results object."""
+        item = _PendingFrame(key if key is not None else object(), frame, kwargs)
+        with self._cond:
+            self._ensure_started()
+            previous = self._pending.pop(item.key, None)
+            if previous is not None:
+                previous.future.cancel()
+                self.frames_superseded += 1
+            self._pending[item.key] = item
+            self._cond.notify()
+        return item.future
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._running = True
+            self._thread = threading.Thread(
+                target=self._run, name=f"batcher-{self.model_name}", daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Stop the dispatch thread; frames still queued are cancelled."""
+        with self._cond:
+            self._running = False
+            for item in self._pending.values():
+                item.future.cancel()
+            self._pending.clear()
+            self._cond.notify_all()
+
+    def _collect(self) -> List[_PendingFrame]:
+        """Block until a batch is ready and take it off the pending map."""
+        with self._cond:
+            while self._running and not self._pending:
+                self._cond.wait()
+            if not self._running:
+                return []
+
+            oldest = min(p.submitted_at for p in self._pending.values())
+            deadline = oldest + self.max_wait
+            while self._running and len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            items = sorted(self._pending.values(), key=lambda p: p.submitted_at)
+            batch = items[:self.max_batch_size]
+            for item in batch:
+                del self._pending[item.key]
+            return batch
+
+    def _run(self):
+        while self._running:
+            batch = self._collect()
+            if not batch:
+                continue
+
+            # Frames with different call options (conf, classes, ...) can't share a pass
+            groups: Dict[Tuple, List[_PendingFrame]] = {}
+            for item in batch:
+                if item.future.set_running_or_notify_cancel():
+                    groups.setdefault(_kwargs_key(item.kwargs), []).append(item)
+
+            now = time.perf_counter()
+            for items in groups.values():
+                self._dispatch(items, now)
+
+    def _dispatch(self, items: List[_PendingFrame], now: float):
+        try:
+            results = self.registry.predict(
+                self.model_name, [item.frame for item in items], **items[0].kwargs
+            )
+        except Exception as e:
+            for item in items:
+                item.future.set_exception(e)
+            return
+
+        self.batches_run += 1
+        self.frames_run += len(items)
+        self.max_batch_seen = max(self.max_batch_seen, len(items))
+        for i, item in enumerate(items):
+            self.total_wait_seconds += now - item.submitted_at
+            item.future.set_result(results[i] if i < len(results) else None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batching effectiveness counters."""
+        return {
+            "model": self.model_name,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches_run": self.batches_run,
+            "frames_run": self.frames_run,
+            "frames_superseded": self.frames_superseded,
+            "mean_batch_size": round(self.frames_run / self.batches_run, 2) if self.batches_run else 0,
+            "max_batch_seen": self.max_batch_seen,
+            "mean_wait_ms": round(self.total_wait_seconds / self.frames_run * 1000.0, 2) if self.frames_run else 0,
+            "pending": len(self._pending),
+        }
+
+
+def _kwargs_key(kwargs: Dict[str, Any]) -> Tuple:
+    """Hashable key for a set of predict() keyword arguments."""
+    return tuple(sorted(
+        (k, tuple(v) if isinstance(v, (list, set)) else v) for k, v in kwargs.items()
+    ))
+
+
+# One batcher per model, shared by every live pipeline in this process
+_batchers: Dict[str, InferenceBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(model_name: str) -> InferenceBatcher:
+    """Return the shared batcher for a model, creating it on first use."""
+    with _batchers_lock:
+        batcher = _batchers.get(model_name)
+        if batcher is None:
+            batcher = InferenceBatcher(model_name)
+            _batchers[model_name] = batcher
+        return batcher
+
+
+def batcher_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every batcher created so far."""
+    with _batchers_lock:
+        return {name: b.stats() for name, b in _batchers.items()}
@@ -3,8 +3,14 @@ FireSight — Crowd Density Estimation
 Counts people and estimates crowd density levels with threshold alerting.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
+import numpy as np
+
+from app.detection.batch import DetectionBatch, category_id
+from app.detection.zones import ZoneMap
+
+HUMAN = category_id("human")
 
 
 class CrowdDensityAnalyzer:
@@ -23,10 +29,13 @@ class CrowdDensityAnalyzer:
         self.threshold = 20
         self.history: List[Dict] = []
 
-    def analyze(self, detections: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Analyze crowd density from current detections."""
-        people = [d for d in detections if d.get("category") == "human"]
-        people_count = len(people)
+    def analyze(self, detections: Union[DetectionBatch, List[Dict[str, Any]]],
+                zone_map: Optional[ZoneMap] = None) -> Dict[str, Any]:
+        """Analyze crowd density from current detections, with per-zone counts if a zone map is given."""
+        if not isinstance(detections, DetectionBatch):
+            detections = DetectionBatch.from_dicts(detections)
+        humans = detections.category_ids == HUMAN
+        people_count = int(np.count_nonzero(humans))
         density_per_sqm = people_count / self.area_sqm if self.area_sqm > 0 else 0
         density_level = self._get_density_level(people_count)
         threshold_exceeded = people_count >= self.threshold
@@ -40,6 +49,8 @@ class CrowdDensityAnalyzer:
             "area_sqm": self.area_sqm,
             "timestamp": datetime.utcnow().isoformat(),
         }
+        if zone_map is not None and len(zone_map):
+            snapshot["zone_counts"] = zone_map.counts(detections.centres()[humans])
 
         self.history.append(snapshot)
         if len(self.history) > 1000:
@@ -3,8 +3,12 @@ FireSight — Dwell Time Analytics
 Tracks how long objects stay in defined zones and alerts on thresholds.
 """
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
 from datetime import datetime
+import numpy as np
+
+from app.detection.batch import DetectionBatch
+from app.detection.zones import ZoneMap
 
 
 class DwellTimeTracker:
@@ -12,69 +16,93 @@ class DwellTimeTracker:
 
     def __init__(self):
         self.active_dwells: Dict[str, Dict] = {}  # track_id -> dwell info
-        self.zones: List[Dict] = []
+        self.zone_map = ZoneMap()
         self.default_threshold_seconds = 300  # 5 minutes
 
-    def set_zones(self, zones: List[Dict]):
-        """Set monitoring zones with dwell time thresholds."""
-        self.zones = zones
+    @property
+    def zones(self) -> List[Dict]:
+        return self.zone_map.zones
+
+    def set_zones(self, zones: Union[List[Dict], ZoneMap]):
+        """Set monitoring zones with dwell time thresholds (raw zone dicts or a compiled ZoneMap)."""
+        self.zone_map = zones if isinstance(zones, ZoneMap) else ZoneMap(zones)
 
     def update(self, track_id: str, bbox: List[float], timestamp: float) -> Optional[Dict[str, Any]]:
         """Update dwell tracking for a tracked object."""
         center = [(bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2]
+        in_zones = self.zone_map.membership(np.array([center]))[0].tolist()
 
-        for zone in self.zones:
-            zone_name = zone.get("name", "unnamed")
-            threshold = zone.get("dwell_threshold", self.default_threshold_seconds)
-            points = zone.get("points", [])
-
-            in_zone = self._point_in_polygon(center, points) if len(points) >= 3 else False
-            key = f"{track_id}_{zone_name}"
-
-            if in_zone:
-                if key not in self.active_dwells:
-                    self.active_dwells[key] = {
-                        "track_id": track_id,
-                        "zone_name": zone_name,
-                        "entered_at": timestamp,
-                        "last_seen": timestamp,
-                        "threshold": threshold,
-                        "alerted": False,
-                    }
-                else:
-                    self.active_dwells[key]["last_seen"] = timestamp
-
-                dwell = self.active_dwells[key]
-                dwell_seconds = timestamp - dwell["entered_at"]
-                exceeded = dwell_seconds >= threshold
-
-                if exceeded and not dwell["alerted"]:
-                    dwell["alerted"] = True
-                    return {
-                        "track_id": track_id,
-                        "zone_name": zone_name,
-                        "dwell_seconds": round(dwell_seconds, 1),
-                        "threshold": threshold,
-                        "threshold_exceeded": True,
-                        "entered_at": datetime.fromtimestamp(dwell["entered_at"]).isoformat(),
-                        "timestamp": datetime.fromtimestamp(timestamp).isoformat(),
-                    }
-            else:
-                if key in self.active_dwells:
-                    departed = self.active_dwells.pop(key)
-                    dwell_seconds = timestamp - departed["entered_at"]
-                    return {
-                        "track_id": track_id,
-                        "zone_name": zone_name,
-                        "dwell_seconds": round(dwell_seconds, 1),
-                        "threshold": departed["threshold"],
-                        "threshold_exceeded": dwell_seconds >= departed["threshold"],
-                        "entered_at": datetime.fromtimestamp(departed["entered_at"]).isoformat(),
-                        "departed_at": datetime.fromtimestamp(timestamp).isoformat(),
-                    }
+        for zone, in_zone in zip(self.zones, in_zones):
+            event = self._step(track_id, zone, in_zone, timestamp)
+            if event is not None:
+                return event
 
         return None
 
+    def update_batch(self, batch: DetectionBatch, timestamp: float) -> List[Dict[str, Any]]:
+        """Update dwell tracking for every tracked detection in a frame at once."""
+        tracked = np.flatnonzero(batch.track_ids)
+        if not len(tracked) or not self.zones:
+            return []
+
+        inside_zones = self.zone_map.membership(batch.centres()[tracked])
+        track_ids = batch.track_ids[tracked].tolist()
+        events = []
+        for zone, in_zone in zip(self.zones, inside_zones.T):
+            for track_id, inside in zip(track_ids, in_zone.tolist()):
+                event = self._step(track_id, zone, inside, timestamp)
+                if event is not None:
+                    events.append(event)
+        return events
+
+    def _step(self, track_id, zone: Dict, in_zone: bool, timestamp: float) -> Optional[Dict[str, Any]]:
+        """Advance one track's dwell state in one zone."""
+        zone_name = zone.get("name", "unnamed")
+        threshold = zone.get("dwell_threshold", self.default_threshold_seconds)
+        key = f"{track_id}_{zone_name}"
+
+        if in_zone:
+            if key not in self.active_dwells:
+                self.active_dwells[key] = {
+                    "track_id": track_id,
+                    "zone_name": zone_name,
+                    "entered_at": timestamp,
+                    "last_seen": timestamp,
+                    "threshold": threshold,
+                    "alerted": False,
+                }
+            else:
+                self.active_dwells[key]["last_seen"] = timestamp
+
+            dwell = self.active_dwells[key]
+            dwell_seconds = timestamp - dwell["entered_at"]
+            exceeded = dwell_seconds >= threshold
+
+            if exceeded and not dwell["alerted"]:
+                dwell["alerted"] = True
+                return {
+                    "track_id": track_id,
+                    "zone_name": zone_name,
+                    "dwell_seconds": round(dwell_seconds, 1),
+                    "threshold": threshold,
+                    "threshold_exceeded": True,
+                    "entered_at": datetime.fromtimestamp(dwell["entered_at"]).isoformat(),
+                    "timestamp": datetime.fromtimestamp(timestamp).isoformat(),
+                }
+        elif key in self.active_dwells:
+            departed = self.active_dwells.pop(key)
+            dwell_seconds = timestamp - departed["entered_at"]
+            return {
+                "track_id": track_id,
+                "zone_name": zone_name,
+                "dwell_seconds": round(dwell_seconds, 1),
+                "threshold": departed["threshold"],
+                "threshold_exceeded": dwell_seconds >= departed["threshold"],
+                "entered_at": datetime.fromtimestamp(departed["entered_at"]).isoformat(),
+                "departed_at": datetime.fromtimestamp(timestamp).isoformat(),
+            }
+        return None
+
     def get_active_dwells(self) -> List[Dict]:
         """Get all currently active dwell sessions."""
         results = []
@@ -99,29 +127,13 @@ class DwellTimeTracker:
         for key in stale:
             del self.active_dwells[key]
 
-    @staticmethod
-    def _point_in_polygon(point, polygon):
-        if len(polygon) < 3:
-            return False
-        n = len(polygon)
-        inside = False
-        x, y = point
-        j = n - 1
-        for i in range(n):
-            xi, yi = polygon[i]
-            xj, yj = polygon[j]
-            if ((yi > y) != (yj > y)) and (x < (xj - xi) * (y - yi) / (yj - yi) + xi):
-                inside = not inside
-            j = i
-        return inside
-
     async def save_dwell_log(self, camera_id: int, dwell_data: Dict, db):
         """Persist dwell log to database."""
         from app.models import DwellLog
         log = DwellLog(
             camera_id=camera_id,
             zone_name=dwell_data["zone_name"],
-            track_id=dwell_data["track_id"],
+            track_id=str(dwell_data["track_id"]),
             entered_at=dwell_data.get("entered_at"),
             departed_at=dwell_data.get("departed_at"),
             dwell_seconds=dwell_data["dwell_seconds"],
@@ -6,163 +6,387 @@ Supports general objects, fire/smoke, PPE, and plant/machinery detection.
 
 import cv2
 import numpy as np
-from ultralytics import YOLO
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import asyncio
-import os
 
 from app.config import settings
-from app.detection.categories import CATEGORY_MAP, get_severity
+from app.detection.batch import DetectionBatch
 from app.detection.tracker import IoUTracker
 from app.detection.event_rules import EventRulesEngine
+from app.detection.model_registry import model_registry
+from app.detection.batcher import get_batcher
+from app.detection.plan import compile_plan, result_arrays
+from app.detection.result_cache import analysis_cache, SegmentDetections
+from app.detection.executor import inference_executor
+from app.detection.motion import MotionGate
+from app.detection.roi import RegionOfInterest
+from app.detection.zones import ZoneMap
+from app.detection.fire_prefilter import FirePrefilter
+from app.detection.inference_scheduler import inference_scheduler, camera_priority
+from app.utils.video import LatestFrameReader
+
+
+# Engines with a running live pipeline, by camera id
+live_pipelines: Dict[int, "DetectionEngine"] = {}
+
+
+def probe_video(video_path: str) -> Dict[str, Any]:
+    """Read frame rate and frame count from a video file."""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {video_path}")
+    try:
+        return {
+            "fps": cap.get(cv2.CAP_PROP_FPS) or 25.0,
+            "frame_count": int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+        }
+    finally:
+        cap.release()
+
+
+def plan_segments(total_frames: int, fps: float, step: int) -> List[tuple]:
+    """Split a file into [start, end) frame ranges aligned to the sampling step."""
+    if total_frames <= 0:
+        # Unknown length (some containers): one open-ended segment
+        return [(0, None)]
+    seg_frames = max(step, int(settings.ANALYSIS_SEGMENT_SECONDS * fps) // step * step)
+    starts = list(range(0, total_frames, seg_frames))
+    # The container's frame count is only an estimate, so the last segment reads to EOF
+    return [(start, start + seg_frames) for start in starts[:-1]] + [(starts[-1], None)]
+
+
+def _sampled_frames(cap, start: int, end: Optional[int], step: int):
+    """Yield (frame_index, frame) for every ``step``-th frame in [start, end).
+
+    Skipped frames are never retrieved: short gaps use grab(), which still
+    decodes (inter-frame codecs need every frame) but skips the retrieve and
+    colour conversion. Gaps of ANALYSIS_SEEK_MIN_STEP frames or more seek
+    instead, which decodes from the nearest preceding keyframe, so it only
+    pays off when keyframes are closer together than the gap.
+    """
+    use_seek = step >= settings.ANALYSIS_SEEK_MIN_STEP
+    if start:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    # Sampled frames are those where (index + 1) is a multiple of step
+    index = start
+    target = start + (step - 1 - start % step)
+    while end is None or target < end:
+        if use_seek and target > index:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            index = target
+        while index < target:
+            if not cap.grab():
+                return
+            index += 1
+
+        ret, frame = cap.read()
+        if not ret:
+            return
+        index += 1
+        yield target, frame
+        target += step
+
+
+def _infer_segment(video_path: str, start: int, end: Optional[int], step: int,
+                   model_kwargs: Dict[str, Dict[str, Any]]) -> tuple:
+    """Decode the segment once and run each model with its own predict kwargs.
+
+    Returns (sampled frame indices, {model_name: SegmentDetections},
+    {model_name: backend that ran it, or None if it never ran}).
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {video_path}")
+
+    frames = []
+    collected = {name: ([], [], [], []) for name in model_kwargs}
+    try:
+        for frame_index, frame in _sampled_frames(cap, start, end, step):
+            frames.append(frame_index)
+            for name, kwargs in model_kwargs.items():
+                index_parts, cls_parts, score_parts, box_parts = collected[name]
+                for r in model_registry.predict(name, frame, **kwargs):
+                    cls_ids, scores, xyxy = result_arrays(r)
+                    index_parts.append(np.full(len(cls_ids), frame_index, dtype=np.int64))
+                    cls_parts.append(cls_ids)
+                    score_parts.append(scores)
+                    box_parts.append(xyxy)
+    finally:
+        cap.release()
+
+    outputs = {}
+    for name, (index_parts, cls_parts, score_parts, box_parts) in collected.items():
+        outputs[name] = SegmentDetections(
+            frames,
+            np.concatenate(index_parts) if index_parts else [],
+            np.concatenate(cls_parts) if cls_parts else [],
+            np.concatenate(score_parts) if score_parts else [],
+            np.concatenate(box_parts) if box_parts else np.empty((0, 4)),
+        )
+    backends = {name: model_registry.loaded_backend(name) for name in model_kwargs}
+    return frames, outputs, backends
+
+
+def analyse_segment(video_path: str, start: int, end: Optional[int], step: int,
+                    categories: List[str] = None, content_hash: Optional[str] = None) -> List[tuple]:
+    """Infer every ``step``-th frame in [start, end); runs in a worker.
+
+    With a ``content_hash``, each model's raw output (all classes, down to
+    the cache's floor confidence) is looked up in the analysis result cache
+    first; only models that miss are run, and the segment is not decoded at
+    all when every model hits. The camera plan's class filter and thresholds
+    are then applied to the raw output.
+    Returns [(frame_index, DetectionBatch)] without track ids.
+    """
+    plan = compile_plan(categories)
+    use_cache = content_hash is not None and analysis_cache.enabled
+
+    outputs: Dict[str, SegmentDetections] = {}
+    cached_models = []
+    to_run = {}
+    for model_plan in plan.models:
+        key = None
+        if use_cache and analysis_cache.covers(model_plan):
+            key = analysis_cache.key(content_hash, model_plan.name, start, end, step)
+        if key is not None:
+            cached = analysis_cache.get(key)
+            if cached is not None:
+                outputs[model_plan.name] = cached
+                continue
+            cached_models.append(model_plan.name)
+            to_run[model_plan.name] = analysis_cache.raw_predict_kwargs()
+        else:
+            to_run[model_plan.name] = model_plan.predict_kwargs()
+
+    if to_run or not outputs:
+        frames, fresh, backends = _infer_segment(video_path, start, end, step, to_run)
+        for name in cached_models:
+            # Stored under the backend that actually ran, which may be a PyTorch fallback
+            if backends[name] is not None:
+                key = analysis_cache.key(content_hash, name, start, end, step, backend=backends[name])
+                if key is not None:
+                    analysis_cache.put(key, fresh[name])
+        outputs.update(fresh)
+    else:
+        frames = next(iter(outputs.values())).frames.tolist()
+
+    results = []
+    for frame_index in frames:
+        results.append((frame_index, DetectionBatch.concat([
+            model_plan.extract_arrays(*outputs[model_plan.name].for_frame(frame_index))
+            for model_plan in plan.models
+        ])))
+    return results
 
 
 class DetectionEngine:
     """Main YOLO detection engine for FireSight."""
 
-    def __init__(self):
-        self.models = {}
+    def __init__(self, camera_id: Optional[int] = None, batching: bool = False):
+        # Models are shared process-wide; only tracking state is per engine
+        self.models = model_registry
+        self.camera_id = camera_id
+        self.batching = batching and settings.BATCH_INFERENCE_ENABLED
         self.tracker = IoUTracker()
         self.event_rules = EventRulesEngine()
-        self._load_models()
-
-    def _load_models(self):
-        """Load all YOLO models."""
-        # General model (COCO - people, vehicles, bicycles)
-        if os.path.exists(settings.YOLO_GENERAL_MODEL):
-            self.models["general"] = YOLO(settings.YOLO_GENERAL_MODEL)
-            print(f"  Loaded general model: {settings.YOLO_GENERAL_MODEL}")
-
-        # Fire & smoke model
-        if os.path.exists(settings.YOLO_FIRE_SMOKE_MODEL):
-            self.models["fire_smoke"] = YOLO(settings.YOLO_FIRE_SMOKE_MODEL)
-            print(f"  Loaded fire/smoke model: {settings.YOLO_FIRE_SMOKE_MODEL}")
-
-        # PPE model
-        if os.path.exists(settings.YOLO_PPE_MODEL):
-            self.models["ppe"] = YOLO(settings.YOLO_PPE_MODEL)
-            print(f"  Loaded PPE model: {settings.YOLO_PPE_MODEL}")
-
-        # Plant/machinery model
-        if os.path.exists(settings.YOLO_PLANT_MODEL):
-            self.models["plant"] = YOLO(settings.YOLO_PLANT_MODEL)
-            print(f"  Loaded plant model: {settings.YOLO_PLANT_MODEL}")
-
-    def detect_frame(self, frame: np.ndarray, categories: List[str] = None, confidence: float = None) -> List[Dict[str, Any]]:
-        """Run detection on a single frame across all relevant models."""
-        if confidence is None:
-            confidence = settings.DEFAULT_CONFIDENCE
-
-        detections = []
-
-        # General model (humans, vehicles, bicycles)
-        if "general" in self.models:
-            results = self.models["general"](frame, conf=confidence, verbose=False)
-            for r in results:
-                for box in r.boxes:
-                    cls_id = int(box.cls[0])
-                    cls_name = r.names[cls_id]
-                    category = CATEGORY_MAP.get(cls_name)
-
-                    if category and (categories is None or category in categories):
-                        detections.append({
-                            "category": category,
-                            "confidence": float(box.conf[0]),
-                            "bbox": box.xyxy[0].tolist(),
-                            "class_name": cls_name,
-                            "severity": get_severity(category),
-                        })
-
-        # Fire & smoke model
-        if "fire_smoke" in self.models and (categories is None or "fire" in categories or "smoke" in categories):
-            results = self.models["fire_smoke"](frame, conf=confidence * 0.8, verbose=False)
-            for r in results:
-                for box in r.boxes:
-                    cls_id = int(box.cls[0])
-                    cls_name = r.names[cls_id].lower()
-                    category = "fire" if "fire" in cls_name else "smoke"
-                    detections.append({
-                        "category": category,
-                        "confidence": float(box.conf[0]),
-                        "bbox": box.xyxy[0].tolist(),
-                        "class_name": cls_name,
-                        "severity": get_severity(category),
-                    })
-
-        # PPE model
-        if "ppe" in self.models and (categories is None or "ppe" in categories):
-            results = self.models["ppe"](frame, conf=confidence, verbose=False)
-            for r in results:
-                for box in r.boxes:
-                    cls_id = int(box.cls[0])
-                    cls_name = r.names[cls_id]
-                    detections.append({
-                        "category": "ppe",
-                        "confidence": float(box.conf[0]),
-                        "bbox": box.xyxy[0].tolist(),
-                        "class_name": cls_name,
-                        "severity": "high",
-                    })
-
-        # Plant/machinery model
-        if "plant" in self.models and (categories is None or "plant" in categories):
-            results = self.models["plant"](frame, conf=confidence, verbose=False)
-            for r in results:
-                for box in r.boxes:
-                    cls_id = int(box.cls[0])
-                    cls_name = r.names[cls_id]
-                    detections.append({
-                        "category": "plant",
-                        "confidence": float(box.conf[0]),
-                        "bbox": box.xyxy[0].tolist(),
-                        "class_name": cls_name,
-                        "severity": "medium",
-                    })
 
-        # Apply tracking
-        tracked = self.tracker.update(detections)
+        # Live pipeline state
+        self.reader: Optional[LatestFrameReader] = None
+        self.motion_gate: Optional[MotionGate] = None
+        self.roi: Optional[RegionOfInterest] = None
+        self.fire_prefilter: Optional[FirePrefilter] = None
+        self.zone_map: Optional[ZoneMap] = None
+        self.last_detections: List[Dict[str, Any]] = []
+
+    def update_zones(self, zones: Optional[List[Dict]]):
+        """Recompile the camera's zones for the ROI and every zone consumer.
+
+        Called when the pipeline starts and whenever the camera's zones are
+        edited while it streams. The new ZoneMap is swapped in whole, so a
+        frame in flight sees either the old zones or the new ones.
+        """
+        zone_map = ZoneMap(zones or [])
+        if self.roi is not None:
+            self.roi.set_zones(zones or [])
+        self.event_rules.set_zones(zone_map)
+        self.zone_map = zone_map
+
+    def _predict(self, name: str, frame: np.ndarray, **kwargs) -> list:
+        """Run one model on a frame, via the cross-camera batcher when enabled."""
+        if self.batching and name in settings.BATCH_MODELS:
+            result = get_batcher(name).submit(frame, key=self.camera_id, **kwargs).result()
+            return [result] if result is not None else []
+        return self.models.predict(name, frame, **kwargs)
+
+    def detect_frame(self, frame: np.ndarray, categories: List[str] = None, confidence: float = None,
+                     thresholds: Optional[Dict[str, float]] = None,
+                     roi: Optional[RegionOfInterest] = None,
+                     fire_prefilter: Optional[FirePrefilter] = None) -> List[Dict[str, Any]]:
+        """Run detection on a single frame across the models the camera's plan needs."""
+        detections = self.infer_frame(frame, categories, confidence, thresholds, roi, fire_prefilter)
+        return self.track_frame(detections, frame)
+
+    def infer_frame(self, frame: np.ndarray, categories: List[str] = None, confidence: float = None,
+                    thresholds: Optional[Dict[str, float]] = None,
+                    roi: Optional[RegionOfInterest] = None,
+                    fire_prefilter: Optional[FirePrefilter] = None) -> DetectionBatch:
+        """Run the planned models on a frame; no tracking or event rules.
+
+        With an active ``roi`` the models only see the zone region and boxes
+        are shifted back to full-frame coordinates. With a ``fire_prefilter``
+        the fire/smoke model only runs on the regions it flags (or the full
+        frame on its periodic safety check).
+        """
+        plan = compile_plan(categories, confidence, thresholds)
+        region, offset = roi.apply(frame) if roi is not None else (frame, None)
+
+        batches = []
+        for model_plan in plan.models:
+            if model_plan.name == "fire_smoke" and fire_prefilter is not None:
+                batches.append(self._infer_fire_regions(model_plan, region, offset, fire_prefilter))
+                continue
+            results = self._predict(model_plan.name, region, **model_plan.predict_kwargs())
+            batches.extend(model_plan.extract(r, offset) for r in results)
+        return DetectionBatch.concat(batches)
+
+    def _infer_fire_regions(self, model_plan, frame: np.ndarray, offset: Optional[np.ndarray],
+                            fire_prefilter: FirePrefilter) -> DetectionBatch:
+        """Cascade stage: run the fire/smoke model only where the prefilter points."""
+        mode, boxes = fire_prefilter.check(frame)
+        if mode == "skip":
+            return DetectionBatch.empty()
+        if mode == "full":
+            boxes = [(0, 0, frame.shape[1], frame.shape[0])]
+
+        base = offset if offset is not None else np.zeros(4, dtype=np.float32)
+        batches = []
+        for x1, y1, x2, y2 in boxes:
+            crop = frame[y1:y2, x1:x2]
+            crop_offset = base + np.array([x1, y1, x1, y1], dtype=np.float32)
+            for r in self._predict(model_plan.name, crop, **model_plan.predict_kwargs()):
+                batches.append(model_plan.extract(r, crop_offset))
+        return DetectionBatch.concat(batches)
+
+    def track_frame(self, batch: DetectionBatch, frame: np.ndarray = None) -> List[Dict[str, Any]]:
+        """Assign track ids and evaluate event rules on one frame's detections.
+
+        This is the serialisation boundary: the tracked batch and any events
+        come back as detection dicts, capped at MAX_DETECTIONS_PER_FRAME.
+        """
+        # Apply tracking; per-track rule state follows the tracker's lifecycle
+        tracked = self.tracker.update(batch)
+        if len(self.tracker.retired_ids):
+            self.event_rules.forget_tracks(self.tracker.retired_ids.tolist())
 
         # Apply event rules (fall, accident, intrusion detection)
         events = self.event_rules.evaluate(tracked, frame)
-        tracked.extend(events)
-
-        return tracked[:settings.MAX_DETECTIONS_PER_FRAME]
 
-    async def analyse_video(self, video_path: str, db=None) -> List[Dict]:
+        limit = settings.MAX_DETECTIONS_PER_FRAME
+        detections = tracked.to_dicts(limit)
+        detections.extend(events[:limit - len(detections)])
+        return detections
+
+    def process_live_frame(self, frame: np.ndarray, categories: List[str] = None, ai_settings=None):
+        """Motion-gate a live frame, then run detection only if the scene changed.
+
+        Returns (detections, inferred). When the gate skips a frame the previous
+        detections are reused and the tracker is left untouched.
+        """
+        thresholds = None
+        if ai_settings is not None:
+            thresholds = ai_settings.confidence_thresholds
+            if self.motion_gate is not None:
+                self.motion_gate.configure(ai_settings.motion_sensitivity, ai_settings.motion_min_interval)
+            if self.roi is not None:
+                self.roi.configure(ai_settings.roi_mode, ai_settings.roi_padding)
+            if self.fire_prefilter is not None and ai_settings.fire_prefilter_interval is not None:
+                self.fire_prefilter.full_frame_interval = ai_settings.fire_prefilter_interval
+
+        # Motion outside the ROI can't change what the models see, so gate on the region
+        use_gate = self.motion_gate is not None and (ai_settings is None or ai_settings.motion_gate)
+        if use_gate:
+            region = self.roi.apply(frame)[0] if self.roi is not None else frame
+            if not self.motion_gate.should_infer(region):
+                return self.last_detections, False
+
+        use_prefilter = ai_settings is None or ai_settings.fire_prefilter
+        self.last_detections = self.detect_frame(
+            frame, categories, thresholds=thresholds, roi=self.roi,
+            fire_prefilter=self.fire_prefilter if use_prefilter else None,
+        )
+        return self.last_detections, True
+
+    def live_stats(self) -> Dict[str, Any]:
+        """Per-camera live pipeline metrics."""
+        return {
+            "capture": self.reader.stats() if self.reader else None,
+            "motion": self.motion_gate.stats() if self.motion_gate else None,
+            "roi": self.roi.stats() if self.roi else None,
+            "zones": self.zone_map.stats() if self.zone_map else None,
+            "fire_prefilter": self.fire_prefilter.stats() if self.fire_prefilter else None,
+            "memory": self.memory_stats(),
+        }
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """Per-camera tracking state size, to confirm it stays flat on long runs."""
+        rules = self.event_rules.memory_stats()
+        return {
+            "live_tracks": len(self.tracker),
+            "tracker_bytes": self.tracker.memory_bytes(),
+            "history_tracks": rules["tracks"],
+            "history_bytes": rules["history_bytes"],
+            "total_bytes": self.tracker.memory_bytes() + rules["history_bytes"],
+        }
+
+    async def analyse_video(self, video_path: str, db=None, categories: List[str] = None) -> List[Dict]:
         """Analyse a full video file and return all detections."""
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            raise ValueError(f"Cannot open video: {video_path}")
-
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         all_incidents = []
-        frame_count = 0
-
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            frame_count += 1
-            # Process every Nth frame based on FPS
-            if frame_count % max(1, int(fps)) != 0:
-                continue
-
-            detections = self.detect_frame(frame)
-
+        async for frame_number, timestamp, detections in self.iter_video_analysis(video_path, categories):
             for det in detections:
-                incident = {
-                    "frame": frame_count,
-                    "timestamp": frame_count / fps,
+                all_incidents.append({
+                    "frame": frame_number,
+                    "timestamp": timestamp,
                     **det,
-                }
-                all_incidents.append(incident)
-
-        cap.release()
+                })
         return all_incidents
 
+    async def iter_video_analysis(self, video_path: str, categories: List[str] = None, info: Dict[str, Any] = None,
+                                  content_hash: Optional[str] = None):
+        """Yield (frame_number, timestamp, detections) for each sampled frame, in order.
+
+        One frame per second is sampled. Long files are split into time
+        segments that are decoded and inferred in parallel worker processes;
+        results are merged in frame order and tracked sequentially here, so
+        track ids stay consistent across segment boundaries. Passing the
+        file's ``content_hash`` enables the raw detection cache.
+        """
+        if info is None:
+            info = await inference_executor.run(probe_video, video_path)
+        fps = info["fps"]
+        step = max(1, int(fps))
+        segments = plan_segments(info["frame_count"], fps, step)
+
+        # A single segment gains nothing from a worker process, and the thread
+        # pool shares this process's already-loaded models
+        pool = "process" if len(segments) > 1 else "thread"
+        tasks = [
+            asyncio.create_task(inference_executor.run(
+                analyse_segment, video_path, start, end, step, categories, content_hash, pool=pool,
+            ))
+            for start, end in segments
+        ]
+
+        try:
+            for task in tasks:
+                for frame_index, raw in await task:
+                    frame_number = frame_index + 1
+                    yield frame_number, frame_number / fps, self.track_frame(raw)
+        finally:
+            # Stopping early (error or cancelled job) drops segments not yet started
+            for task in tasks:
+                task.cancel()
+
     async def run_live(self, camera_id: int, session_id: int):
         """Run live detection on a camera stream (background task)."""
         from app.database import async_session
@@ -175,29 +399,77 @@ class DetectionEngine:
             if not camera:
                 return
 
-            cap = cv2.VideoCapture(camera.stream_url)
-            if not cap.isOpened():
+            reader = LatestFrameReader(camera.stream_url)
+            if not await inference_executor.run(reader.open):
                 return
-
+            reader.start()
+            self.reader = reader
+            self.camera_id = camera_id
+            if settings.MOTION_GATE_ENABLED:
+                self.motion_gate = MotionGate()
+            self.roi = RegionOfInterest(camera.zones or [], mode=settings.ROI_DEFAULT_MODE)
+            if settings.FIRE_PREFILTER_ENABLED:
+                self.fire_prefilter = FirePrefilter()
+            self.update_zones(camera.zones)
+            live_pipelines[camera_id] = self
+
+            from app.routers.detection import active_sessions
+            from app.routers.websocket import broadcast_detection
+            from app.routers.settings import camera_settings
+            from app.services.incident_writer import incident_writer
+
+            inference_scheduler.register(camera_id, priority=camera_priority(camera.detection_categories))
             try:
-                while camera.detection_enabled:
-                    ret, frame = cap.read()
-                    if not ret:
-                        await asyncio.sleep(1)
+                while camera.detection_enabled and camera_id in active_sessions:
+                    ai_settings = camera_settings.get(camera_id)
+                    if ai_settings is not None:
+                        inference_scheduler.configure(
+                            camera_id, ai_settings.target_fps,
+                            ai_settings.priority or camera_priority(camera.detection_categories),
+                        )
+
+                    # The scheduler paces this camera to its (possibly degraded) rate
+                    await inference_scheduler.wait_turn(camera_id)
+
+                    # The capture thread keeps decoding; we always take the newest
+                    # frame, so slow inference drops stale frames instead of lagging
+                    frame = await reader.next_frame()
+                    if frame is None:
                         continue
 
-                    detections = self.detect_frame(frame, camera.detection_categories)
+                    # Slots are shared across cameras earliest-deadline-first. Gating
+                    # and inference block, so they run on the worker pool; the event
+                    # loop stays free for HTTP, WebSockets and other cameras (and
+                    # batched calls can gather across cameras)
+                    async with inference_scheduler.slot(camera_id):
+                        newer, _ = reader.latest()
+                        if newer is not None:
+                            frame = newer
+                        detections, inferred = await inference_executor.run(
+                            self.process_live_frame, frame, camera.detection_categories,
+                            ai_settings, key=camera_id,
+                        )
 
                     # Broadcast via WebSocket
-                    from app.routers.websocket import broadcast_detection
                     await broadcast_detection(camera_id, {
                         "type": "detection",
                         "camera_id": camera_id,
                         "detections": detections,
+                        "inferred": inferred,
                         "timestamp": datetime.utcnow().isoformat(),
                     })
 
-                    await asyncio.sleep(0.033)  # ~30fps
+                    # Freshly inferred detections are folded into per-track incidents by
+                    # the write-behind writer; this only waits if the database has fallen behind
+                    if inferred:
+                        await incident_writer.submit(
+                            camera_id, detections, session_id=session_id,
+                            ended_tracks=self.tracker.retired_ids.tolist(),
+                        )
 
             finally:
-                cap.release()
+                live_pipelines.pop(camera_id, None)
+                incident_writer.close_camera(camera_id)
+                inference_scheduler.unregister(camera_id)
+                inference_executor.forget(camera_id)
+                await asyncio.to_thread(reader.stop)
@@ -3,65 +3,141 @@ FireSight — Event Rules Engine
 Detects complex events: falls, accidents, intrusions based on tracked objects.
 """
 
-from typing import List, Dict, Any
+import sys
+from typing import List, Dict, Any, Iterable, Tuple, Union
 import numpy as np
 
+from app.detection.batch import DetectionBatch, category_id, category_ids
+from app.detection.zones import ZoneMap
+
+HUMAN = category_id("human")
+VEHICLE_LIKE = category_ids(["vehicle", "plant"])
+
+
+class TrackHistory:
+    """Fixed-depth ring buffer of recent boxes per track, stored in one array.
+
+    Each live track owns a row of ``boxes`` (``depth`` x 4); rows are
+    recycled through a free list when tracks are evicted, so memory depends
+    on the number of live tracks, not on how long the camera has run.
+    """
+
+    def __init__(self, depth: int = 8, initial_tracks: int = 64):
+        self.depth = depth
+        self.boxes = np.zeros((initial_tracks, depth, 4), dtype=np.float32)
+        self.counts = np.zeros(initial_tracks, dtype=np.int64)
+        self._slots: Dict[int, int] = {}
+        self._free: List[int] = list(range(initial_tracks - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, track_id: int) -> bool:
+        return track_id in self._slots
+
+    def _slot(self, track_id: int) -> int:
+        slot = self._slots.get(track_id)
+        if slot is None:
+            if not self._free:
+                self._grow()
+            slot = self._free.pop()
+            self._slots[track_id] = slot
+            self.counts[slot] = 0
+        return slot
+
+    def _grow(self):
+        old = len(self.counts)
+        self.boxes = np.concatenate([self.boxes, np.zeros_like(self.boxes)])
+        self.counts = np.concatenate([self.counts, np.zeros(old, dtype=np.int64)])
+        self._free.extend(range(2 * old - 1, old - 1, -1))
+
+    def append(self, track_ids: np.ndarray, boxes: np.ndarray):
+        """Record one frame's boxes for the given (non-zero, unique) track ids."""
+        if not len(track_ids):
+            return
+        slots = np.fromiter((self._slot(t) for t in track_ids.tolist()), dtype=np.intp, count=len(track_ids))
+        self.boxes[slots, self.counts[slots] % self.depth] = boxes
+        self.counts[slots] += 1
+
+    def count(self, track_id: int) -> int:
+        slot = self._slots.get(track_id)
+        return 0 if slot is None else int(self.counts[slot])
+
+    def back(self, track_id: int, frames_back: int) -> np.ndarray:
+        """The box recorded ``frames_back`` appends ago (1 = the latest)."""
+        if frames_back > self.depth:
+            raise ValueError(f"History depth is {self.depth}")
+        slot = self._slots[track_id]
+        return self.boxes[slot, (self.counts[slot] - frames_back) % self.depth]
+
+    def evict(self, track_ids: Iterable[int]):
+        for track_id in track_ids:
+            slot = self._slots.pop(track_id, None)
+            if slot is not None:
+                self._free.append(slot)
+
+    def memory_bytes(self) -> int:
+        return int(
+            self.boxes.nbytes + self.counts.nbytes
+            + sys.getsizeof(self._slots) + sys.getsizeof(self._free)
+        )
+
 
 class EventRulesEngine:
     """Evaluates tracked detections against event rules."""
 
-    def __init__(self):
-        self.track_history = {}
-        self.zones = []
+    # Fall detection compares a track's box with the one FALL_LOOKBACK frames earlier
+    FALL_LOOKBACK = 5
+    # Vehicle/plant overlap (relative to the smaller box) that counts as a collision
+    ACCIDENT_OVERLAP = 0.3
+    # A reported collision is re-armed once the pair has been apart this many frames
+    COLLISION_CLEAR_FRAMES = 10
+    # Above this many vehicle boxes, candidate pairs come from a uniform grid
+    SPATIAL_HASH_MIN_BOXES = 128
+
+    def __init__(self, history_depth: int = 8):
+        self.track_history = TrackHistory(max(history_depth, self.FALL_LOOKBACK))
+        self.zone_map = ZoneMap()
+        self._collisions: Dict[Tuple[int, int], int] = {}  # (track, track) -> frame last overlapping
+        self._frame = 0
 
-    def evaluate(self, detections: List[Dict], frame=None) -> List[Dict]:
-        """Evaluate all event rules on current detections."""
+    def evaluate(self, batch: DetectionBatch, frame=None) -> List[Dict]:
+        """Evaluate all event rules on a frame's tracked detections; events are returned as dicts."""
         events = []
 
         # Update track history
-        for det in detections:
-            tid = det.get("track_id")
-            if tid:
-                if tid not in self.track_history:
-                    self.track_history[tid] = []
-                self.track_history[tid].append(det)
+        tracked = batch.track_ids != 0
+        self.track_history.append(batch.track_ids[tracked], batch.boxes[tracked])
 
         # Check for falls
-        fall_events = self._check_falls(detections)
+        fall_events = self._check_falls(batch)
         events.extend(fall_events)
 
         # Check for accidents (proximity-based)
-        accident_events = self._check_accidents(detections)
+        accident_events = self._check_accidents(batch)
         events.extend(accident_events)
 
         # Check for intrusions
-        intrusion_events = self._check_intrusions(detections)
+        intrusion_events = self._check_intrusions(batch)
         events.extend(intrusion_events)
 
         return events
 
-    def _check_falls(self, detections: List[Dict]) -> List[Dict]:
+    def _check_falls(self, batch: DetectionBatch) -> List[Dict]:
         """Detect falls based on bounding box aspect ratio changes."""
         events = []
-        for det in detections:
-            if det.get("category") != "human":
-                continue
-
-            tid = det.get("track_id")
-            if not tid or tid not in self.track_history:
-                continue
-
-            history = self.track_history[tid]
-            if len(history) < 5:
+        for i in np.flatnonzero(batch.category_ids == HUMAN):
+            tid = int(batch.track_ids[i])
+            if not tid or self.track_history.count(tid) < self.FALL_LOOKBACK:
                 continue
 
             # Check aspect ratio change (person going from vertical to horizontal)
-            current_bbox = det["bbox"]
+            current_bbox = batch.boxes[i]
             w = current_bbox[2] - current_bbox[0]
             h = current_bbox[3] - current_bbox[1]
             current_ratio = w / max(h, 1)
 
-            prev_bbox = history[-5]["bbox"]
+            prev_bbox = self.track_history.back(tid, self.FALL_LOOKBACK)
             pw = prev_bbox[2] - prev_bbox[0]
             ph = prev_bbox[3] - prev_bbox[1]
             prev_ratio = pw / max(ph, 1)
@@ -71,7 +147,7 @@ class EventRulesEngine:
                 events.append({
                     "category": "fall",
                     "confidence": 0.75,
-                    "bbox": current_bbox,
+                    "bbox": current_bbox.tolist(),
                     "track_id": tid,
                     "severity": "critical",
                     "description": f"Possible fall detected for track {tid}",
@@ -79,88 +155,166 @@ class EventRulesEngine:
 
         return events
 
-    def _check_accidents(self, detections: List[Dict]) -> List[Dict]:
-        """Detect accidents based on vehicle/plant proximity and sudden stops."""
+    def _check_accidents(self, batch: DetectionBatch) -> List[Dict]:
+        """Detect accidents based on vehicle/plant proximity and sudden stops.
+
+        Collisions between tracked objects are stateful: a pair is reported
+        when it first overlaps and not again until it has been apart for
+        COLLISION_CLEAR_FRAMES frames (or one of the tracks is retired).
+        """
+        self._frame += 1
+        vehicles = np.flatnonzero(np.isin(batch.category_ids, VEHICLE_LIKE))
         events = []
-        vehicles = [d for d in detections if d.get("category") in ("vehicle", "plant")]
-
-        for i in range(len(vehicles)):
-            for j in range(i + 1, len(vehicles)):
-                bbox_a = vehicles[i]["bbox"]
-                bbox_b = vehicles[j]["bbox"]
-
-                # Check overlap
-                overlap = self._bbox_overlap(bbox_a, bbox_b)
-                if overlap > 0.3:
-                    events.append({
-                        "category": "accident",
-                        "confidence": 0.7,
-                        "bbox": self._merge_bboxes(bbox_a, bbox_b),
-                        "track_id": None,
-                        "severity": "critical",
-                        "description": "Possible collision detected",
-                    })
+        if len(vehicles) >= 2:
+            boxes = batch.boxes[vehicles]
+            track_ids = batch.track_ids[vehicles].tolist()
+            rows, cols = self._overlapping_pairs(boxes, self.ACCIDENT_OVERLAP)
+            for i, j in zip(rows.tolist(), cols.tolist()):
+                a, b = track_ids[i], track_ids[j]
+                if a and b:
+                    pair = (a, b) if a < b else (b, a)
+                    already_reported = pair in self._collisions
+                    self._collisions[pair] = self._frame
+                    if already_reported:
+                        continue
+                events.append({
+                    "category": "accident",
+                    "confidence": 0.7,
+                    "bbox": self._merge_bboxes(boxes[i], boxes[j]),
+                    "track_id": None,
+                    "severity": "critical",
+                    "description": (
+                        f"Possible collision between tracks {a} and {b}" if a and b
+                        else "Possible collision detected"
+                    ),
+                })
 
+        if self._collisions:
+            cleared = [p for p, last in self._collisions.items() if self._frame - last > self.COLLISION_CLEAR_FRAMES]
+            for pair in cleared:
+                del self._collisions[pair]
         return events
 
-    def _check_intrusions(self, detections: List[Dict]) -> List[Dict]:
+    @classmethod
+    def _overlapping_pairs(cls, boxes: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Index pairs (i < j) whose overlap exceeds ``threshold``."""
+        if len(boxes) < cls.SPATIAL_HASH_MIN_BOXES:
+            return np.nonzero(np.triu(cls._pairwise_overlap(boxes) > threshold, k=1))
+        rows, cols = cls._grid_candidate_pairs(boxes)
+        keep = cls._overlap_of_pairs(boxes, rows, cols) > threshold
+        return rows[keep], cols[keep]
+
+    @staticmethod
+    def _grid_candidate_pairs(boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Unique index pairs (i < j) of boxes sharing at least one uniform-grid cell.
+
+        The cell size follows the typical box size, floored at a quarter of
+        the largest box so no box spans more than 5 x 5 cells.
+        """
+        dims = np.maximum(boxes[:, 2:] - boxes[:, :2], 1.0).max(axis=1)
+        cell = max(float(np.median(dims)), float(dims.max()) / 4.0)
+        lo = np.floor(boxes[:, :2] / cell).astype(np.int64)
+        hi = np.floor(boxes[:, 2:] / cell).astype(np.int64)
+        span = hi - lo + 1
+
+        # One (cell, box) entry per cell each box covers
+        counts = span[:, 0] * span[:, 1]
+        owner = np.repeat(np.arange(len(boxes)), counts)
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cx = lo[owner, 0] + k % span[owner, 0]
+        cy = lo[owner, 1] + k // span[owner, 0]
+        cx -= cx.min()
+        cells = (cy - cy.min()) * (cx.max() + 1) + cx
+
+        order = np.argsort(cells, kind="stable")
+        cells, owner = cells[order], owner[order]
+        starts = np.flatnonzero(np.r_[True, cells[1:] != cells[:-1]])
+        ends = np.repeat(np.r_[starts[1:], len(cells)], np.diff(np.r_[starts, len(cells)]))
+
+        # Pair each entry with the entries after it in the same cell
+        partners = ends - np.arange(len(cells)) - 1
+        if not partners.any():
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        first = np.repeat(np.arange(len(cells)), partners)
+        second = first + 1 + np.arange(partners.sum()) - np.repeat(np.cumsum(partners) - partners, partners)
+        rows, cols = owner[first], owner[second]
+        rows, cols = np.minimum(rows, cols), np.maximum(rows, cols)
+
+        # Boxes that share several cells appear more than once
+        keys = np.unique(rows * len(boxes) + cols)
+        return keys // len(boxes), keys % len(boxes)
+
+    @staticmethod
+    def _overlap_of_pairs(boxes: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """Intersection over the smaller box's area for the given index pairs."""
+        a, b = boxes[rows], boxes[cols]
+        w = np.clip(np.minimum(a[:, 2], b[:, 2]) - np.maximum(a[:, 0], b[:, 0]), 0, None)
+        h = np.clip(np.minimum(a[:, 3], b[:, 3]) - np.maximum(a[:, 1], b[:, 1]), 0, None)
+        area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+        area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+        return w * h / np.maximum(np.minimum(area_a, area_b), 1)
+
+    def _check_intrusions(self, batch: DetectionBatch) -> List[Dict]:
         """Detect intrusions into restricted zones."""
-        events = []
-        for det in detections:
-            if det.get("category") != "human":
-                continue
+        restricted = self.zone_map.indices("restricted")
+        humans = np.flatnonzero(batch.category_ids == HUMAN)
+        if not restricted or not len(humans):
+            return []
+
+        inside = self.zone_map.membership(batch.centres()[humans], restricted)
 
-            bbox_center = [
-                (det["bbox"][0] + det["bbox"][2]) / 2,
-                (det["bbox"][1] + det["bbox"][3]) / 2,
-            ]
-
-            for zone in self.zones:
-                if zone.get("type") == "restricted":
-                    if self._point_in_polygon(bbox_center, zone.get("points", [])):
-                        events.append({
-                            "category": "intrusion",
-                            "confidence": 0.9,
-                            "bbox": det["bbox"],
-                            "track_id": det.get("track_id"),
-                            "severity": "high",
-                            "description": f"Intrusion in zone: {zone.get('name', 'restricted')}",
-                        })
+        events = []
+        for row, col in zip(*np.nonzero(inside)):
+            i = humans[row]
+            zone = self.zone_map.zones[restricted[col]]
+            events.append({
+                "category": "intrusion",
+                "confidence": 0.9,
+                "bbox": batch.boxes[i].tolist(),
+                "track_id": int(batch.track_ids[i]) or None,
+                "severity": "high",
+                "description": f"Intrusion in zone: {zone.get('name', 'restricted')}",
+            })
 
         return events
 
     @staticmethod
-    def _bbox_overlap(a, b):
-        x1 = max(a[0], b[0])
-        y1 = max(a[1], b[1])
-        x2 = min(a[2], b[2])
-        y2 = min(a[3], b[3])
-        inter = max(0, x2 - x1) * max(0, y2 - y1)
-        area_a = (a[2] - a[0]) * (a[3] - a[1])
-        area_b = (b[2] - b[0]) * (b[3] - b[1])
-        min_area = min(area_a, area_b)
-        return inter / max(min_area, 1)
+    def _pairwise_overlap(boxes: np.ndarray) -> np.ndarray:
+        """(N, N) intersection area over the smaller box's area."""
+        x1 = np.maximum(boxes[:, None, 0], boxes[None, :, 0])
+        y1 = np.maximum(boxes[:, None, 1], boxes[None, :, 1])
+        x2 = np.minimum(boxes[:, None, 2], boxes[None, :, 2])
+        y2 = np.minimum(boxes[:, None, 3], boxes[None, :, 3])
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        area = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        min_area = np.minimum(area[:, None], area[None, :])
+        return inter / np.maximum(min_area, 1)
 
     @staticmethod
     def _merge_bboxes(a, b):
-        return [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+        return [float(min(a[0], b[0])), float(min(a[1], b[1])), float(max(a[2], b[2])), float(max(a[3], b[3]))]
 
-    @staticmethod
-    def _point_in_polygon(point, polygon):
-        if len(polygon) < 3:
-            return False
-        n = len(polygon)
-        inside = False
-        x, y = point
-        j = n - 1
-        for i in range(n):
-            xi, yi = polygon[i]
-            xj, yj = polygon[j]
-            if ((yi > y) != (yj > y)) and (x < (xj - xi) * (y - yi) / (yj - yi) + xi):
-                inside = not inside
-            j = i
-        return inside
-
-    def set_zones(self, zones: List[Dict]):
-        """Set restricted/monitoring zones."""
-        self.zones = zones
+    @property
+    def zones(self) -> List[Dict]:
+        return self.zone_map.zones
+
+    def set_zones(self, zones: Union[List[Dict], ZoneMap]):
+        """Set restricted/monitoring zones (raw zone dicts or a compiled ZoneMap)."""
+        self.zone_map = zones if isinstance(zones, ZoneMap) else ZoneMap(zones)
+
+    def forget_tracks(self, track_ids: Iterable[int]):
+        """Drop per-track state for tracks the tracker has retired."""
+        retired = set(track_ids)
+        self.track_history.evict(retired)
+        if self._collisions:
+            for pair in [p for p in self._collisions if p[0] in retired or p[1] in retired]:
+                del self._collisions[pair]
+
+    def memory_stats(self) -> Dict[str, Any]:
+        return {
+            "tracks": len(self.track_history),
+            "history_depth": self.track_history.depth,
+            "history_bytes": self.track_history.memory_bytes(),
+            "active_collisions": len(self._collisions),
+        }
@@ -0,0 +1,176 @@
+"""
+FireSight — Inference Executor
+Runs blocking decode and inference work outside the asyncio event loop on
+bounded thread/process pools, with per-camera concurrency limits and
+queue-wait metrics.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Dict
+
+from app.config import settings
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict):
+    """Worker-side wrapper that records when the job actually started."""
+    # time.monotonic() is system-wide on Linux, so it is comparable across processes
+    started = time.monotonic()
+    return started, fn(*args, **kwargs)
+
+
+class WaitStats:
+    """Rolling queue-wait statistics for one pool or camera."""
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        recent = sorted(self.recent)
+        p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0
+        return {
+            "jobs": self.count,
+            "mean_wait_ms": round(self.total / self.count * 1000.0, 2) if self.count else 0,
+            "p95_wait_ms": round(p95 * 1000.0, 2),
+            "max_wait_ms": round(self.max * 1000.0, 2),
+        }
+
+
+class InferenceExecutor:
+    """Bounded thread and process pools for decode/inference work.
+
+    Thread pool: OpenCV decode and PyTorch inference release the GIL, so
+    decode and pre/post-processing of different frames overlap. Threads share
+    the model registry, whose per-model lock serialises inference on any
+    one model.
+    Process pool: pure-Python heavy work (e.g. offline video segments);
+    each worker process keeps its own model registry.
+    """
+
+    def __init__(self, thread_workers: int = None, process_workers: int = None,
+                 queue_size: int = None, per_camera_limit: int = None):
+        self.thread_workers = thread_workers or settings.INFERENCE_THREAD_WORKERS
+        self.process_workers = process_workers or settings.INFERENCE_PROCESS_WORKERS
+        self.queue_size = queue_size or settings.INFERENCE_QUEUE_SIZE
+        self.per_camera_limit = per_camera_limit or settings.INFERENCE_PER_CAMERA_CONCURRENCY
+
+        self._pools: Dict[str, Any] = {}
+        self._pool_lock = threading.Lock()
+        self._admission: Dict[str, asyncio.Semaphore] = {}
+        self._camera_slots: Dict[Any, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, int] = {"thread": 0, "process": 0}
+        self._pool_waits: Dict[str, WaitStats] = {"thread": WaitStats(), "process": WaitStats()}
+        self._camera_waits: Dict[Any, WaitStats] = {}
+
+    def _pool(self, kind: str):
+        with self._pool_lock:
+            pool = self._pools.get(kind)
+            if pool is None:
+                if kind == "thread":
+                    pool = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix="inference")
+                elif kind == "process":
+                    # spawn: forking a process that holds torch/OpenCV threads is unsafe
+                    pool = ProcessPoolExecutor(
+                        max_workers=self.process_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                else:
+                    raise ValueError(f"Unknown pool: {kind}")
+                self._pools[kind] = pool
+            return pool
+
+    def _admission_slot(self, kind: str) -> asyncio.Semaphore:
+        sem = self._admission.get(kind)
+        if sem is None:
+            limit = self.queue_size if kind == "thread" else max(self.process_workers * 2, 1)
+            sem = asyncio.Semaphore(limit)
+            self._admission[kind] = sem
+        return sem
+
+    def _camera_slot(self, key) -> asyncio.Semaphore:
+        sem = self._camera_slots.get(key)
+        if sem is None:
+            sem = asyncio.Semaphore(self.per_camera_limit)
+            self._camera_slots[key] = sem
+            self._camera_waits[key] = WaitStats()
+        return sem
+
+    async def run(self, fn: Callable, *args, key=None, pool: str = "thread", **kwargs):
+        """Run ``fn(*args, **kwargs)`` on a pool and await its result.
+
+        ``key`` (usually a camera id) limits how many jobs from one source
+        may be queued or running at once. When the pool queue is full the
+        call waits for space.
+        """
+        submitted = time.monotonic()
+        admission = self._admission_slot(pool)
+
+        camera_slot = self._camera_slot(key) if key is not None else None
+        if camera_slot is not None:
+            await camera_slot.acquire()
+        try:
+            async with admission:
+                self._in_flight[pool] += 1
+                try:
+                    loop = asyncio.get_running_loop()
+                    started, result = await loop.run_in_executor(
+                        self._pool(pool), _timed_call, fn, args, kwargs
+                    )
+                finally:
+                    self._in_flight[pool] -= 1
+        finally:
+            if camera_slot is not None:
+                camera_slot.release()
+
+        waited = max(0.0, started - submitted)
+        self._pool_waits[pool].record(waited)
+        if key is not None:
+            self._camera_waits[key].record(waited)
+        return result
+
+    def forget(self, key):
+        """Drop per-camera state once a camera's pipeline has stopped."""
+        self._camera_slots.pop(key, None)
+        self._camera_waits.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and queue-wait metrics per pool and per camera."""
+        return {
+            "pools": {
+                kind: {
+                    "workers": self.thread_workers if kind == "thread" else self.process_workers,
+                    "queue_size": self.queue_size if kind == "thread" else max(self.process_workers * 2, 1),
+                    "in_flight": self._in_flight[kind],
+                    **self._pool_waits[kind].snapshot(),
+                }
+                for kind in ("thread", "process")
+            },
+            "cameras": {
+                str(key): waits.snapshot() for key, waits in self._camera_waits.items()
+            },
+            "per_camera_limit": self.per_camera_limit,
+        }
+
+    def shutdown(self):
+        """Shut down all pools without waiting for queued work."""
+        with self._pool_lock:
+            for pool in self._pools.values():
+                pool.shutdown(wait=False, cancel_futures=True)
+            self._pools.clear()
+
+
+# Global executor shared by every pipeline in this process
+inference_executor = InferenceExecutor()
@@ -0,0 +1,154 @@
+"""
+FireSight — Fire/Smoke Prefilter
+Cheap colour, flicker and motion cues that decide whether (and where) the
+fire/smoke model needs to run on a live frame, with a periodic full-frame
+safety check so slow or unusual fires are still caught.
+"""
+
+import time
+import cv2
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.config import settings
+
+Box = Tuple[int, int, int, int]
+
+
+class FirePrefilter:
+    """Flags candidate fire/smoke regions on a downscaled frame.
+
+    * Fire: flame-coloured pixels (red/orange/yellow, bright, saturated)
+      whose brightness flickers from frame to frame. Static orange objects
+      such as hi-vis vests or signage don't flicker and are ignored.
+    * Smoke: grey, low-saturation pixels that differ from a slowly adapting
+      background.
+
+    ``check()`` returns ("full", []) for a full-frame pass, ("regions", boxes)
+    with boxes in input-frame pixels, or ("skip", []) when nothing qualifies.
+    """
+
+    def __init__(self, full_frame_interval: float = None, width: int = 320,
+                 min_area_fraction: float = 0.0005, flicker_threshold: float = 8.0,
+                 smoke_motion_threshold: float = 12.0, max_regions: int = 4,
+                 region_padding: float = 0.5, min_region: int = 160, max_region_fraction: float = 0.5):
+        self.full_frame_interval = (
+            settings.FIRE_PREFILTER_FULL_FRAME_INTERVAL if full_frame_interval is None else full_frame_interval
+        )
+        self.width = width
+        self.min_area_fraction = min_area_fraction
+        self.flicker_threshold = flicker_threshold
+        self.smoke_motion_threshold = smoke_motion_threshold
+        self.max_regions = max_regions
+        self.region_padding = region_padding
+        self.min_region = min_region
+        self.max_region_fraction = max_region_fraction
+
+        self._prev_value: Optional[np.ndarray] = None
+        self._flicker: Optional[np.ndarray] = None
+        self._background: Optional[np.ndarray] = None
+        self._last_full = None
+        self._kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        self._dilate = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (7, 7))
+
+        self.frames_checked = 0
+        self.full_checks = 0
+        self.region_checks = 0
+        self.frames_skipped = 0
+        self.last_regions: List[Box] = []
+
+    def _candidate_mask(self, small: np.ndarray) -> np.ndarray:
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        saturation = hsv[:, :, 1]
+        value = hsv[:, :, 2].astype(np.float32)
+
+        if self._prev_value is None or self._prev_value.shape != value.shape:
+            self._prev_value = value
+            self._flicker = np.zeros_like(value)
+            self._background = value.copy()
+            return np.zeros(value.shape, dtype=np.uint8)
+
+        # Temporal flicker: running mean of absolute frame-to-frame brightness change
+        cv2.accumulateWeighted(cv2.absdiff(value, self._prev_value), self._flicker, 0.3)
+        self._prev_value = value
+
+        fire = cv2.inRange(hsv, (0, 80, 170), (35, 255, 255))
+        fire |= cv2.inRange(hsv, (165, 80, 170), (180, 255, 255))
+        fire &= (self._flicker > self.flicker_threshold).astype(np.uint8) * 255
+
+        moving = cv2.absdiff(value, self._background) > self.smoke_motion_threshold
+        cv2.accumulateWeighted(value, self._background, 0.02)
+        smoke = (saturation < 60) & (value > 80) & (value < 235) & moving
+
+        mask = fire | (smoke.astype(np.uint8) * 255)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, self._kernel)
+        return cv2.dilate(mask, self._dilate)
+
+    def _regions(self, mask: np.ndarray, scale: float, frame_shape) -> List[Box]:
+        n, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        if n <= 1:
+            return []
+        stats = stats[1:]
+        stats = stats[stats[:, cv2.CC_STAT_AREA] >= self.min_area_fraction * mask.size]
+        if len(stats) == 0:
+            return []
+
+        # Largest candidates first; beyond max_regions they are merged into one box
+        stats = stats[np.argsort(-stats[:, cv2.CC_STAT_AREA])]
+        x1 = stats[:, cv2.CC_STAT_LEFT].astype(np.float32)
+        y1 = stats[:, cv2.CC_STAT_TOP].astype(np.float32)
+        x2 = x1 + stats[:, cv2.CC_STAT_WIDTH]
+        y2 = y1 + stats[:, cv2.CC_STAT_HEIGHT]
+        boxes = np.stack([x1, y1, x2, y2], axis=1) * scale
+        if len(boxes) > self.max_regions:
+            rest = boxes[self.max_regions - 1:]
+            merged = np.array([rest[:, 0].min(), rest[:, 1].min(), rest[:, 2].max(), rest[:, 3].max()])
+            boxes = np.vstack([boxes[:self.max_regions - 1], merged])
+
+        # Pad for context and so tiny candidates aren't blown up to the model input size
+        h, w = frame_shape[:2]
+        sizes = np.maximum((boxes[:, 2:] - boxes[:, :2]) * (1 + self.region_padding), self.min_region)
+        centres = (boxes[:, :2] + boxes[:, 2:]) / 2
+        lo = np.maximum(centres - sizes / 2, 0)
+        hi = np.minimum(centres + sizes / 2, [w, h])
+        return [tuple(int(v) for v in box) for box in np.hstack([lo, hi]).round()]
+
+    def check(self, frame: np.ndarray, now: float = None) -> Tuple[str, List[Box]]:
+        """Decide how the fire/smoke model should run on this frame."""
+        now = time.monotonic() if now is None else now
+        self.frames_checked += 1
+
+        h, w = frame.shape[:2]
+        scale = w / float(self.width)
+        small = cv2.resize(frame, (self.width, max(1, int(h / scale))), interpolation=cv2.INTER_AREA)
+        mask = self._candidate_mask(small)
+
+        if self._last_full is None or now - self._last_full >= self.full_frame_interval:
+            self._last_full = now
+            self.full_checks += 1
+            self.last_regions = []
+            return "full", []
+
+        regions = self._regions(mask, scale, frame.shape)
+        self.last_regions = regions
+        if not regions:
+            self.frames_skipped += 1
+            return "skip", []
+
+        area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in regions)
+        if area >= self.max_region_fraction * w * h:
+            self.full_checks += 1
+            return "full", []
+        self.region_checks += 1
+        return "regions", regions
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "full_frame_interval_seconds": self.full_frame_interval,
+            "frames_checked": self.frames_checked,
+            "full_checks": self.full_checks,
+            "region_checks": self.region_checks,
+            "frames_skipped": self.frames_skipped,
+            "skip_ratio": round(self.frames_skipped / self.frames_checked, 4) if self.frames_checked else 0,
+            "last_regions": [list(r) for r in self.last_regions],
+        }
@@ -9,6 +9,7 @@ from typing import List, Dict, Any, Optional
 from ultralytics import YOLO
 
 from app.config import settings
+from app.detection.model_registry import model_registry
 
 
 class FireSmokeDetector:
@@ -23,7 +24,12 @@ class FireSmokeDetector:
 
     def load_model(self, model_path: str = None):
         """Load the fire/smoke YOLO model."""
-        path = model_path or settings.YOLO_FIRE_SMOKE_MODEL
+        if model_path is None:
+            # Default weights come from the shared registry
+            self.model = model_registry.get("fire_smoke")
+            return
+
+        path = model_path
         try:
             self.model = YOLO(path)
             print(f"  Fire/smoke model loaded: {path}")
@@ -0,0 +1,235 @@
+"""
+FireSight — Live Inference Scheduler
+Shares a fixed budget of inference slots between live cameras. Each camera
+has a target analysis rate and a priority; ready frames are granted slots
+earliest-deadline-first, and when the budget can't cover every target rate
+the rates are scaled down by priority-weighted fair share instead of every
+stream going equally stale.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional
+
+from app.config import settings
+
+
+def camera_priority(categories: Optional[List[str]]) -> float:
+    """Scheduling weight for a camera: the highest weight among its categories."""
+    weights = settings.SCHEDULER_CATEGORY_PRIORITY
+    if not categories:
+        # No explicit categories means every category, fire included
+        return max(weights.values(), default=1.0)
+    return max([weights.get(c, 1.0) for c in categories] + [1.0])
+
+
+class _CameraSchedule:
+    """Rate, cost and deadline bookkeeping for one camera."""
+
+    __slots__ = (
+        "camera_id", "target_fps", "priority", "rate", "service_time", "next_release",
+        "release", "deadline", "granted_at", "dispatched", "deadline_misses",
+        "total_wait", "achieved_fps", "last_dispatch",
+    )
+
+    def __init__(self, camera_id: int, target_fps: float, priority: float):
+        self.camera_id = camera_id
+        self.target_fps = target_fps
+        self.priority = priority
+        self.rate = target_fps
+        self.service_time: Optional[float] = None  # EMA seconds per inference
+        self.next_release = time.monotonic()
+        self.release = self.next_release
+        self.deadline = self.next_release
+        self.granted_at = self.next_release
+        self.dispatched = 0
+        self.deadline_misses = 0
+        self.total_wait = 0.0
+        self.achieved_fps = 0.0
+        self.last_dispatch: Optional[float] = None
+
+
+class InferenceScheduler:
+    """Earliest-deadline-first slot scheduler for live camera inference.
+
+    A camera's frame is released every 1/rate seconds and must finish by its
+    next release (its deadline). At most ``slots`` frames are inferred at
+    once; waiting frames are granted slots in deadline order. Every
+    ``rebalance_interval`` the per-camera rates are recomputed from measured
+    inference cost so total demand stays within ``slots * target_utilisation``:
+    capacity is water-filled by priority weight, each camera keeps at least
+    ``min_fps``, and rates recover gradually once load drops.
+    """
+
+    def __init__(self, slots: int = None, target_utilisation: float = None, min_fps: float = None,
+                 rebalance_interval: float = 1.0, default_cost: float = 0.05, max_increase: float = 0.2):
+        configured = settings.SCHEDULER_INFERENCE_SLOTS if slots is None else slots
+        self.slots = configured or max(1, (os.cpu_count() or 2) // 2)
+        self.target_utilisation = (
+            settings.SCHEDULER_TARGET_UTILISATION if target_utilisation is None else target_utilisation
+        )
+        self.min_fps = settings.LIVE_MIN_FPS if min_fps is None else min_fps
+        self.rebalance_interval = rebalance_interval
+        self.default_cost = default_cost
+        self.max_increase = max_increase
+
+        self._cameras: Dict[int, _CameraSchedule] = {}
+        self._ready: list = []  # heap of (deadline, seq, camera_id, future)
+        self._seq = itertools.count()
+        self._in_use = 0
+        self._last_rebalance = 0.0
+        self.utilisation = 0.0
+
+    # --- Registration -------------------------------------------------
+
+    def register(self, camera_id: int, target_fps: float = None, priority: float = 1.0):
+        target = target_fps or settings.LIVE_TARGET_FPS
+        self._cameras[camera_id] = _CameraSchedule(camera_id, target, priority)
+        self._rebalance()
+
+    def configure(self, camera_id: int, target_fps: float = None, priority: float = None):
+        """Update a camera's target rate or priority; rates are rebalanced if they changed."""
+        cam = self._cameras.get(camera_id)
+        if cam is None:
+            return
+        target = target_fps or settings.LIVE_TARGET_FPS
+        changed = target != cam.target_fps or (priority is not None and priority != cam.priority)
+        cam.target_fps = target
+        if priority is not None:
+            cam.priority = priority
+        if changed:
+            self._rebalance()
+
+    def unregister(self, camera_id: int):
+        if self._cameras.pop(camera_id, None) is not None:
+            self._rebalance()
+
+    # --- Scheduling ---------------------------------------------------
+
+    async def wait_turn(self, camera_id: int):
+        """Sleep until the camera's next frame is due at its current rate."""
+        cam = self._cameras[camera_id]
+        delay = cam.next_release - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    @asynccontextmanager
+    async def slot(self, camera_id: int):
+        """Hold an inference slot, granted earliest-deadline-first."""
+        cam = self._cameras[camera_id]
+        now = time.monotonic()
+        period = 1.0 / cam.rate
+        # A camera that fell behind is released now rather than accruing a backlog
+        cam.release = max(cam.next_release, now - period)
+        cam.deadline = cam.release + period
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._ready, (cam.deadline, next(self._seq), camera_id, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as we were cancelled: hand the slot on
+                self._in_use -= 1
+                self._dispatch()
+            raise
+
+        cam.granted_at = time.monotonic()
+        cam.total_wait += cam.granted_at - now
+        try:
+            yield
+        finally:
+            self._finish(cam)
+
+    def _dispatch(self):
+        while self._in_use < self.slots and self._ready:
+            _, _, _, future = heapq.heappop(self._ready)
+            if future.done():
+                continue  # Waiter was cancelled
+            self._in_use += 1
+            future.set_result(None)
+
+    def _finish(self, cam: _CameraSchedule):
+        self._in_use -= 1
+        now = time.monotonic()
+        service = now - cam.granted_at
+        cam.service_time = service if cam.service_time is None else 0.8 * cam.service_time + 0.2 * service
+        cam.dispatched += 1
+        if now > cam.deadline:
+            cam.deadline_misses += 1
+        if cam.last_dispatch is not None:
+            interval = max(cam.granted_at - cam.last_dispatch, 1e-6)
+            cam.achieved_fps = 0.8 * cam.achieved_fps + 0.2 / interval if cam.achieved_fps else 1.0 / interval
+        cam.last_dispatch = cam.granted_at
+        cam.next_release = cam.release + 1.0 / cam.rate
+
+        if now - self._last_rebalance >= self.rebalance_interval:
+            self._rebalance()
+        self._dispatch()
+
+    def _rebalance(self):
+        """Recompute camera rates so total demand fits the slot budget."""
+        self._last_rebalance = time.monotonic()
+        cams = list(self._cameras.values())
+        if not cams:
+            self.utilisation = 0.0
+            return
+
+        capacity = self.slots * self.target_utilisation
+        cost = {c.camera_id: c.service_time or self.default_cost for c in cams}
+        demand = {c.camera_id: c.target_fps * cost[c.camera_id] for c in cams}
+
+        # Weighted water-filling: satisfy the smallest demand-per-weight first,
+        # then split what's left between the rest in proportion to priority
+        allocation = {}
+        remaining = capacity
+        total_weight = sum(c.priority for c in cams)
+        for cam in sorted(cams, key=lambda c: demand[c.camera_id] / c.priority):
+            share = remaining * cam.priority / total_weight if total_weight > 0 else 0.0
+            allocation[cam.camera_id] = min(demand[cam.camera_id], share)
+            remaining -= allocation[cam.camera_id]
+            total_weight -= cam.priority
+
+        used = 0.0
+        for cam in cams:
+            fair = allocation[cam.camera_id] / cost[cam.camera_id]
+            # Drop straight to the fair rate under overload; recover in steps
+            if fair > cam.rate:
+                fair = min(fair, cam.rate * (1.0 + self.max_increase))
+            cam.rate = min(cam.target_fps, max(self.min_fps, fair))
+            used += cam.rate * cost[cam.camera_id]
+        self.utilisation = used / self.slots
+
+    # --- Metrics ------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        cameras = {}
+        for cam in self._cameras.values():
+            cameras[cam.camera_id] = {
+                "priority": cam.priority,
+                "target_fps": round(cam.target_fps, 2),
+                "rate_fps": round(cam.rate, 2),
+                "achieved_fps": round(cam.achieved_fps, 2),
+                "degraded": cam.rate < cam.target_fps - 1e-6,
+                "service_ms": round((cam.service_time or 0.0) * 1000.0, 2),
+                "mean_wait_ms": round(cam.total_wait / cam.dispatched * 1000.0, 2) if cam.dispatched else 0.0,
+                "dispatched": cam.dispatched,
+                "deadline_misses": cam.deadline_misses,
+            }
+        return {
+            "slots": self.slots,
+            "in_use": self._in_use,
+            "waiting": sum(1 for *_, f in self._ready if not f.done()),
+            "target_utilisation": self.target_utilisation,
+            "utilisation": round(self.utilisation, 3),
+            "cameras": cameras,
+        }
+
+
+# Global scheduler shared by every live pipeline in this process
+inference_scheduler = InferenceScheduler()
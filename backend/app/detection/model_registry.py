@@ -0,0 +1,273 @@
+"""
+FireSight — Shared YOLO Model Registry
+Process-wide, thread-safe cache of detection models. Each model is loaded
+lazily on first use, warmed up once, and shared by every pipeline and upload.
+"""
+
+import hashlib
+import os
+import threading
+import time
+import numpy as np
+from typing import Dict, Any, List, Optional
+
+from app.config import settings
+from app.detection.backends import backend_for, export_model, path_size
+
+
+# Registry name -> Settings attribute holding the weights path
+MODEL_PATH_SETTINGS = {
+    "general": "YOLO_GENERAL_MODEL",
+    "fire_smoke": "YOLO_FIRE_SMOKE_MODEL",
+    "ppe": "YOLO_PPE_MODEL",
+    "plant": "YOLO_PLANT_MODEL",
+    "plate": "YOLO_PLATE_MODEL",
+}
+
+
+class ModelEntry:
+    """Load state and bookkeeping for a single registered model."""
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self.model = None
+        self.backend = "pytorch"
+        self.runtime_path = path
+        self.state = "not_loaded"  # not_loaded | loading | ready | missing | error
+        self.error: Optional[str] = None
+        self.failed_at: Optional[float] = None
+        self.failed_stat: Optional[tuple] = None
+        self.load_seconds: float = 0.0
+        self.warmup_seconds: float = 0.0
+        self.memory_bytes: int = 0
+        self.inference_count: int = 0
+        self.loaded_at: Optional[float] = None
+        self.checksum: Optional[str] = None
+        self.checksum_stat: Optional[tuple] = None
+        self.load_lock = threading.Lock()
+        self.infer_lock = threading.Lock()
+
+
+class ModelRegistry:
+    """Loads each YOLO model once per process and shares it across callers.
+
+    A model that fails to load is not retried on every call: it stays
+    unavailable until ``retry_seconds`` have passed, its weights file
+    changes, or ``reload`` is called.
+    """
+
+    def __init__(self, warmup_size: int = 640, retry_seconds: float = 300.0):
+        self.warmup_size = warmup_size
+        self.retry_seconds = retry_seconds
+        self._entries: Dict[str, ModelEntry] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, name: str) -> ModelEntry:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                if name not in MODEL_PATH_SETTINGS:
+                    raise KeyError(f"Unknown model: {name}")
+                entry = ModelEntry(name, getattr(settings, MODEL_PATH_SETTINGS[name]))
+                self._entries[name] = entry
+            return entry
+
+    def available(self, name: str) -> bool:
+        """Check whether a model's weights exist (and didn't fail to load) without loading it."""
+        entry = self._entry(name)
+        if entry.state == "ready":
+            return True
+        if entry.state == "error" and not self._may_retry(entry):
+            return False
+        return os.path.exists(entry.path)
+
+    def get(self, name: str):
+        """Return the shared model instance, loading it on first use."""
+        entry = self._entry(name)
+        if entry.state == "ready":
+            return entry.model
+        if entry.state == "error" and not self._may_retry(entry):
+            return None
+
+        with entry.load_lock:
+            # Another thread may have finished (or failed) loading while we waited
+            if entry.state == "ready":
+                return entry.model
+            if entry.state == "error" and not self._may_retry(entry):
+                return None
+            if not os.path.exists(entry.path):
+                entry.state = "missing"
+                return None
+            self._load(entry)
+
+        return entry.model
+
+    def reload(self, name: str):
+        """Load a model again now, e.g. after replacing weights that failed to load."""
+        from app.detection.plan import invalidate_plans
+
+        entry = self._entry(name)
+        with entry.load_lock:
+            if not os.path.exists(entry.path):
+                entry.state = "missing"
+                return None
+            self._load(entry)
+        # Cached plans hold the old model's class names
+        invalidate_plans()
+        return entry.model
+
+    def _may_retry(self, entry: ModelEntry) -> bool:
+        """Whether a failed load is due another attempt (backoff elapsed or weights changed)."""
+        if entry.failed_at is None or time.monotonic() - entry.failed_at >= self.retry_seconds:
+            return True
+        return self._file_stat(entry.path) != entry.failed_stat
+
+    @staticmethod
+    def _file_stat(path: str) -> Optional[tuple]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def _load(self, entry: ModelEntry):
+        """Load and warm up a model. Caller must hold entry.load_lock."""
+        from ultralytics import YOLO
+
+        entry.state = "loading"
+        entry.error = None
+        try:
+            started = time.perf_counter()
+            model = self._load_backend(entry, YOLO)
+            entry.load_seconds = time.perf_counter() - started
+
+            # Warm up once so the first real frame doesn't pay for lazy init
+            started = time.perf_counter()
+            dummy = np.zeros((self.warmup_size, self.warmup_size, 3), dtype=np.uint8)
+            model(dummy, verbose=False)
+            entry.warmup_seconds = time.perf_counter() - started
+
+            entry.model = model
+            entry.memory_bytes = self._measure_memory(model, entry.runtime_path)
+            entry.loaded_at = time.time()
+            entry.state = "ready"
+            entry.failed_at = entry.failed_stat = None
+            print(f"  Loaded {entry.name} model: {entry.runtime_path} [{entry.backend}] ({entry.load_seconds:.1f}s)")
+        except Exception as e:
+            entry.model = None
+            entry.state = "error"
+            entry.error = str(e)
+            entry.failed_at = time.monotonic()
+            entry.failed_stat = self._file_stat(entry.path)
+            print(f"  Warning: Could not load {entry.name} model: {e} (retrying in {self.retry_seconds:.0f}s)")
+
+    def _load_backend(self, entry: ModelEntry, YOLO):
+        """Load the configured backend, falling back to PyTorch if export fails."""
+        backend = backend_for(entry.name)
+        if backend != "pytorch":
+            try:
+                runtime_path = export_model(entry.name, entry.path, self.checksum(entry.name), backend)
+                model = YOLO(runtime_path, task="detect")
+                entry.backend, entry.runtime_path = backend, runtime_path
+                return model
+            except Exception as e:
+                print(f"  Warning: {backend} backend unavailable for {entry.name}, using pytorch: {e}")
+        entry.backend, entry.runtime_path = "pytorch", entry.path
+        return YOLO(entry.path)
+
+    def prepare(self):
+        """Export and load every model configured for a non-PyTorch backend.
+
+        Run at startup so exports (which can take minutes, more with INT8
+        calibration) happen before the first frame needs the model.
+        """
+        for name in MODEL_PATH_SETTINGS:
+            if backend_for(name) != "pytorch" and self.available(name):
+                self.get(name)
+
+    def backend(self, name: str) -> str:
+        """Backend a model is (or will be) served by."""
+        entry = self._entry(name)
+        return entry.backend if entry.state == "ready" else backend_for(name)
+
+    def loaded_backend(self, name: str) -> Optional[str]:
+        """Backend the model was actually loaded with in this process, or None if it isn't loaded."""
+        entry = self._entry(name)
+        return entry.backend if entry.state == "ready" else None
+
+    @staticmethod
+    def _measure_memory(model, path: str) -> int:
+        """Estimate resident size of a model from its tensors, falling back to file size."""
+        try:
+            module = model.model
+            total = sum(p.numel() * p.element_size() for p in module.parameters())
+            total += sum(b.numel() * b.element_size() for b in module.buffers())
+            if total:
+                return int(total)
+        except Exception:
+            pass
+        return path_size(path)
+
+    def checksum(self, name: str) -> Optional[str]:
+        """SHA-256 of a model's weights file, or None if it doesn't exist.
+
+        Recomputed only when the file's size or mtime changes, so result
+        caches keyed by it notice retrained weights dropped in place.
+        """
+        entry = self._entry(name)
+        stat_key = self._file_stat(entry.path)
+        if stat_key is None:
+            return None
+        if entry.checksum is None or entry.checksum_stat != stat_key:
+            hasher = hashlib.sha256()
+            with open(entry.path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    hasher.update(chunk)
+            entry.checksum = hasher.hexdigest()
+            entry.checksum_stat = stat_key
+        return entry.checksum
+
+    def predict(self, name: str, source, **kwargs) -> List[Any]:
+        """Run a model on one frame or a list of frames; returns [] if it is unavailable.
+
+        Calls into the same model are serialised: Ultralytics predictors keep
+        per-call state and are not safe to share between threads concurrently.
+        """
+        model = self.get(name)
+        if model is None:
+            return []
+        entry = self._entries[name]
+        with entry.infer_lock:
+            entry.inference_count += 1
+            return model(source, verbose=False, **kwargs)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Load state and memory footprint for every known model."""
+        report = {}
+        for name in MODEL_PATH_SETTINGS:
+            entry = self._entry(name)
+            if entry.state == "not_loaded" and not os.path.exists(entry.path):
+                entry.state = "missing"
+            report[name] = {
+                "path": entry.path,
+                "backend": self.backend(name),
+                "runtime_path": entry.runtime_path,
+                "state": entry.state,
+                "error": entry.error,
+                "load_seconds": round(entry.load_seconds, 3),
+                "warmup_seconds": round(entry.warmup_seconds, 3),
+                "memory_mb": round(entry.memory_bytes / (1024 * 1024), 2),
+                "inference_count": entry.inference_count,
+                "loaded_at": entry.loaded_at,
+            }
+        return report
+
+    def total_memory_bytes(self) -> int:
+        """Combined footprint of all loaded models."""
+        with self._lock:
+            return sum(e.memory_bytes for e in self._entries.values() if e.state == "ready")
+
+
+# Global registry instance shared by every engine in this process
+model_registry = ModelRegistry()
@@ -0,0 +1,97 @@
+"""
+FireSight — Motion Gate
+Cheap downscaled frame differencing that lets the live pipeline skip YOLO
+on static scenes, with a forced full inference at a minimum interval.
+"""
+
+import time
+import cv2
+import numpy as np
+from typing import Dict, Any, Optional
+
+from app.config import settings
+
+
+class MotionGate:
+    """Decides per frame whether anything changed enough to run inference.
+
+    Frames are downscaled to ``width`` pixels, converted to grayscale and
+    blurred, then compared against a slowly adapting background model.
+    ``sensitivity`` (0-1) maps to the fraction of changed pixels needed to
+    count as motion: higher sensitivity reacts to smaller changes.
+    """
+
+    def __init__(self, sensitivity: float = None, min_interval: float = None, width: int = 160,
+                 pixel_threshold: int = 25, learning_rate: float = 0.05):
+        self.sensitivity = settings.MOTION_SENSITIVITY if sensitivity is None else sensitivity
+        self.min_interval = settings.MOTION_MIN_INFERENCE_INTERVAL if min_interval is None else min_interval
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.learning_rate = learning_rate
+
+        self._background: Optional[np.ndarray] = None
+        self._last_inference = 0.0
+        self.last_changed_fraction = 0.0
+
+        self.frames_seen = 0
+        self.frames_skipped = 0
+        self.forced_inferences = 0
+
+    @property
+    def min_changed_fraction(self) -> float:
+        """Changed-pixel fraction that counts as motion for the current sensitivity."""
+        sensitivity = min(max(self.sensitivity, 0.0), 1.0)
+        return 0.0005 + 0.03 * (1.0 - sensitivity)
+
+    def configure(self, sensitivity: float = None, min_interval: float = None):
+        if sensitivity is not None:
+            self.sensitivity = sensitivity
+        if min_interval is not None:
+            self.min_interval = min_interval
+
+    def _prepare(self, frame: np.ndarray) -> np.ndarray:
+        h, w = frame.shape[:2]
+        height = max(1, int(h * self.width / w))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0).astype(np.float32)
+
+    def should_infer(self, frame: np.ndarray, now: float = None) -> bool:
+        """Return True if the frame needs a full inference pass."""
+        now = time.monotonic() if now is None else now
+        self.frames_seen += 1
+        small = self._prepare(frame)
+
+        if self._background is None or self._background.shape != small.shape:
+            self._background = small
+            self._last_inference = now
+            return True
+
+        diff = cv2.absdiff(small, self._background)
+        self.last_changed_fraction = float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+        cv2.accumulateWeighted(small, self._background, self.learning_rate)
+
+        if self.last_changed_fraction >= self.min_changed_fraction:
+            self._last_inference = now
+            return True
+
+        if now - self._last_inference >= self.min_interval:
+            # Periodic safety pass so slow changes (e.g. smoke build-up) aren't missed
+            self._last_inference = now
+            self.forced_inferences += 1
+            return True
+
+        self.frames_skipped += 1
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sensitivity": self.sensitivity,
+            "min_interval_seconds": self.min_interval,
+            "frames_seen": self.frames_seen,
+            "frames_skipped": self.frames_skipped,
+            "skip_ratio": round(self.frames_skipped / self.frames_seen, 4) if self.frames_seen else 0,
+            "forced_inferences": self.forced_inferences,
+            "last_changed_fraction": round(self.last_changed_fraction, 5),
+        }
@@ -0,0 +1,220 @@
+"""
+FireSight — Per-Camera Execution Plans
+Compiles a camera's detection categories and confidence thresholds into the
+set of models worth running, the class ids each model should be restricted
+to, and per-class thresholds applied in one vectorised filter.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.config import settings
+from app.detection.categories import CATEGORY_MAP
+from app.detection.batch import DetectionBatch, CATEGORY_IDS, label_id
+from app.detection.model_registry import model_registry
+
+
+# Models run by detect_frame, in output order
+PLAN_MODELS = ["general", "fire_smoke", "ppe", "plant"]
+
+# Categories each model can contribute; used to skip models before they load
+MODEL_CATEGORIES = {
+    "general": {"human", "vehicle", "bicycle", "plant"},
+    "fire_smoke": {"fire", "smoke"},
+    "ppe": {"ppe"},
+    "plant": {"plant"},
+}
+
+# The fire/smoke model historically ran at 80% of the base confidence
+CONFIDENCE_SCALE = {"fire": 0.8, "smoke": 0.8}
+
+
+def class_category(model_name: str, class_name: str) -> Optional[str]:
+    """FireSight category for one class of a model, or None if it's ignored."""
+    if model_name == "general":
+        return CATEGORY_MAP.get(class_name)
+    if model_name == "fire_smoke":
+        return "fire" if "fire" in class_name.lower() else "smoke"
+    if model_name == "ppe":
+        return "ppe"
+    if model_name == "plant":
+        return "plant"
+    return None
+
+
+def result_arrays(result) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(class ids, scores, xyxy boxes) of one Results object as NumPy arrays."""
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32), np.empty((0, 4), dtype=np.float32)
+    return (
+        boxes.cls.cpu().numpy().astype(np.intp),
+        boxes.conf.cpu().numpy(),
+        boxes.xyxy.cpu().numpy(),
+    )
+
+
+class ModelPlan:
+    """What to ask of one model and how to filter what comes back."""
+
+    def __init__(self, name: str, class_names: Dict[int, str], wanted: Optional[set], thresholds: Dict[str, float]):
+        self.name = name
+        n_classes = max(class_names) + 1 if class_names else 0
+        self.class_names = np.array(
+            [class_names.get(i, str(i)) for i in range(n_classes)], dtype=object
+        )
+        if name == "fire_smoke":
+            self.class_names = np.array([c.lower() for c in self.class_names], dtype=object)
+
+        # Per-class lookup tables; -1 marks classes that map to no category
+        self.category_ids = np.full(n_classes, -1, dtype=np.int16)
+        self.label_ids = np.array([label_id(c) for c in self.class_names], dtype=np.int32)
+        # Classes we don't want get an infinite threshold so the filter drops them
+        self.thresholds = np.full(n_classes, np.inf)
+        for cls_id in range(n_classes):
+            category = class_category(name, class_names.get(cls_id, ""))
+            if category is None or (wanted is not None and category not in wanted):
+                continue
+            self.category_ids[cls_id] = CATEGORY_IDS[category]
+            self.thresholds[cls_id] = thresholds[category]
+
+        wanted_ids = np.flatnonzero(np.isfinite(self.thresholds))
+        self.class_ids: List[int] = wanted_ids.tolist()
+        # Only restrict the model when it would otherwise produce unwanted boxes
+        self.classes: Optional[List[int]] = self.class_ids if len(wanted_ids) < n_classes else None
+        self.conf = float(self.thresholds[wanted_ids].min()) if len(wanted_ids) else 1.0
+
+    @property
+    def empty(self) -> bool:
+        return not self.class_ids
+
+    def predict_kwargs(self) -> Dict[str, Any]:
+        kwargs = {"conf": self.conf, "imgsz": settings.INFERENCE_IMAGE_SIZE}
+        if self.classes is not None:
+            kwargs["classes"] = self.classes
+        return kwargs
+
+    def filter(self, cls_ids: np.ndarray, scores: np.ndarray) -> np.ndarray:
+        """Boolean mask of boxes that pass their class's threshold."""
+        if len(cls_ids) == 0:
+            return np.zeros(0, dtype=bool)
+        in_range = cls_ids < len(self.thresholds)
+        thresholds = np.where(in_range, self.thresholds[np.minimum(cls_ids, len(self.thresholds) - 1)], np.inf)
+        return scores >= thresholds
+
+    def extract(self, result, offset: Optional[np.ndarray] = None) -> DetectionBatch:
+        """Bulk-extract boxes from one Results object and keep those that pass.
+
+        ``offset`` ([dx, dy, dx, dy]) maps boxes from a cropped region back
+        to full-frame coordinates.
+        """
+        cls_ids, scores, xyxy = result_arrays(result)
+        if offset is not None and len(xyxy):
+            xyxy = xyxy + offset
+        return self.extract_arrays(cls_ids, scores, xyxy)
+
+    def extract_arrays(self, cls_ids: np.ndarray, scores: np.ndarray, xyxy: np.ndarray) -> DetectionBatch:
+        """Detections from raw class/score/box arrays, keeping those that pass."""
+        cls_ids = cls_ids.astype(np.intp, copy=False)
+        keep = self.filter(cls_ids, scores)
+        if not keep.any():
+            return DetectionBatch.empty()
+        cls_ids = cls_ids[keep]
+        return DetectionBatch(
+            xyxy[keep], scores[keep], cls_ids, self.category_ids[cls_ids], self.label_ids[cls_ids],
+        )
+
+
+class ExecutionPlan:
+    """The compiled set of model plans for one camera configuration."""
+
+    def __init__(self, categories: Optional[List[str]], models: List[ModelPlan]):
+        self.categories = categories
+        self.models = models
+
+    @property
+    def model_names(self) -> List[str]:
+        return [m.name for m in self.models]
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "categories": self.categories,
+            "models": {
+                m.name: {"classes": m.classes, "conf": round(m.conf, 3)} for m in self.models
+            },
+        }
+
+
+def resolve_thresholds(confidence: Optional[float] = None, overrides: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """Per-category thresholds: defaults from the base confidence, then camera overrides."""
+    base = settings.DEFAULT_CONFIDENCE if confidence is None else confidence
+    thresholds = {}
+    for categories in MODEL_CATEGORIES.values():
+        for category in categories:
+            thresholds[category] = base * CONFIDENCE_SCALE.get(category, 1.0)
+    if overrides:
+        thresholds.update({k: float(v) for k, v in overrides.items()})
+    return thresholds
+
+
+# Distinct camera configurations kept compiled (least recently used dropped first)
+PLAN_CACHE_SIZE = 256
+
+_plan_cache: "OrderedDict[Tuple, ExecutionPlan]" = OrderedDict()
+_plan_lock = threading.Lock()
+
+
+def compile_plan(categories: Optional[List[str]] = None, confidence: Optional[float] = None,
+                 overrides: Optional[Dict[str, float]] = None, registry=None) -> ExecutionPlan:
+    """Build (or fetch the cached) execution plan for a camera configuration.
+
+    ``categories`` of None means every category. Models that cannot produce
+    any wanted category are skipped without being loaded. A plan missing a
+    wanted model (weights absent or failed to load) is not cached, so the
+    model joins once the registry loads it.
+    """
+    registry = registry or model_registry
+    wanted = None if categories is None else set(categories)
+    thresholds = resolve_thresholds(confidence, overrides)
+    key = (
+        None if wanted is None else frozenset(wanted),
+        tuple(sorted(thresholds.items())),
+        id(registry),
+    )
+
+    with _plan_lock:
+        plan = _plan_cache.get(key)
+        if plan is not None:
+            _plan_cache.move_to_end(key)
+    if plan is not None:
+        return plan
+
+    model_plans = []
+    complete = True
+    for name in PLAN_MODELS:
+        if wanted is not None and not (MODEL_CATEGORIES[name] & wanted):
+            continue
+        model = registry.get(name)
+        if model is None:
+            complete = False
+            continue
+        model_plan = ModelPlan(name, dict(model.names), wanted, thresholds)
+        if not model_plan.empty:
+            model_plans.append(model_plan)
+
+    plan = ExecutionPlan(categories, model_plans)
+    if complete:
+        with _plan_lock:
+            _plan_cache[key] = plan
+            while len(_plan_cache) > PLAN_CACHE_SIZE:
+                _plan_cache.popitem(last=False)
+    return plan
+
+
+def invalidate_plans():
+    """Drop cached plans (e.g. after models are reloaded)."""
+    with _plan_lock:
+        _plan_cache.clear()
@@ -0,0 +1,195 @@
+"""
+FireSight — Analysis Result Cache
+On-disk cache of raw per-frame model output for uploaded videos, keyed by
+video content, model weights and backend, inference size and sampling.
+Re-analysing the same footage with different categories or thresholds
+re-filters cached output instead of running the models again.
+"""
+
+import hashlib
+import os
+import threading
+import uuid
+import numpy as np
+from typing import Dict, Any, Optional
+
+from app.config import settings
+from app.detection.model_registry import model_registry
+
+
+class SegmentDetections:
+    """Raw output of one model over one video segment, as flat arrays.
+
+    ``frames`` lists every sampled frame index in the segment; the per-box
+    arrays are sorted by ``frame_index``.
+    """
+
+    __slots__ = ("frames", "frame_index", "cls_ids", "scores", "xyxy")
+
+    def __init__(self, frames, frame_index, cls_ids, scores, xyxy):
+        self.frames = np.asarray(frames, dtype=np.int64)
+        self.frame_index = np.asarray(frame_index, dtype=np.int64)
+        self.cls_ids = np.asarray(cls_ids, dtype=np.int32)
+        self.scores = np.asarray(scores, dtype=np.float32)
+        self.xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+
+    def for_frame(self, frame: int):
+        """(cls_ids, scores, xyxy) for one sampled frame."""
+        lo, hi = np.searchsorted(self.frame_index, [frame, frame + 1])
+        return self.cls_ids[lo:hi], self.scores[lo:hi], self.xyxy[lo:hi]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self.__slots__)
+
+
+class AnalysisResultCache:
+    """Size-bounded LRU cache of SegmentDetections files.
+
+    Entries are written atomically (temp file + rename) so worker processes
+    can share the directory. Recency is tracked with file mtimes, refreshed
+    on every hit; the oldest files are evicted once the total exceeds
+    ``max_bytes``.
+    """
+
+    def __init__(self, path: str = None, max_bytes: int = None, min_confidence: float = None, registry=None):
+        self.path = path or settings.ANALYSIS_CACHE_PATH
+        self.max_bytes = max_bytes if max_bytes is not None else settings.ANALYSIS_CACHE_MAX_MB * 1024 * 1024
+        self.min_confidence = (
+            settings.ANALYSIS_CACHE_MIN_CONFIDENCE if min_confidence is None else min_confidence
+        )
+        self.registry = registry or model_registry
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.ANALYSIS_CACHE_ENABLED and self.max_bytes > 0
+
+    def covers(self, model_plan) -> bool:
+        """Whether cached raw output is enough to answer this model plan.
+
+        Raw output is stored down to ``min_confidence``; a plan asking for
+        lower thresholds than that has to run the model directly.
+        """
+        return model_plan.conf >= self.min_confidence
+
+    def raw_predict_kwargs(self) -> Dict[str, Any]:
+        """Inference arguments for cacheable runs: every class, floor confidence."""
+        return {"conf": self.min_confidence, "imgsz": settings.INFERENCE_IMAGE_SIZE}
+
+    def key(self, content_hash: str, model_name: str, start: int, end: Optional[int], step: int,
+            backend: Optional[str] = None) -> Optional[str]:
+        """Cache key for one model over one segment, or None if the weights are missing.
+
+        The inference backend is part of the key: INT8 and FP32 runtimes
+        don't produce identical scores. Entries are written under the
+        ``backend`` that produced them (an export can fall back to PyTorch);
+        lookups default to the one the registry expects to serve.
+        """
+        checksum = self.registry.checksum(model_name)
+        if checksum is None:
+            return None
+        parts = [
+            content_hash, model_name, checksum, backend or self.registry.backend(model_name),
+            str(settings.INFERENCE_IMAGE_SIZE), str(self.min_confidence),
+            str(step), str(start), str(end),
+        ]
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.npz")
+
+    def get(self, key: str) -> Optional[SegmentDetections]:
+        path = self._file(key)
+        try:
+            with np.load(path) as data:
+                entry = SegmentDetections(*(data[name] for name in SegmentDetections.__slots__))
+            os.utime(path)
+        except (OSError, KeyError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: SegmentDetections):
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = os.path.join(self.path, f".{key}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, **{name: getattr(entry, name) for name in SegmentDetections.__slots__})
+            os.replace(tmp_path, self._file(key))
+        except OSError as e:
+            print(f"  Warning: Could not write analysis cache entry: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        with self._lock:
+            self.writes += 1
+        self.evict()
+
+    def _scan(self):
+        entries = []
+        try:
+            with os.scandir(self.path) as it:
+                for item in it:
+                    if not item.name.endswith(".npz"):
+                        continue
+                    try:
+                        st = item.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, item.path))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits ``max_bytes``."""
+        entries = self._scan()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                with self._lock:
+                    self.evictions += 1
+            except FileNotFoundError:
+                pass  # Another worker got there first
+            total -= size
+
+    def clear(self):
+        for _, _, path in self._scan():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Disk usage plus hit/miss counters for this process."""
+        entries = self._scan()
+        return {
+            "enabled": self.enabled,
+            "entries": len(entries),
+            "size_mb": round(sum(size for _, size, _ in entries) / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "min_confidence": self.min_confidence,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
+
+
+# Global cache instance (each worker process gets its own, sharing the directory)
+analysis_cache = AnalysisResultCache()
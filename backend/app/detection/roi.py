@@ -0,0 +1,126 @@
+"""
+FireSight — Zone Region of Interest
+Crops (or masks) frames to the bounding box of a camera's active zones before
+inference, and maps detections back to full-frame coordinates.
+"""
+
+import cv2
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+
+ROI_MODES = ("off", "crop", "mask")
+
+
+def active_zone_polygons(zones: List[Dict]) -> List[np.ndarray]:
+    """Pixel polygons of zones that are enabled and have at least three points."""
+    polygons = []
+    for zone in zones or []:
+        if not zone.get("active", True):
+            continue
+        points = zone.get("points", [])
+        if len(points) >= 3:
+            polygons.append(np.asarray(points, dtype=np.float32).reshape(-1, 2))
+    return polygons
+
+
+def zone_union_bbox(polygons: List[np.ndarray], frame_shape: Tuple[int, ...],
+                    padding: int = 0) -> Optional[Tuple[int, int, int, int]]:
+    """Padded [x1, y1, x2, y2] around all polygons, clipped to the frame."""
+    if not polygons:
+        return None
+    h, w = frame_shape[:2]
+    points = np.concatenate(polygons)
+    x1, y1 = np.floor(points.min(axis=0)).astype(int) - padding
+    x2, y2 = np.ceil(points.max(axis=0)).astype(int) + padding
+    x1, y1 = max(0, x1), max(0, y1)
+    x2, y2 = min(w, x2), min(h, y2)
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return int(x1), int(y1), int(x2), int(y2)
+
+
+class RegionOfInterest:
+    """Per-camera ROI built from its zones.
+
+    ``crop`` runs inference on the union bounding box of the active zones;
+    ``mask`` additionally blacks out pixels inside that box but outside every
+    zone. Anything outside the zones is not seen by the models, so ROI is off
+    by default and opted into per camera. When the zones cover nearly the
+    whole frame (``min_saving``) the full frame is used unchanged.
+    """
+
+    def __init__(self, zones: List[Dict] = None, mode: str = "off", padding: int = 32,
+                 min_saving: float = 0.1):
+        self.polygons = active_zone_polygons(zones)
+        self.mode = mode
+        self.padding = padding
+        self.min_saving = min_saving
+        self._shape = None
+        self._bbox: Optional[Tuple[int, int, int, int]] = None
+        self._mask: Optional[np.ndarray] = None
+        self.pixel_fraction = 1.0
+
+    def configure(self, mode: str = None, padding: int = None):
+        if mode is not None and mode != self.mode:
+            self.mode = mode
+            self._shape = None
+        if padding is not None and padding != self.padding:
+            self.padding = padding
+            self._shape = None
+
+    def set_zones(self, zones: List[Dict]):
+        self.polygons = active_zone_polygons(zones)
+        self._shape = None
+
+    def _prepare(self, shape):
+        self._shape = shape
+        self._bbox = None
+        self._mask = None
+        self.pixel_fraction = 1.0
+        if self.mode == "off":
+            return
+
+        bbox = zone_union_bbox(self.polygons, shape, self.padding)
+        if bbox is None:
+            return
+        x1, y1, x2, y2 = bbox
+        fraction = (x2 - x1) * (y2 - y1) / float(shape[0] * shape[1])
+        if fraction > 1.0 - self.min_saving:
+            return
+
+        self._bbox = bbox
+        self.pixel_fraction = fraction
+        if self.mode == "mask":
+            mask = np.zeros((y2 - y1, x2 - x1), dtype=np.uint8)
+            offset = np.array([x1, y1], dtype=np.float32)
+            cv2.fillPoly(mask, [np.round(p - offset).astype(np.int32) for p in self.polygons], 255)
+            if self.padding:
+                size = 2 * self.padding + 1
+                mask = cv2.dilate(mask, cv2.getStructuringElement(cv2.MORPH_RECT, (size, size)))
+            self._mask = mask
+
+    @property
+    def active(self) -> bool:
+        return self._bbox is not None
+
+    def apply(self, frame: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Return (inference frame, xyxy offset), or (frame, None) when ROI is inactive."""
+        if frame.shape != self._shape:
+            self._prepare(frame.shape)
+        if self._bbox is None:
+            return frame, None
+
+        x1, y1, x2, y2 = self._bbox
+        region = frame[y1:y2, x1:x2]
+        if self._mask is not None:
+            region = cv2.bitwise_and(region, region, mask=self._mask)
+        return region, np.array([x1, y1, x1, y1], dtype=np.float32)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "active": self.active,
+            "bbox": list(self._bbox) if self._bbox else None,
+            "pixel_fraction": round(self.pixel_fraction, 4),
+            "zones": len(self.polygons),
+        }
@@ -96,7 +96,7 @@ class SpeedEstimator:
         from app.models import SpeedLog
         log = SpeedLog(
             camera_id=camera_id,
-            track_id=speed_data["track_id"],
+            track_id=str(speed_data["track_id"]),
             speed_kmh=speed_data["speed_kmh"],
             speed_mph=speed_data["speed_mph"],
             speed_limit=speed_data.get("speed_limit"),
@@ -1,129 +1,169 @@
 """
 FireSight — IoU-Based Object Tracker
 Tracks detected objects across frames using Intersection over Union.
+Track state is stored as parallel NumPy arrays and matched with an optimal
+(Hungarian / LAPJV) assignment, so busy scenes with hundreds of objects stay cheap.
 """
 
 import numpy as np
-from typing import List, Dict, Any
+from typing import Tuple
+
+try:
+    import lap
+except ImportError:
+    lap = None
+
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from app.detection.batch import DetectionBatch
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between (N, 4) and (M, 4) [x1, y1, x2, y2] arrays via broadcasting."""
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)), dtype=np.float32)
+
+    # float32 and in-place ops keep the N x M temporaries small for busy scenes
+    a = np.asarray(boxes_a, dtype=np.float32)
+    b = np.asarray(boxes_b, dtype=np.float32)
+    inter = np.minimum(a[:, None, 2], b[None, :, 2])
+    inter -= np.maximum(a[:, None, 0], b[None, :, 0])
+    np.maximum(inter, 0, out=inter)
+    inter_h = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter_h -= np.maximum(a[:, None, 1], b[None, :, 1])
+    np.maximum(inter_h, 0, out=inter_h)
+    inter *= inter_h
+
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :]
+    union -= inter
+
+    iou = np.zeros_like(inter)
+    np.divide(inter, union, out=iou, where=union > 0)
+    return iou
+
+
+def _solve(cost: np.ndarray, cost_limit: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Minimum-cost assignment on a dense cost matrix."""
+    if lap is not None:
+        _, row_to_col, _ = lap.lapjv(cost, extend_cost=True, cost_limit=cost_limit)
+        r = np.flatnonzero(row_to_col >= 0)
+        return r, row_to_col[r]
+    return linear_sum_assignment(cost)
+
+
+def optimal_assignment(iou: np.ndarray, iou_threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Maximum-IoU one-to-one assignment; returns matched (row, col) index arrays.
+
+    The viable pairs (IoU >= threshold) form a sparse bipartite graph, so it
+    is split into connected components: isolated one-to-one pairs are matched
+    directly and only contested clusters go to the solver (LAPJV from the
+    optional ``lap`` package when installed, otherwise SciPy's Hungarian).
+    """
+    empty = np.empty(0, dtype=np.intp)
+    if iou.size == 0:
+        return empty, empty
+    pair_rows, pair_cols = np.nonzero(iou >= iou_threshold)
+    if len(pair_rows) == 0:
+        return empty, empty
+
+    n_rows, n_cols = iou.shape
+    graph = coo_matrix(
+        (np.ones(len(pair_rows)), (pair_rows, pair_cols + n_rows)),
+        shape=(n_rows + n_cols, n_rows + n_cols),
+    )
+    _, labels = connected_components(graph, directed=False)
+    pair_labels = labels[pair_rows]
+    edges_per_component = np.bincount(pair_labels)
+
+    # A component with a single edge is an uncontested match
+    single = edges_per_component[pair_labels] == 1
+    matched_rows = [pair_rows[single]]
+    matched_cols = [pair_cols[single]]
+
+    contested = pair_labels[~single]
+    for label in np.unique(contested):
+        rows = np.flatnonzero(labels[:n_rows] == label)
+        cols = np.flatnonzero(labels[n_rows:] == label)
+        sub = iou[np.ix_(rows, cols)]
+        cost = np.where(sub >= iou_threshold, 1.0 - sub, 1e6)
+        r, c = _solve(cost, 1.0 - iou_threshold + 1e-6)
+        keep = sub[r, c] >= iou_threshold
+        matched_rows.append(rows[r[keep]])
+        matched_cols.append(cols[c[keep]])
+
+    return np.concatenate(matched_rows), np.concatenate(matched_cols)
 
 
 class IoUTracker:
-    """Simple IoU-based multi-object tracker."""
+    """IoU-based multi-object tracker with array-backed track state."""
 
     def __init__(self, iou_threshold: float = 0.3, max_lost: int = 30):
         self.iou_threshold = iou_threshold
         self.max_lost = max_lost
-        self.tracks = {}
         self.next_id = 1
 
-    def update(self, detections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Update tracks with new detections and assign track IDs."""
-        if not detections:
-            self._increment_lost()
-            return []
-
-        # Extract bboxes from detections
-        det_bboxes = [d["bbox"] for d in detections]
-
-        if not self.tracks:
-            # Initialize tracks
-            for i, det in enumerate(detections):
-                track_id = f"T{self.next_id:04d}"
-                self.next_id += 1
-                det["track_id"] = track_id
-                self.tracks[track_id] = {
-                    "bbox": det["bbox"],
-                    "lost_frames": 0,
-                    "category": det["category"],
-                }
-            return detections
-
-        # Compute IoU matrix
-        track_ids = list(self.tracks.keys())
-        track_bboxes = [self.tracks[t]["bbox"] for t in track_ids]
-        iou_matrix = self._compute_iou_matrix(track_bboxes, det_bboxes)
-
-        # Greedy assignment
-        assigned_tracks = set()
-        assigned_dets = set()
-
-        while True:
-            if iou_matrix.size == 0:
-                break
-            max_idx = np.unravel_index(iou_matrix.argmax(), iou_matrix.shape)
-            max_iou = iou_matrix[max_idx]
-
-            if max_iou < self.iou_threshold:
-                break
-
-            t_idx, d_idx = max_idx
-            track_id = track_ids[t_idx]
-            detections[d_idx]["track_id"] = track_id
-            self.tracks[track_id]["bbox"] = detections[d_idx]["bbox"]
-            self.tracks[track_id]["lost_frames"] = 0
-
-            assigned_tracks.add(t_idx)
-            assigned_dets.add(d_idx)
-            iou_matrix[t_idx, :] = -1
-            iou_matrix[:, d_idx] = -1
-
-        # Create new tracks for unassigned detections
-        for i, det in enumerate(detections):
-            if i not in assigned_dets:
-                track_id = f"T{self.next_id:04d}"
-                self.next_id += 1
-                det["track_id"] = track_id
-                self.tracks[track_id] = {
-                    "bbox": det["bbox"],
-                    "lost_frames": 0,
-                    "category": det["category"],
-                }
-
-        self._increment_lost(assigned_tracks, track_ids)
-        return detections
-
-    def _compute_iou_matrix(self, boxes_a, boxes_b):
-        """Compute IoU between two sets of bounding boxes."""
-        a = np.array(boxes_a)
-        b = np.array(boxes_b)
-
-        if len(a) == 0 or len(b) == 0:
-            return np.array([])
-
-        iou_matrix = np.zeros((len(a), len(b)))
-        for i in range(len(a)):
-            for j in range(len(b)):
-                iou_matrix[i, j] = self._iou(a[i], b[j])
-        return iou_matrix
-
-    @staticmethod
-    def _iou(box_a, box_b):
-        """Compute IoU between two boxes [x1, y1, x2, y2]."""
-        x1 = max(box_a[0], box_b[0])
-        y1 = max(box_a[1], box_b[1])
-        x2 = min(box_a[2], box_b[2])
-        y2 = min(box_a[3], box_b[3])
-
-        intersection = max(0, x2 - x1) * max(0, y2 - y1)
-        area_a = (box_a[2] - box_a[0]) * (box_a[3] - box_a[1])
-        area_b = (box_b[2] - box_b[0]) * (box_b[3] - box_b[1])
-        union = area_a + area_b - intersection
-
-        return intersection / union if union > 0 else 0
-
-    def _increment_lost(self, assigned=None, track_ids=None):
-        """Increment lost frame count and remove stale tracks."""
-        to_remove = []
-        for track_id, track in self.tracks.items():
-            if assigned and track_ids:
-                idx = track_ids.index(track_id) if track_id in track_ids else -1
-                if idx >= 0 and idx not in assigned:
-                    track["lost_frames"] += 1
-            else:
-                track["lost_frames"] += 1
-
-            if track["lost_frames"] > self.max_lost:
-                to_remove.append(track_id)
-
-        for tid in to_remove:
-            del self.tracks[tid]
+        # Struct-of-arrays track storage, one row per live track
+        self.track_ids = np.empty(0, dtype=np.int64)
+        self.boxes = np.empty((0, 4), dtype=np.float64)
+        self.lost_frames = np.empty(0, dtype=np.int32)
+        self.category_ids = np.empty(0, dtype=np.int16)
+
+        # Ids dropped by the most recent update(), for per-track state owners to evict
+        self.retired_ids = np.empty(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.track_ids)
+
+    def update(self, batch: DetectionBatch) -> DetectionBatch:
+        """Update tracks with a frame's detections and fill in ``batch.track_ids``."""
+        if not len(batch):
+            self._age_tracks(np.ones(len(self.track_ids), dtype=bool))
+            return batch
+
+        det_boxes = batch.boxes
+        det_track_ids = np.zeros(len(batch), dtype=np.int64)
+
+        rows, cols = optimal_assignment(iou_matrix(self.boxes, det_boxes), self.iou_threshold)
+
+        # Matched tracks take the new box and reset their lost counter
+        self.boxes[rows] = det_boxes[cols]
+        det_track_ids[cols] = self.track_ids[rows]
+        unmatched_tracks = np.ones(len(self.track_ids), dtype=bool)
+        unmatched_tracks[rows] = False
+        self.lost_frames[rows] = 0
+        self._age_tracks(unmatched_tracks)
+
+        # Unmatched detections start new tracks
+        new_dets = np.ones(len(batch), dtype=bool)
+        new_dets[cols] = False
+        new_idx = np.flatnonzero(new_dets)
+        if len(new_idx):
+            new_ids = np.arange(self.next_id, self.next_id + len(new_idx), dtype=np.int64)
+            self.next_id += len(new_idx)
+            det_track_ids[new_idx] = new_ids
+            self.track_ids = np.concatenate([self.track_ids, new_ids])
+            self.boxes = np.concatenate([self.boxes, det_boxes[new_idx]])
+            self.lost_frames = np.concatenate([self.lost_frames, np.zeros(len(new_idx), dtype=np.int32)])
+            self.category_ids = np.concatenate([self.category_ids, batch.category_ids[new_idx]])
+
+        batch.track_ids = det_track_ids
+        return batch
+
+    def _age_tracks(self, mask: np.ndarray):
+        """Increment lost frame count for masked tracks and drop stale ones."""
+        self.lost_frames[mask] += 1
+        alive = self.lost_frames <= self.max_lost
+        self.retired_ids = self.track_ids[~alive]
+        if not alive.all():
+            self.track_ids = self.track_ids[alive]
+            self.boxes = self.boxes[alive]
+            self.lost_frames = self.lost_frames[alive]
+            self.category_ids = self.category_ids[alive]
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the track arrays."""
+        return int(self.track_ids.nbytes + self.boxes.nbytes + self.lost_frames.nbytes + self.category_ids.nbytes)
@@ -0,0 +1,110 @@
+"""
+FireSight — Zone Rasters
+Compiles a camera's zone polygons into a bitmask raster once, so zone
+membership for every detection centre is a single array lookup shared by
+intrusion, dwell and crowd analytics.
+"""
+
+import logging
+
+import cv2
+import numpy as np
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bits per raster pixel; zones beyond this are ignored
+MAX_ZONES = 64
+
+# fillPoly fixed-point precision for fractional vertices
+_SHIFT = 4
+
+
+def _bit_dtype(count: int):
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if count <= np.iinfo(dtype).bits:
+            return dtype
+    return np.uint64
+
+
+class ZoneMap:
+    """Zones compiled to a raster where bit ``i`` of a pixel is set inside zone ``i``.
+
+    The raster covers the pixel bounding box of the zones (zone points are in
+    stream pixels), so anything outside it is outside every zone and no frame
+    size is needed. Only enabled zones with at least three points are kept,
+    and at most MAX_ZONES of them (the rest are dropped with a warning);
+    ``zones[i]`` is the zone dict for bit ``i``. Pixels on a polygon's edge
+    count as inside.
+    """
+
+    def __init__(self, zones: List[Dict] = None):
+        self.zones: List[Dict] = []
+        polygons = []
+        skipped = dropped = 0
+        for zone in zones or []:
+            if not zone.get("active", True) or len(zone.get("points", [])) < 3:
+                skipped += 1
+                continue
+            if len(self.zones) == MAX_ZONES:
+                dropped += 1
+                continue
+            self.zones.append(zone)
+            polygons.append(np.asarray(zone["points"], dtype=np.float64).reshape(-1, 2))
+        if skipped:
+            logger.info("%d inactive or degenerate zone(s) left out of zone analytics", skipped)
+        if dropped:
+            logger.warning("Zone analytics use the first %d zones; %d more were dropped", MAX_ZONES, dropped)
+
+        self.origin = np.zeros(2, dtype=np.int64)
+        self.raster = np.zeros((0, 0), dtype=_bit_dtype(len(self.zones)))
+        if not polygons:
+            return
+
+        points = np.concatenate(polygons)
+        self.origin = np.floor(points.min(axis=0)).astype(np.int64)
+        width, height = (np.ceil(points.max(axis=0)).astype(np.int64) - self.origin + 1).tolist()
+        self.raster = np.zeros((height, width), dtype=_bit_dtype(len(self.zones)))
+        plane = np.zeros((height, width), dtype=np.uint8)
+        for bit, polygon in enumerate(polygons):
+            plane[:] = 0
+            vertices = np.round((polygon - self.origin) * (1 << _SHIFT)).astype(np.int32)
+            cv2.fillPoly(plane, [vertices], 1, lineType=cv2.LINE_8, shift=_SHIFT)
+            self.raster |= plane.astype(self.raster.dtype) << self.raster.dtype.type(bit)
+
+    def __len__(self) -> int:
+        return len(self.zones)
+
+    def indices(self, zone_type: Optional[str] = None) -> List[int]:
+        """Bit indices of zones, optionally only those of one ``type``."""
+        return [i for i, z in enumerate(self.zones) if zone_type is None or z.get("type") == zone_type]
+
+    def masks(self, points: np.ndarray) -> np.ndarray:
+        """Zone bitmask for each (N, 2) point; 0 outside every zone."""
+        points = np.asarray(points).reshape(-1, 2)
+        out = np.zeros(len(points), dtype=self.raster.dtype)
+        if not len(points) or not self.raster.size:
+            return out
+        xy = np.floor(points).astype(np.int64) - self.origin
+        height, width = self.raster.shape
+        within = (xy[:, 0] >= 0) & (xy[:, 1] >= 0) & (xy[:, 0] < width) & (xy[:, 1] < height)
+        out[within] = self.raster[xy[within, 1], xy[within, 0]]
+        return out
+
+    def membership(self, points: np.ndarray, indices: Optional[List[int]] = None) -> np.ndarray:
+        """(N, Z) bool: whether each point lies in each zone (all zones, or ``indices``)."""
+        bits = np.arange(len(self.zones)) if indices is None else np.asarray(indices, dtype=np.int64)
+        masks = self.masks(points)
+        return (masks[:, None] >> bits.astype(masks.dtype)[None, :]) & 1 == 1
+
+    def counts(self, points: np.ndarray) -> Dict[str, int]:
+        """Number of points in each zone, keyed by zone name."""
+        totals = self.membership(points).sum(axis=0).tolist()
+        return {zone.get("name", f"zone_{i}"): total for i, (zone, total) in enumerate(zip(self.zones, totals))}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "zones": len(self.zones),
+            "raster_shape": list(self.raster.shape),
+            "raster_bytes": int(self.raster.nbytes),
+        }
@@ -3,6 +3,8 @@ FireSight — FastAPI Application Entry Point
 AI Video Analytics Platform by Firewire Networks Ltd
 """
 
+import asyncio
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
@@ -11,6 +13,12 @@ from app.config import settings
 from app.database import engine, Base
 from app.routers import cameras, incidents, detection, reports, websocket, features, settings as settings_router
 
+# Service modules report through module loggers; without this their warnings are dropped
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -18,12 +26,28 @@ async def lifespan(app: FastAPI):
     # Startup: create database tables
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    # Pick up video analysis jobs interrupted by the last shutdown
+    from app.services.analysis_job_service import job_manager
+    await job_manager.resume_pending()
+    # Backfill or repair the dashboard rollup if it has drifted from the incidents
+    from app.services.rollup_service import rebuild_if_stale
+    await rebuild_if_stale()
+    # Write-behind for live incidents (also replays anything spilled last run)
+    from app.services.incident_writer import incident_writer
+    incident_writer.start()
+    # Export models configured for ONNX/OpenVINO in the background
+    if settings.INFERENCE_EXPORT_ON_STARTUP:
+        from app.detection.model_registry import model_registry
+        asyncio.create_task(asyncio.to_thread(model_registry.prepare))
     print("🔥 FireSight AI Video Analytics Platform started")
     print(f"   Version: {settings.APP_VERSION}")
     print(f"   Environment: {settings.ENVIRONMENT}")
     yield
     # Shutdown
     print("🔥 FireSight shutting down...")
+    await incident_writer.close()
+    from app.detection.executor import inference_executor
+    inference_executor.shutdown()
 
 
 app = FastAPI(
@@ -40,6 +64,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
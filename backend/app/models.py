@@ -3,7 +3,7 @@ FireSight — SQLAlchemy ORM Models
 Database tables for cameras, incidents, alerts, sessions, and more.
 """
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, JSON, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Boolean, DateTime, Text, JSON, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -54,6 +54,14 @@ class SessionStatus(str, enum.Enum):
     ERROR = "error"
 
 
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
 # --- Models ---
 
 class Camera(Base):
@@ -77,6 +85,14 @@ class Camera(Base):
 
 class Incident(Base):
     __tablename__ = "incidents"
+    # Listing filters one column at most and pages newest-first on (detected_at, id)
+    __table_args__ = (
+        Index("ix_incidents_detected_at_id", "detected_at", "id"),
+        Index("ix_incidents_camera_detected_at", "camera_id", "detected_at", "id"),
+        Index("ix_incidents_category_detected_at", "category", "detected_at", "id"),
+        Index("ix_incidents_severity_detected_at", "severity", "detected_at", "id"),
+        Index("ix_incidents_status_detected_at", "status", "detected_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     camera_id = Column(Integer, ForeignKey("cameras.id"), nullable=False)
@@ -91,10 +107,30 @@ class Incident(Base):
     detected_at = Column(DateTime(timezone=True), server_default=func.now())
     reviewed_by = Column(String(255), nullable=True)
     notes = Column(Text, default="")
+    # Live incidents are aggregated per track: one row spans the track's lifetime
+    track_key = Column(String(64), nullable=True, unique=True, index=True)
+    frame_count = Column(Integer, default=1)
+    last_seen_at = Column(DateTime(timezone=True), nullable=True)
+    ended_at = Column(DateTime(timezone=True), nullable=True)
 
     camera = relationship("Camera", back_populates="incidents")
 
 
+class IncidentHourly(Base):
+    """Incident counts per hour, camera, category and severity.
+
+    Incremented by the incident writer in the same transaction that inserts
+    the incidents; rebuilt from ``incidents`` by the rollup service.
+    """
+    __tablename__ = "incident_hourly"
+
+    hour = Column(DateTime(timezone=True), primary_key=True)
+    camera_id = Column(Integer, primary_key=True)
+    category = Column(String(50), primary_key=True)
+    severity = Column(SQLEnum(Severity), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
 class AlertRule(Base):
     __tablename__ = "alert_rules"
 
@@ -215,3 +251,42 @@ class CrowdSnapshot(Base):
     density_per_sqm = Column(Float, default=0.0)
     threshold_exceeded = Column(Boolean, default=False)
     captured_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    video_path = Column(String(1024), nullable=False)
+    original_filename = Column(String(1024), default="")
+    content_hash = Column(String(64), nullable=True, index=True)
+    file_size = Column(BigInteger, default=0)
+    categories = Column(JSON, nullable=True)
+    status = Column(SQLEnum(JobStatus), default=JobStatus.QUEUED, index=True)
+    frames_done = Column(Integer, default=0)
+    frames_total = Column(Integer, default=0)
+    detections_count = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    detections = relationship("AnalysisDetection", back_populates="job", cascade="all, delete-orphan")
+
+
+class AnalysisDetection(Base):
+    __tablename__ = "analysis_detections"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("analysis_jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+    frame = Column(Integer, nullable=False)
+    timestamp = Column(Float, nullable=False)
+    category = Column(String(50), nullable=False)
+    severity = Column(String(20), default="low")
+    confidence = Column(Float, default=0.0)
+    bbox = Column(JSON, default=list)
+    track_id = Column(Integer, nullable=True)
+    class_name = Column(String(100), nullable=True)
+    description = Column(Text, nullable=True)
+
+    job = relationship("AnalysisJob", back_populates="detections")
@@ -56,6 +56,13 @@ async def update_camera(camera_id: int, update: CameraUpdate, db: AsyncSession =
 
     await db.flush()
     await db.refresh(camera)
+
+    # A streaming camera picks up zone edits without restarting detection
+    if "zones" in update_data:
+        from app.detection.engine import live_pipelines
+        pipeline = live_pipelines.get(camera_id)
+        if pipeline is not None:
+            pipeline.update_zones(camera.zones)
     return camera
 
 
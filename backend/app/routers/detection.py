@@ -2,12 +2,15 @@
 FireSight — Detection Start/Stop & Video Analysis Endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from typing import List, Optional
 
 from app.database import get_db
-from app.models import Camera, DetectionSession, SessionStatus
+from app.models import Camera, DetectionSession, SessionStatus, AnalysisJob, AnalysisDetection
+from app.schemas import AnalysisJobResponse, AnalysisResultsPage
 
 router = APIRouter()
 
@@ -77,44 +80,125 @@ async def stop_detection(camera_id: int, db: AsyncSession = Depends(get_db)):
     return {"message": f"Detection stopped", "session_id": session_id}
 
 
-@router.post("/analyse-video")
+@router.post("/analyse-video", response_model=AnalysisJobResponse, status_code=202)
 async def analyse_video(
     file: UploadFile = File(...),
-    background_tasks: BackgroundTasks = None,
+    categories: Optional[List[str]] = Query(default=None),
     db: AsyncSession = Depends(get_db),
 ):
-    """Upload and analyse a video file."""
-    if not file.filename.endswith((".mp4", ".avi", ".mov", ".mkv")):
+    """Upload a video file and queue it for analysis.
+
+    Re-uploading footage that is already queued, running or analysed with the
+    same categories returns the existing job instead of starting a new one.
+    """
+    if not file.filename.lower().endswith((".mp4", ".avi", ".mov", ".mkv")):
         raise HTTPException(status_code=400, detail="Unsupported video format")
 
-    # Save uploaded file
-    from app.services.clip_service import save_upload
-    video_path = await save_upload(file)
+    # Stream the upload to content-addressed storage
+    from app.services.clip_service import save_upload, UploadTooLarge
+    try:
+        upload = await save_upload(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    from app.services.analysis_job_service import job_manager
+    return await job_manager.submit(
+        db, upload["path"], file.filename, categories,
+        content_hash=upload["sha256"], file_size=upload["size"],
+    )
 
-    # Run analysis in background
-    from app.detection.engine import DetectionEngine
-    engine = DetectionEngine()
-    results = await engine.analyse_video(video_path, db)
 
-    return {
-        "message": "Video analysis complete",
-        "video_path": video_path,
-        "incidents_detected": len(results),
-        "results": results,
-    }
+@router.get("/jobs/{job_id}", response_model=AnalysisJobResponse)
+async def get_analysis_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    """Get status and progress of a video analysis job."""
+    job = await db.get(AnalysisJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+    return job
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=AnalysisJobResponse)
+async def cancel_analysis_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    """Cancel a queued or running video analysis job."""
+    from app.services.analysis_job_service import job_manager
+    job = await job_manager.cancel(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/results", response_model=AnalysisResultsPage)
+async def analysis_job_results(
+    job_id: int,
+    after_id: int = 0,
+    limit: int = Query(default=200, le=1000),
+    category: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Page through a job's detections in frame order (pass next_after_id to continue)."""
+    job = await db.get(AnalysisJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+
+    # Rows are inserted in frame order, so id order is frame order
+    query = (
+        select(AnalysisDetection)
+        .where(AnalysisDetection.job_id == job_id, AnalysisDetection.id > after_id)
+        .order_by(AnalysisDetection.id)
+        .limit(limit)
+    )
+    if category:
+        query = query.where(AnalysisDetection.category == category)
+    result = await db.execute(query)
+    rows = result.scalars().all()
+
+    return AnalysisResultsPage(
+        job_id=job_id,
+        results=rows,
+        next_after_id=rows[-1].id if len(rows) == limit else None,
+    )
 
 
 @router.get("/status")
 async def detection_status():
     """Get status of all active detection sessions."""
+    from app.detection.engine import live_pipelines
     return {
         "active_sessions": len(active_sessions),
         "cameras": list(active_sessions.keys()),
+        "pipelines": {str(cid): engine.live_stats() for cid, engine in live_pipelines.items()},
+    }
+
+
+@router.get("/metrics")
+async def detection_metrics():
+    """Get inference pipeline metrics (scheduler, worker pools, queue waits, batching, result cache, incident writer)."""
+    from app.detection.batcher import batcher_stats
+    from app.detection.executor import inference_executor
+    from app.detection.inference_scheduler import inference_scheduler
+    from app.detection.result_cache import analysis_cache
+    from app.services.incident_writer import incident_writer
+    return {
+        "scheduler": inference_scheduler.stats(),
+        "executor": inference_executor.stats(),
+        "batching": batcher_stats(),
+        "analysis_cache": await asyncio.to_thread(analysis_cache.stats),
+        "incident_writer": await asyncio.to_thread(incident_writer.stats),
+    }
+
+
+@router.get("/models")
+async def model_status():
+    """Get load state and memory footprint of the shared detection models."""
+    from app.detection.model_registry import model_registry
+    return {
+        "models": model_registry.status(),
+        "total_memory_mb": round(model_registry.total_memory_bytes() / (1024 * 1024), 2),
     }
 
 
 async def run_detection(camera_id: int, session_id: int):
     """Background task to run detection on a camera stream."""
     from app.detection.engine import DetectionEngine
-    engine = DetectionEngine()
+    engine = DetectionEngine(camera_id=camera_id, batching=True)
     await engine.run_live(camera_id, session_id)
@@ -2,10 +2,12 @@
 FireSight — Incident Management Endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+import base64
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
-from typing import List, Optional
+from sqlalchemy import select, func, and_, tuple_
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
 
 from app.database import get_db
@@ -14,9 +16,27 @@ from app.schemas import IncidentResponse, IncidentUpdate, DashboardStats
 
 router = APIRouter()
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(incident: Incident) -> str:
+    """Opaque keyset cursor for the page after ``incident``."""
+    raw = json.dumps({"t": incident.detected_at.isoformat(), "id": incident.id})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data["t"]), int(data["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 
 @router.get("/", response_model=List[IncidentResponse])
 async def list_incidents(
+    response: Response,
     camera_id: Optional[int] = None,
     category: Optional[str] = None,
     severity: Optional[str] = None,
@@ -24,11 +44,16 @@ async def list_incidents(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     limit: int = Query(default=50, le=500),
-    offset: int = 0,
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    offset: int = Query(default=0, description="Deprecated: use cursor, which stays fast at any depth"),
     db: AsyncSession = Depends(get_db),
 ):
-    """List incidents with optional filters."""
-    query = select(Incident).order_by(Incident.detected_at.desc())
+    """List incidents newest first with optional filters.
+
+    Pages are keyed on (detected_at, id): when a page is full, the
+    X-Next-Cursor response header holds the cursor for the next one.
+    """
+    query = select(Incident).order_by(Incident.detected_at.desc(), Incident.id.desc())
 
     if camera_id:
         query = query.where(Incident.camera_id == camera_id)
@@ -43,25 +68,36 @@ async def list_incidents(
     if end_date:
         query = query.where(Incident.detected_at <= end_date)
 
-    query = query.offset(offset).limit(limit)
-    result = await db.execute(query)
-    return result.scalars().all()
+    if cursor:
+        detected_at, incident_id = decode_cursor(cursor)
+        query = query.where(tuple_(Incident.detected_at, Incident.id) < (detected_at, incident_id))
+    elif offset:
+        query = query.offset(offset)
+
+    result = await db.execute(query.limit(limit))
+    incidents = result.scalars().all()
+    if len(incidents) == limit and incidents[-1].detected_at is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(incidents[-1])
+    return incidents
 
 
 @router.get("/dashboard", response_model=DashboardStats)
 async def dashboard_stats(db: AsyncSession = Depends(get_db)):
-    """Get dashboard statistics."""
+    """Get dashboard statistics (from the hourly incident rollup)."""
+    from app.services.rollup_service import counts_by, hourly_series
+
     today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
 
-    # Total incidents
-    total = await db.execute(select(func.count(Incident.id)))
-    total_incidents = total.scalar() or 0
+    # Category and severity breakdowns (and the total) from one grouped rollup query
+    breakdown = await counts_by(db, ["category", "severity"])
+    category_breakdown, severity_breakdown = {}, {}
+    for (category, severity), count in breakdown.items():
+        category_breakdown[category] = category_breakdown.get(category, 0) + count
+        severity_breakdown[str(severity)] = severity_breakdown.get(str(severity), 0) + count
+    total_incidents = sum(breakdown.values())
 
     # Incidents today
-    today_count = await db.execute(
-        select(func.count(Incident.id)).where(Incident.detected_at >= today)
-    )
-    incidents_today = today_count.scalar() or 0
+    incidents_today = sum((await counts_by(db, [], start=today)).values())
 
     # Active cameras
     active = await db.execute(
@@ -69,20 +105,6 @@ async def dashboard_stats(db: AsyncSession = Depends(get_db)):
     )
     active_cameras = active.scalar() or 0
 
-    # Category breakdown
-    cat_result = await db.execute(
-        select(Incident.category, func.count(Incident.id))
-        .group_by(Incident.category)
-    )
-    category_breakdown = dict(cat_result.all())
-
-    # Severity breakdown
-    sev_result = await db.execute(
-        select(Incident.severity, func.count(Incident.id))
-        .group_by(Incident.severity)
-    )
-    severity_breakdown = {str(k): v for k, v in sev_result.all()}
-
     return DashboardStats(
         total_incidents=total_incidents,
         incidents_today=incidents_today,
@@ -90,10 +112,21 @@ async def dashboard_stats(db: AsyncSession = Depends(get_db)):
         detection_sessions=0,
         category_breakdown=category_breakdown,
         severity_breakdown=severity_breakdown,
-        hourly_data=[],
+        hourly_data=await hourly_series(db, hours=24),
     )
 
 
+@router.post("/rollup/rebuild")
+async def rebuild_rollup(db: AsyncSession = Depends(get_db)):
+    """Recompute the hourly incident rollup from the incidents table (repair after out-of-band edits)."""
+    from app.services.rollup_service import drift, rebuild
+
+    before = await drift(db)
+    await rebuild(db)
+    incidents, counted = await drift(db)
+    return {"incidents": incidents, "counted_before": before[1], "counted": counted}
+
+
 @router.get("/search")
 async def search_incidents(
     q: str = Query(..., description="Natural language search query"),
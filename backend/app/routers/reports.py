@@ -32,13 +32,11 @@ async def export_csv(
     end_date: Optional[datetime] = None,
     camera_id: Optional[int] = None,
     category: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
 ):
-    """Export incidents as CSV."""
-    from app.services.report_service import generate_csv
-    csv_data = await generate_csv(db, start_date, end_date, camera_id, category)
+    """Export incidents as CSV, streamed from the database in chunks."""
+    from app.services.report_service import stream_csv
     return StreamingResponse(
-        iter([csv_data]),
+        stream_csv(start_date, end_date, camera_id, category),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=firesight_report.csv"},
     )
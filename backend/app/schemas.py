@@ -3,9 +3,9 @@ FireSight — Pydantic Request/Response Schemas
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
-from app.models import Severity, IncidentStatus, DetectionCategory, AlertType
+from app.models import Severity, IncidentStatus, DetectionCategory, AlertType, JobStatus
 
 
 # --- Camera Schemas ---
@@ -61,6 +61,10 @@ class IncidentResponse(BaseModel):
     detected_at: datetime
     reviewed_by: Optional[str]
     notes: str
+    track_key: Optional[str] = None
+    frame_count: Optional[int] = None
+    last_seen_at: Optional[datetime] = None
+    ended_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -88,7 +92,7 @@ class DetectionResult(BaseModel):
     category: str
     confidence: float
     bbox: List[float]
-    track_id: Optional[str] = None
+    track_id: Optional[int] = None
     severity: Severity = Severity.LOW
 
 
@@ -99,6 +103,47 @@ class DetectionFrame(BaseModel):
     frame_base64: Optional[str] = None
 
 
+class AnalysisJobResponse(BaseModel):
+    id: int
+    original_filename: str
+    content_hash: Optional[str]
+    file_size: int
+    categories: Optional[List[str]]
+    status: JobStatus
+    frames_done: int
+    frames_total: int
+    detections_count: int
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+
+class AnalysisDetectionResponse(BaseModel):
+    id: int
+    frame: int
+    timestamp: float
+    category: str
+    severity: str
+    confidence: float
+    bbox: List[float]
+    track_id: Optional[int]
+    class_name: Optional[str]
+    description: Optional[str]
+
+    class Config:
+        from_attributes = True
+
+
+class AnalysisResultsPage(BaseModel):
+    job_id: int
+    results: List[AnalysisDetectionResponse]
+    next_after_id: Optional[int]
+
+
 # --- Alert Schemas ---
 
 class AlertRuleCreate(BaseModel):
@@ -143,3 +188,12 @@ class CameraAISettings(BaseModel):
     enabled_categories: List[str] = []
     detection_interval: int = 1
     max_detections: int = 100
+    motion_gate: bool = True
+    motion_sensitivity: float = Field(default=0.5, ge=0.0, le=1.0)
+    motion_min_interval: float = Field(default=5.0, gt=0.0)
+    roi_mode: Optional[Literal["off", "crop", "mask"]] = None  # None: ROI_DEFAULT_MODE
+    roi_padding: int = Field(default=32, ge=0)
+    fire_prefilter: bool = True
+    fire_prefilter_interval: Optional[float] = Field(default=None, gt=0.0)  # None: server default
+    target_fps: Optional[float] = Field(default=None, gt=0.0)  # None: LIVE_TARGET_FPS
+    priority: Optional[float] = Field(default=None, gt=0.0)  # None: from detection categories
@@ -0,0 +1,231 @@
+"""
+FireSight — Video Analysis Job Service
+Runs uploaded-video analysis as background jobs on a local worker pool, with
+persistent job records, frame progress, cancellation, and results written to
+the database in batches.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, update, delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import AnalysisJob, AnalysisDetection, JobStatus
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's worker when cancellation was requested."""
+
+
+class AnalysisJobManager:
+    """Queues analysis jobs and runs at most ``max_workers`` at a time."""
+
+    def __init__(self, max_workers: int = None, batch_size: int = None):
+        self.max_workers = max_workers or settings.ANALYSIS_JOB_WORKERS
+        self.batch_size = batch_size or settings.ANALYSIS_RESULT_BATCH_SIZE
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._cancelled: set = set()
+
+    def _slot(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        return self._slots
+
+    async def submit(self, db: AsyncSession, video_path: str, original_filename: str = "",
+                     categories: Optional[List[str]] = None, content_hash: Optional[str] = None,
+                     file_size: int = 0) -> AnalysisJob:
+        """Create a job record, commit it and queue it.
+
+        The commit comes first so the worker always finds the job row.
+
+        If ``content_hash`` matches a live or completed job with the same
+        categories, that job is returned and nothing new is queued.
+        """
+        if content_hash:
+            existing = await self.find_existing(db, content_hash, categories)
+            if existing is not None:
+                logger.info("Upload matches analysis job %s; reusing it", existing.id)
+                return existing
+
+        job = AnalysisJob(
+            video_path=video_path,
+            original_filename=original_filename,
+            content_hash=content_hash,
+            file_size=file_size,
+            categories=categories,
+            status=JobStatus.QUEUED,
+        )
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        self._schedule(job.id)
+        return job
+
+    @staticmethod
+    async def find_existing(db: AsyncSession, content_hash: str,
+                            categories: Optional[List[str]] = None) -> Optional[AnalysisJob]:
+        """Most recent reusable job for identical content and categories."""
+        result = await db.execute(
+            select(AnalysisJob)
+            .where(
+                AnalysisJob.content_hash == content_hash,
+                AnalysisJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING, JobStatus.COMPLETED]),
+            )
+            .order_by(AnalysisJob.id.desc())
+        )
+        wanted = None if categories is None else sorted(set(categories))
+        for job in result.scalars():
+            job_categories = None if job.categories is None else sorted(set(job.categories))
+            if job_categories == wanted:
+                return job
+        return None
+
+    def _schedule(self, job_id: int):
+        task = asyncio.create_task(self._run(job_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def cancel(self, db: AsyncSession, job_id: int) -> Optional[AnalysisJob]:
+        """Request cancellation; queued jobs are cancelled immediately."""
+        result = await db.execute(select(AnalysisJob).where(AnalysisJob.id == job_id))
+        job = result.scalar_one_or_none()
+        if job is None:
+            return None
+        if job.status in (JobStatus.QUEUED, JobStatus.RUNNING):
+            self._cancelled.add(job_id)
+            if job.status == JobStatus.QUEUED:
+                job.status = JobStatus.CANCELLED
+                job.finished_at = datetime.utcnow()
+                await db.flush()
+        return job
+
+    async def resume_pending(self):
+        """Re-queue jobs left queued or running by a previous process."""
+        from app.database import async_session
+
+        async with async_session() as db:
+            result = await db.execute(
+                select(AnalysisJob.id).where(AnalysisJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]))
+            )
+            job_ids = result.scalars().all()
+            if job_ids:
+                # Partial results from an interrupted run are discarded and redone
+                await db.execute(delete(AnalysisDetection).where(AnalysisDetection.job_id.in_(job_ids)))
+                await db.execute(
+                    update(AnalysisJob).where(AnalysisJob.id.in_(job_ids))
+                    .values(status=JobStatus.QUEUED, frames_done=0, detections_count=0)
+                )
+                await db.commit()
+
+        for job_id in job_ids:
+            self._schedule(job_id)
+        if job_ids:
+            logger.info("Resumed %d analysis job(s)", len(job_ids))
+
+    async def _run(self, job_id: int):
+        from app.database import async_session
+
+        async with self._slot():
+            async with async_session() as db:
+                job = await self._claim(db, job_id)
+                if job is None:
+                    self._cancelled.discard(job_id)
+                    return
+                try:
+                    await self._analyse(db, job)
+                    job.status = JobStatus.COMPLETED
+                except JobCancelled:
+                    await db.rollback()
+                    job = await db.get(AnalysisJob, job_id)
+                    job.status = JobStatus.CANCELLED
+                except Exception as e:
+                    logger.error("Analysis job %s failed: %s", job_id, e)
+                    await db.rollback()
+                    job = await db.get(AnalysisJob, job_id)
+                    job.status = JobStatus.FAILED
+                    job.error = str(e)
+                finally:
+                    self._cancelled.discard(job_id)
+                job.finished_at = datetime.utcnow()
+                await db.commit()
+
+    async def _claim(self, db: AsyncSession, job_id: int) -> Optional[AnalysisJob]:
+        """Mark a queued job running; returns None if it's gone or was cancelled."""
+        job = await db.get(AnalysisJob, job_id)
+        if job is None:
+            logger.warning("Analysis job %s not found", job_id)
+            return None
+        if job.status != JobStatus.QUEUED or job_id in self._cancelled:
+            return None
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        await db.commit()
+        return job
+
+    async def _analyse(self, db: AsyncSession, job: AnalysisJob):
+        from app.detection.engine import DetectionEngine, probe_video
+        from app.detection.executor import inference_executor
+
+        info = await inference_executor.run(probe_video, job.video_path)
+        job.frames_total = info["frame_count"]
+        await db.commit()
+
+        engine = DetectionEngine()
+        buffer = []
+        last_flush = time.monotonic()
+        async for frame_number, timestamp, detections in engine.iter_video_analysis(
+            job.video_path, job.categories, info=info, content_hash=job.content_hash,
+        ):
+            if job.id in self._cancelled:
+                raise JobCancelled()
+
+            for det in detections:
+                buffer.append({
+                    "job_id": job.id,
+                    "frame": frame_number,
+                    "timestamp": timestamp,
+                    "category": det["category"],
+                    "severity": det.get("severity", "low"),
+                    "confidence": det.get("confidence", 0.0),
+                    "bbox": det.get("bbox", []),
+                    "track_id": det.get("track_id"),
+                    "class_name": det.get("class_name"),
+                    "description": det.get("description"),
+                })
+
+            job.frames_done = frame_number
+            # Flush on batch size, or periodically so progress stays visible
+            if len(buffer) >= self.batch_size or time.monotonic() - last_flush >= 2.0:
+                await self._flush(db, job, buffer)
+                buffer = []
+                last_flush = time.monotonic()
+
+        await self._flush(db, job, buffer)
+        job.frames_done = max(job.frames_done, job.frames_total)
+        await db.commit()
+
+    @staticmethod
+    async def _flush(db: AsyncSession, job: AnalysisJob, rows: List[Dict]):
+        """Write a batch of results and the job's progress in one transaction."""
+        if rows:
+            await db.execute(insert(AnalysisDetection), rows)
+            job.detections_count += len(rows)
+        await db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_workers": self.max_workers,
+            "active_or_queued": len(self._tasks),
+        }
+
+
+# Global job manager shared by the API in this process
+job_manager = AnalysisJobManager()
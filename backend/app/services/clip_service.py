@@ -3,27 +3,79 @@ FireSight — Clip Service
 Saves incident clips and thumbnails from video streams.
 """
 
+import asyncio
 import cv2
+import hashlib
 import os
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Any
 from fastapi import UploadFile
 
 from app.config import settings
 
 
-async def save_upload(file: UploadFile) -> str:
-    """Save an uploaded video file and return the path."""
-    os.makedirs(settings.CLIP_STORAGE_PATH, exist_ok=True)
-    filename = f"{uuid.uuid4().hex}_{file.filename}"
-    path = os.path.join(settings.CLIP_STORAGE_PATH, filename)
-
-    with open(path, "wb") as f:
-        content = await file.read()
-        f.write(content)
-
-    return path
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds MAX_UPLOAD_BYTES."""
+
+
+def upload_path_for(sha256: str, extension: str) -> str:
+    """Content-addressed location for an upload: <root>/<ab>/<sha256><ext>."""
+    return os.path.join(settings.UPLOAD_STORAGE_PATH, sha256[:2], f"{sha256}{extension.lower()}")
+
+
+def _write_chunk(f, hasher, chunk: bytes):
+    hasher.update(chunk)
+    f.write(chunk)
+
+
+async def save_upload(file: UploadFile) -> Dict[str, Any]:
+    """Stream an uploaded video to content-addressed storage.
+
+    The file is read in chunks and hashed (SHA-256) while it is written to a
+    temporary file off the event loop, so memory use stays flat regardless of
+    size. If identical content is already stored the temporary copy is
+    discarded and the existing path returned.
+    """
+    os.makedirs(settings.UPLOAD_STORAGE_PATH, exist_ok=True)
+    extension = os.path.splitext(file.filename or "")[1]
+    tmp_path = os.path.join(settings.UPLOAD_STORAGE_PATH, f".incoming_{uuid.uuid4().hex}{extension}")
+
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        f = await asyncio.to_thread(open, tmp_path, "wb")
+        try:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > settings.MAX_UPLOAD_BYTES:
+                    raise UploadTooLarge(
+                        f"Upload exceeds the {settings.MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit"
+                    )
+                await asyncio.to_thread(_write_chunk, f, hasher, chunk)
+        finally:
+            await asyncio.to_thread(f.close)
+
+        sha256 = hasher.hexdigest()
+        path = upload_path_for(sha256, extension)
+        existing = os.path.exists(path)
+        if existing:
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return {"path": path, "sha256": sha256, "size": size, "existing": existing}
 
 
 def save_thumbnail(frame, incident_id: int) -> str:
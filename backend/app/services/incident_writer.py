@@ -0,0 +1,563 @@
+"""
+FireSight — Live Incident Writer
+Write-behind buffer for incidents raised by live camera pipelines. Tracked
+detections are aggregated into one incident per track (opened when the track
+first matches, updated in memory, closed when the track ends); new rows and
+updates are flushed in batches on a size or time trigger. Cameras are held
+back when the database falls behind, and batches are spilled to a local
+append-only file while it is unreachable and replayed once it is back.
+"""
+
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterable, List, Optional
+
+from sqlalchemy import insert, update, bindparam
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.config import settings
+from app.models import Incident, IncidentStatus, Severity
+from app.services.rollup_service import apply_increments, rollup_increments, summary_cache
+
+logger = logging.getLogger(__name__)
+
+_incidents = Incident.__table__
+
+# Errors caused by the rows themselves: retrying the same batch can never succeed
+_REJECTED_ERRORS = (IntegrityError, DataError)
+
+# Columns the hourly rollup and summary cache need from each inserted row
+_ROLLUP_COLUMNS = (_incidents.c.detected_at, _incidents.c.camera_id, _incidents.c.category, _incidents.c.severity)
+
+# Executed once per batch with a parameter set per incident
+_UPDATE_BY_TRACK_KEY = (
+    update(_incidents)
+    .where(_incidents.c.track_key == bindparam("key"))
+    .values(
+        confidence=bindparam("u_confidence"),
+        bbox_data=bindparam("u_bbox_data", type_=_incidents.c.bbox_data.type),
+        frame_count=bindparam("u_frame_count"),
+        last_seen_at=bindparam("u_last_seen_at", type_=_incidents.c.last_seen_at.type),
+        ended_at=bindparam("u_ended_at", type_=_incidents.c.ended_at.type),
+    )
+)
+
+
+def track_key(camera_id: int, session_id: Optional[int], category: str, track_id: int) -> str:
+    """Identity of a track's incident (track ids restart with every detection session)."""
+    return f"{camera_id}:{session_id or 0}:{category}:{track_id}"
+
+
+def incident_row(camera_id: int, det: Dict[str, Any], detected_at: datetime,
+                 key: Optional[str] = None) -> Dict[str, Any]:
+    """JSON-safe incident row for one detection (the form buffered and spilled)."""
+    seen = detected_at.isoformat()
+    return {
+        "camera_id": camera_id,
+        "category": det["category"],
+        "severity": det.get("severity", "low"),
+        "confidence": float(det.get("confidence", 0.0)),
+        "description": det.get("description") or f"{det.get('class_name') or det['category']} detected",
+        "bbox_data": {
+            "bbox": det.get("bbox", []),
+            "class_name": det.get("class_name"),
+            "track_id": det.get("track_id"),
+        },
+        "detected_at": seen,
+        "track_key": key,
+        "frame_count": 1,
+        "last_seen_at": seen,
+        # Untracked detections are single-frame incidents
+        "ended_at": None if key else seen,
+    }
+
+
+def _insert_statement(dialect: str):
+    """Multi-row incident insert that skips track keys already written.
+
+    Replaying a spill file after a crash (or after a partially committed
+    replay) hits rows that are already there; on PostgreSQL and SQLite
+    they are skipped and RETURNING reports the rows actually inserted.
+    """
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    return (
+        dialect_insert(_incidents)
+        .on_conflict_do_nothing(index_elements=["track_key"])
+        .returning(*_ROLLUP_COLUMNS)
+    )
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _insert_values(row: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        severity = Severity(row["severity"])
+    except ValueError:
+        severity = Severity.LOW
+    return {
+        **row,
+        "severity": severity,
+        "status": IncidentStatus.NEW,
+        "detected_at": _parse_time(row["detected_at"]),
+        "last_seen_at": _parse_time(row["last_seen_at"]),
+        "ended_at": _parse_time(row["ended_at"]),
+    }
+
+
+def _update_values(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "key": row["track_key"],
+        "u_confidence": row["confidence"],
+        "u_bbox_data": row["bbox_data"],
+        "u_frame_count": row["frame_count"],
+        "u_last_seen_at": _parse_time(row["last_seen_at"]),
+        "u_ended_at": _parse_time(row["ended_at"]),
+    }
+
+
+class _OpenIncident:
+    """In-memory state of a track's incident between flushes."""
+
+    __slots__ = ("camera_id", "track_id", "row", "dirty", "last_seen")
+
+    def __init__(self, camera_id: int, track_id: int, row: Dict[str, Any]):
+        self.camera_id = camera_id
+        self.track_id = track_id
+        self.row = row
+        self.dirty = False
+        self.last_seen = time.monotonic()
+
+    def observe(self, det: Dict[str, Any], seen: str):
+        row = self.row
+        row["frame_count"] += 1
+        row["last_seen_at"] = seen
+        confidence = float(det.get("confidence", 0.0))
+        if confidence > row["confidence"]:
+            # Keep the box from the most confident frame
+            row["confidence"] = confidence
+            row["bbox_data"] = {**row["bbox_data"], "bbox": det.get("bbox", [])}
+        self.dirty = True
+        self.last_seen = time.monotonic()
+
+    def close(self):
+        self.row["ended_at"] = self.row["last_seen_at"]
+        self.dirty = True
+
+    def reopen(self):
+        self.row["ended_at"] = None
+        self.dirty = True
+
+
+class IncidentWriter:
+    """Aggregates live incidents per track and writes them in batches.
+
+    ``submit`` only touches memory: a detection on a new track opens an
+    incident (queued as an insert in the camera's buffer), later frames of the
+    same track update its peak confidence, box, frame count and last-seen
+    time, and retired tracks are closed. Incidents idle for ``idle_seconds``
+    are closed too, but remembered until the tracker retires the track: if
+    it is seen again the same row is reopened. A background task writes queued
+    inserts plus one update per changed incident in a single transaction when
+    ``batch_size`` inserts are pending or ``flush_interval`` has passed.
+
+    A camera whose insert buffer reaches ``max_pending`` waits for the
+    in-flight flush (backpressure); if that takes longer than
+    ``backpressure_timeout`` its rows go to the spill file instead of
+    stalling the stream. Failed flushes are spilled too, and spilled batches
+    are replayed (in order, before new writes) once the database is back.
+    Replayed inserts skip track keys that are already written, so a replay
+    interrupted by a crash can run again; a chunk the database rejects
+    outright is moved to a ``.rejected.jsonl`` file instead of blocking the
+    queue.
+    """
+
+    SPILL_FILE = "incidents.jsonl"
+
+    def __init__(self, batch_size: int = None, flush_interval: float = None, max_pending: int = None,
+                 backpressure_timeout: float = None, spill_path: str = None, idle_seconds: float = None,
+                 retry_interval: float = 5.0):
+        self.batch_size = batch_size or settings.INCIDENT_WRITER_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.INCIDENT_WRITER_FLUSH_INTERVAL
+        self.max_pending = max_pending or settings.INCIDENT_WRITER_MAX_PENDING_PER_CAMERA
+        self.backpressure_timeout = (
+            settings.INCIDENT_WRITER_BACKPRESSURE_TIMEOUT if backpressure_timeout is None else backpressure_timeout
+        )
+        self.spill_path = spill_path or settings.INCIDENT_SPILL_PATH
+        self.idle_seconds = idle_seconds or settings.INCIDENT_TRACK_IDLE_SECONDS
+        self.retry_interval = retry_interval
+
+        self._buffers: Dict[int, List[Dict[str, Any]]] = {}  # camera -> rows to insert
+        self._pending = 0
+        self._open: Dict[str, _OpenIncident] = {}
+        self._idle: Dict[str, _OpenIncident] = {}  # closed for inactivity, track still alive
+        self._closed: List[_OpenIncident] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Condition] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.db_available = True
+        self._last_failure = 0.0
+        self.detections = 0
+        self.written = 0
+        self.updated = 0
+        self.flushes = 0
+        self.flush_seconds = 0.0
+        self.failed_flushes = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.rejected = 0
+        self.backpressure_waits = 0
+
+    # --- Lifecycle ----------------------------------------------------
+
+    def start(self):
+        """Start the background flush task (idempotent)."""
+        if self._task is not None and not self._task.done():
+            return
+        self._wake = asyncio.Event()
+        self._space = asyncio.Condition()
+        self._flush_lock = asyncio.Lock()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop the flush task, close open incidents and write (or spill) what is left."""
+        if self._task is None:
+            return
+        # Let the task finish a flush in progress instead of cancelling it mid-write
+        self._stopping = True
+        self._wake.set()
+        await self._task
+        self._task = None
+        for camera_id in {incident.camera_id for incident in self._open.values()}:
+            self.close_camera(camera_id)
+        await self.flush()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._stopping:
+                return
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Incident flush failed: %s", e)
+
+    # --- Producers ----------------------------------------------------
+
+    async def submit(self, camera_id: int, detections: List[Dict[str, Any]], detected_at: datetime = None,
+                     session_id: Optional[int] = None, ended_tracks: Iterable[int] = ()) -> int:
+        """Fold one frame's detections into incidents; returns the number of new incidents.
+
+        ``ended_tracks`` are track ids the tracker retired on this frame;
+        their incidents are closed.
+        """
+        ended_tracks = list(ended_tracks)
+        if not detections and not ended_tracks:
+            return 0
+        self.start()
+        detected_at = detected_at or datetime.now(timezone.utc)
+        seen = detected_at.isoformat()
+        self.detections += len(detections)
+
+        rows = []
+        for det in detections:
+            track_id = det.get("track_id")
+            if track_id is None:
+                rows.append(incident_row(camera_id, det, detected_at))
+                continue
+            key = track_key(camera_id, session_id, det["category"], track_id)
+            incident = self._open.get(key)
+            if incident is None and key in self._idle:
+                # The track outlived the idle timeout: reopen its row rather than insert a duplicate key
+                incident = self._idle.pop(key)
+                incident.reopen()
+                self._open[key] = incident
+            if incident is None:
+                row = incident_row(camera_id, det, detected_at, key)
+                self._open[key] = _OpenIncident(camera_id, track_id, row)
+                rows.append(row)
+            else:
+                incident.observe(det, seen)
+
+        if ended_tracks:
+            ended = set(ended_tracks)
+            retired = lambda i: i.camera_id == camera_id and i.track_id in ended
+            self._close_where(retired)
+            self._forget_idle(retired)
+        if not rows:
+            return 0
+
+        if len(self._buffers.get(camera_id, ())) >= self.max_pending:
+            self.backpressure_waits += 1
+            self._wake.set()
+            try:
+                await asyncio.wait_for(self._wait_for_space(camera_id), self.backpressure_timeout)
+            except asyncio.TimeoutError:
+                # The database isn't keeping up: park the rows on disk rather than stall the camera
+                await asyncio.to_thread(self._spill, rows, [])
+                return len(rows)
+
+        self._buffers.setdefault(camera_id, []).extend(rows)
+        self._pending += len(rows)
+        if self._pending >= self.batch_size:
+            self._wake.set()
+        return len(rows)
+
+    def close_camera(self, camera_id: int):
+        """Close every open incident of a camera (its pipeline stopped)."""
+        self._close_where(lambda i: i.camera_id == camera_id)
+        self._forget_idle(lambda i: i.camera_id == camera_id)
+
+    def _close_where(self, predicate, idle: bool = False):
+        keys = [key for key, incident in self._open.items() if predicate(incident)]
+        for key in keys:
+            incident = self._open.pop(key)
+            incident.close()
+            self._closed.append(incident)
+            if idle:
+                self._idle[key] = incident
+
+    def _forget_idle(self, predicate):
+        for key in [key for key, incident in self._idle.items() if predicate(incident)]:
+            del self._idle[key]
+
+    async def _wait_for_space(self, camera_id: int):
+        async with self._space:
+            await self._space.wait_for(lambda: len(self._buffers.get(camera_id, ())) < self.max_pending)
+
+    # --- Flushing -----------------------------------------------------
+
+    def _db_ready(self) -> bool:
+        return self.db_available or time.monotonic() - self._last_failure >= self.retry_interval
+
+    async def flush(self):
+        """Write queued inserts and incident updates now (after any spilled backlog)."""
+        if self._flush_lock is None:
+            self.start()
+        async with self._flush_lock:
+            idle_before = time.monotonic() - self.idle_seconds
+            self._close_where(lambda i: i.last_seen < idle_before, idle=True)
+
+            buffers, self._buffers, self._pending = self._buffers, {}, 0
+            inserts = [row for camera_rows in buffers.values() for row in camera_rows]
+            # A reopened incident can be both closed and open since the last flush
+            changed = {id(i): i for i in self._closed}
+            changed.update((id(i), i) for i in self._open.values() if i.dirty)
+            self._closed = []
+            updates = []
+            for incident in changed.values():
+                incident.dirty = False
+                updates.append(dict(incident.row))
+
+            # Spilled rows go first so a track's insert always lands before its updates
+            try:
+                if self._spill_files() and self._db_ready():
+                    await self._replay()
+            except BaseException:
+                # Cancelled or failed before this batch was written: keep it on disk
+                self._spill(inserts, updates)
+                raise
+            if inserts or updates:
+                await self._write(inserts, updates)
+        async with self._space:
+            self._space.notify_all()
+
+    async def _write(self, inserts: List[Dict[str, Any]], updates: List[Dict[str, Any]],
+                     spill_on_failure: bool = True) -> bool:
+        """Insert new rows (one multi-row statement), bump the hourly rollup and apply updates in one transaction."""
+        if not self._db_ready() or (spill_on_failure and self._spill_files()):
+            # Down, or a backlog that must be replayed first: keep the order on disk
+            if spill_on_failure:
+                await asyncio.to_thread(self._spill, inserts, updates)
+            return False
+
+        from app.database import async_session
+
+        started = time.monotonic()
+        inserted = []
+        committed = False
+        try:
+            async with async_session() as db:
+                if inserts:
+                    values = [_insert_values(row) for row in inserts]
+                    stmt = _insert_statement(db.get_bind().dialect.name)
+                    if stmt is not None:
+                        inserted = [row._asdict() for row in (await db.execute(stmt, values)).all()]
+                    else:
+                        await db.execute(insert(Incident), values)
+                        inserted = values
+                    # Dashboard rollup moves in the same transaction as the incidents
+                    await apply_increments(db, rollup_increments(inserted))
+                if updates:
+                    await db.execute(_UPDATE_BY_TRACK_KEY, [_update_values(row) for row in updates])
+                await db.commit()
+                committed = True
+            if inserted:
+                summary_cache.invalidate(inserted)
+        except _REJECTED_ERRORS as e:
+            if not spill_on_failure:
+                # Replay sets the chunk aside; the database itself is fine
+                raise
+            logger.error("Incident batch rejected by the database, spilling to %s: %s", self.spill_path, e)
+            self.failed_flushes += 1
+            await asyncio.to_thread(self._spill, inserts, updates)
+            return False
+        except Exception as e:
+            if self.db_available:
+                logger.warning("Incident write failed, spilling to %s: %s", self.spill_path, e)
+            self.db_available = False
+            self._last_failure = time.monotonic()
+            self.failed_flushes += 1
+            if spill_on_failure:
+                await asyncio.to_thread(self._spill, inserts, updates)
+            return False
+        except BaseException:
+            # Cancelled mid-write: the batch is already out of the buffers, so keep it on disk
+            if spill_on_failure and not committed:
+                self._spill(inserts, updates)
+            raise
+
+        if not self.db_available:
+            logger.info("Database reachable again; replaying spilled incidents")
+        self.db_available = True
+        self.written += len(inserts)
+        self.updated += len(updates)
+        self.flushes += 1
+        self.flush_seconds += time.monotonic() - started
+        return True
+
+    # --- Spill file ---------------------------------------------------
+
+    def _spill(self, inserts: List[Dict[str, Any]], updates: List[Dict[str, Any]]):
+        entries = [{"op": "insert", "row": row} for row in inserts] + [{"op": "update", "row": row} for row in updates]
+        if not entries:
+            return
+        os.makedirs(self.spill_path, exist_ok=True)
+        with open(os.path.join(self.spill_path, self.SPILL_FILE), "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+            f.flush()
+            os.fsync(f.fileno())
+        self.spilled += len(entries)
+
+    def _spill_files(self) -> List[str]:
+        """Spilled batches waiting for replay, oldest first."""
+        files = sorted(glob.glob(os.path.join(self.spill_path, "incidents.*.replay.jsonl")))
+        live = os.path.join(self.spill_path, self.SPILL_FILE)
+        if os.path.exists(live):
+            files.append(live)
+        return files
+
+    @staticmethod
+    def _read_chunk(f, size: int) -> List[Dict[str, Any]]:
+        entries = []
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning("Skipping a truncated line in the incident spill file")
+            if len(entries) >= size:
+                break
+        return entries
+
+    async def _replay(self):
+        """Write spilled entries in batches; stops (keeping the rest) if the database fails again."""
+        for path in self._spill_files():
+            if path.endswith(self.SPILL_FILE):
+                # Freeze the live file so new spills start a fresh one
+                frozen = os.path.join(self.spill_path, f"incidents.{time.time_ns()}.replay.jsonl")
+                os.replace(path, frozen)
+                path = frozen
+
+            f = await asyncio.to_thread(open, path, "r", encoding="utf-8")
+            try:
+                while True:
+                    entries = await asyncio.to_thread(self._read_chunk, f, self.batch_size)
+                    if not entries:
+                        break
+                    # File order puts a track's insert before its updates, chunk by chunk
+                    inserts = [e["row"] for e in entries if e["op"] == "insert"]
+                    updates = [e["row"] for e in entries if e["op"] == "update"]
+                    try:
+                        written = await self._write(inserts, updates, spill_on_failure=False)
+                    except _REJECTED_ERRORS as e:
+                        # Retrying would fail forever and hold back every later write
+                        rejected = await asyncio.to_thread(self._set_aside, entries)
+                        logger.error("Spilled incidents rejected by the database, moved to %s: %s", rejected, e)
+                        self.rejected += len(entries)
+                        continue
+                    if not written:
+                        # Keep this chunk and everything after it for the next attempt
+                        rest = entries + await asyncio.to_thread(self._read_chunk, f, float("inf"))
+                        await asyncio.to_thread(self._rewrite, path, rest)
+                        return
+                    self.replayed += len(entries)
+            finally:
+                f.close()
+            os.remove(path)
+            logger.info("Replayed spilled incidents from %s", os.path.basename(path))
+
+    def _set_aside(self, entries: List[Dict[str, Any]]) -> str:
+        """Move entries the database refuses to a file that is never replayed."""
+        path = os.path.join(self.spill_path, f"incidents.{time.time_ns()}.rejected.jsonl")
+        self._rewrite(path, entries)
+        return path
+
+    @staticmethod
+    def _rewrite(path: str, entries: List[Dict[str, Any]]):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    # --- Metrics ------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        spill_bytes = 0
+        for path in self._spill_files():
+            try:
+                spill_bytes += os.path.getsize(path)
+            except OSError:
+                pass
+        return {
+            "db_available": self.db_available,
+            "open_incidents": len(self._open),
+            "idle_incidents": len(self._idle),
+            "pending": self._pending,
+            "pending_by_camera": {cid: len(rows) for cid, rows in self._buffers.items() if rows},
+            "detections": self.detections,
+            "written": self.written,
+            "updated": self.updated,
+            "flushes": self.flushes,
+            "mean_flush_ms": round(self.flush_seconds / self.flushes * 1000.0, 2) if self.flushes else 0.0,
+            "failed_flushes": self.failed_flushes,
+            "backpressure_waits": self.backpressure_waits,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "rejected": self.rejected,
+            "spill_bytes": spill_bytes,
+        }
+
+
+# Global writer shared by every live pipeline in this process
+incident_writer = IncidentWriter()
@@ -6,50 +6,57 @@ Generates PDF and CSV reports with branded formatting.
 import io
 import csv
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import AsyncIterator, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 
 from app.models import Incident
 
 
 async def generate_summary(db: AsyncSession, start_date=None, end_date=None, camera_id=None, category=None):
-    """Generate report summary statistics."""
-    query = select(Incident)
-    if start_date:
-        query = query.where(Incident.detected_at >= start_date)
-    if end_date:
-        query = query.where(Incident.detected_at <= end_date)
-    if camera_id:
-        query = query.where(Incident.camera_id == camera_id)
-    if category:
-        query = query.where(Incident.category == category)
-
-    result = await db.execute(query)
-    incidents = result.scalars().all()
-
-    by_category = {}
-    by_severity = {}
-    by_camera = {}
-    for inc in incidents:
-        by_category[inc.category] = by_category.get(inc.category, 0) + 1
-        by_severity[str(inc.severity)] = by_severity.get(str(inc.severity), 0) + 1
-        cam_key = str(inc.camera_id)
-        by_camera[cam_key] = by_camera.get(cam_key, 0) + 1
-
-    return {
-        "total_incidents": len(incidents),
+    """Generate report summary statistics (cached per filter set until new incidents land in the window)."""
+    from app.services.rollup_service import summary_cache, summary_counts
+
+    key = summary_cache.key(start_date, end_date, camera_id, category)
+    cached = summary_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # Taken before querying: a write invalidated while the query runs voids this result
+    generation = summary_cache.generation
+    counts = await summary_counts(db, start_date, end_date, camera_id, category)
+    summary = {
+        "total_incidents": counts["total"],
         "period_start": start_date or "all",
         "period_end": end_date or "all",
-        "by_category": by_category,
-        "by_severity": by_severity,
-        "by_camera": by_camera,
+        "by_category": dict(counts["by_category"]),
+        "by_severity": {str(k): v for k, v in counts["by_severity"].items()},
+        "by_camera": {str(k): v for k, v in counts["by_camera"].items()},
     }
+    summary_cache.put(key, summary, generation)
+    return summary
+
+
+CSV_HEADER = ["ID", "Camera", "Category", "Severity", "Status", "Confidence", "Detected At", "Description"]
+
+# Rows fetched per round trip from the server-side cursor, and per CSV chunk sent
+CSV_CHUNK_ROWS = 2000
+
 
+async def stream_csv(start_date=None, end_date=None, camera_id=None, category=None) -> AsyncIterator[str]:
+    """Yield a CSV report of incidents in chunks, in constant memory.
 
-async def generate_csv(db: AsyncSession, start_date=None, end_date=None, camera_id=None, category=None) -> str:
-    """Generate CSV report of incidents."""
-    query = select(Incident).order_by(Incident.detected_at.desc())
+    Rows come from a server-side cursor, only the exported columns are
+    selected, and each chunk is handed to the response as soon as it is
+    written. The generator opens its own session: a streaming response is
+    consumed after the request's session has been closed.
+    """
+    from app.database import async_session
+
+    query = select(
+        Incident.id, Incident.camera_id, Incident.category, Incident.severity, Incident.status,
+        Incident.confidence, Incident.detected_at, Incident.description,
+    ).order_by(Incident.detected_at.desc())
     if start_date:
         query = query.where(Incident.detected_at >= start_date)
     if end_date:
@@ -59,20 +66,21 @@ async def generate_csv(db: AsyncSession, start_date=None, end_date=None, camera_
     if category:
         query = query.where(Incident.category == category)
 
-    result = await db.execute(query)
-    incidents = result.scalars().all()
-
     output = io.StringIO()
     writer = csv.writer(output)
-    writer.writerow(["ID", "Camera", "Category", "Severity", "Status", "Confidence", "Detected At", "Description"])
-
-    for inc in incidents:
-        writer.writerow([
-            inc.id, inc.camera_id, inc.category, str(inc.severity),
-            str(inc.status), f"{inc.confidence:.2f}", str(inc.detected_at), inc.description,
-        ])
-
-    return output.getvalue()
+    writer.writerow(CSV_HEADER)
+    yield output.getvalue()
+
+    async with async_session() as db:
+        result = await db.stream(query.execution_options(yield_per=CSV_CHUNK_ROWS))
+        async for rows in result.partitions():
+            output.seek(0)
+            output.truncate()
+            writer.writerows(
+                [inc_id, cam_id, cat, str(severity), str(status), f"{confidence or 0.0:.2f}", str(detected_at), description]
+                for inc_id, cam_id, cat, severity, status, confidence, detected_at, description in rows
+            )
+            yield output.getvalue()
 
 
 async def generate_pdf(db: AsyncSession, start_date=None, end_date=None, camera_id=None, category=None) -> bytes:
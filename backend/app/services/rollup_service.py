@@ -0,0 +1,345 @@
+"""
+FireSight — Incident Rollup Service
+Hourly incident counts per camera, category and severity. The incident writer
+increments them in the same transaction as the incidents it inserts, so the
+dashboard, hourly chart and report summaries aggregate a small table instead
+of scanning ``incidents``. Report summaries are cached per filter set until
+an incident is written inside their window.
+"""
+
+import bisect
+import logging
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, func, delete, insert, update, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Incident, IncidentHourly
+
+logger = logging.getLogger(__name__)
+
+_KEY = ("hour", "camera_id", "category", "severity")
+
+
+def hour_floor(dt: datetime) -> datetime:
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def hour_ceil(dt: datetime) -> datetime:
+    floor = hour_floor(dt)
+    return floor if floor == dt else floor + timedelta(hours=1)
+
+
+def _utc_naive(dt: datetime) -> datetime:
+    return dt.astimezone(timezone.utc).replace(tzinfo=None) if dt.tzinfo else dt
+
+
+# --- Maintenance ------------------------------------------------------
+
+def rollup_increments(rows: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per-bucket counts for incident insert values, in key order (a stable lock order)."""
+    counts = Counter(
+        (hour_floor(row["detected_at"]), row["camera_id"], row["category"], row["severity"])
+        for row in rows if row.get("detected_at") is not None
+    )
+    return [dict(zip(_KEY, key), count=n) for key, n in sorted(counts.items(), key=lambda kv: repr(kv[0]))]
+
+
+def _upsert_insert(dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert
+
+
+async def apply_increments(db: AsyncSession, increments: List[Dict[str, Any]]):
+    """Add counts to their hourly buckets (call inside the transaction that inserts the incidents)."""
+    if not increments:
+        return
+    dialect_insert = _upsert_insert(db.get_bind().dialect.name)
+    if dialect_insert is not None:
+        stmt = dialect_insert(IncidentHourly)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(_KEY), set_={"count": IncidentHourly.count + stmt.excluded.count},
+        )
+        await db.execute(stmt, increments)
+        return
+
+    # Dialects without ON CONFLICT: update, then insert the buckets that didn't exist
+    for inc in increments:
+        result = await db.execute(
+            update(IncidentHourly)
+            .where(*(getattr(IncidentHourly, k) == inc[k] for k in _KEY))
+            .values(count=IncidentHourly.count + inc["count"])
+        )
+        if result.rowcount == 0:
+            await db.execute(insert(IncidentHourly).values(**inc))
+
+
+async def rebuild(db: AsyncSession):
+    """Recompute every bucket from ``incidents`` (backfill, or repair after manual edits)."""
+    await db.execute(delete(IncidentHourly))
+    if db.get_bind().dialect.name == "postgresql":
+        hour = func.date_trunc("hour", Incident.detected_at)
+        source = (
+            select(hour, Incident.camera_id, Incident.category, Incident.severity, func.count(Incident.id))
+            .where(Incident.detected_at.is_not(None))
+            .group_by(hour, Incident.camera_id, Incident.category, Incident.severity)
+        )
+        await db.execute(insert(IncidentHourly).from_select(list(_KEY) + ["count"], source))
+    else:
+        rows = await db.stream(select(Incident.detected_at, Incident.camera_id, Incident.category, Incident.severity))
+        counts = Counter()
+        async for detected_at, camera_id, category, severity in rows:
+            if detected_at is not None:
+                counts[(hour_floor(detected_at), camera_id, category, severity)] += 1
+        if counts:
+            await db.execute(insert(IncidentHourly), [dict(zip(_KEY, k), count=n) for k, n in counts.items()])
+    await db.commit()
+    summary_cache.clear()
+
+
+async def drift(db: AsyncSession) -> Tuple[int, int]:
+    """(incidents, incidents counted by the rollup); they differ if the rollup missed writes."""
+    incidents = (await db.execute(
+        select(func.count(Incident.id)).where(Incident.detected_at.is_not(None))
+    )).scalar() or 0
+    counted = (await db.execute(select(func.coalesce(func.sum(IncidentHourly.count), 0)))).scalar() or 0
+    return int(incidents), int(counted)
+
+
+async def rebuild_if_stale():
+    """Rebuild the rollup at startup if its total no longer matches ``incidents``.
+
+    Covers a first start against a database that predates the rollup, and
+    incidents inserted or deleted outside the incident writer.
+    """
+    from app.database import async_session
+
+    async with async_session() as db:
+        incidents, counted = await drift(db)
+        if incidents == counted:
+            return
+        logger.info("Hourly incident rollup counts %d of %d incidents; rebuilding", counted, incidents)
+        await rebuild(db)
+
+
+# --- Queries ----------------------------------------------------------
+
+def _split_range(start: Optional[datetime], end: Optional[datetime]):
+    """Split [start, end] into whole hours (rollup) and partial-hour edges (raw incidents).
+
+    Returns ((hour_from, hour_to) or None, [(from, to, to_inclusive), ...]).
+    """
+    hours_from = hour_ceil(start) if start else None
+    hours_to = hour_floor(end) if end else None
+    if hours_from and hours_to and hours_from >= hours_to:
+        return None, [(start, end, True)]
+
+    edges = []
+    if start and start != hours_from:
+        edges.append((start, hours_from, False))
+    if end:
+        edges.append((hours_to, end, True))
+    return (hours_from, hours_to), edges
+
+
+def _sources(start: Optional[datetime], end: Optional[datetime], camera_id: Optional[int],
+             category: Optional[str]) -> List[Tuple[Any, Any, List[Any]]]:
+    """(table, count expression, conditions) covering [start, end].
+
+    Whole hours come from the rollup; only partial hours at the ends of the
+    range touch ``incidents`` (through its detected_at indexes).
+    """
+    hours, edges = _split_range(start, end)
+    sources = []
+    if hours is not None:
+        conditions = []
+        if hours[0] is not None:
+            conditions.append(IncidentHourly.hour >= hours[0])
+        if hours[1] is not None:
+            conditions.append(IncidentHourly.hour < hours[1])
+        sources.append((IncidentHourly, func.sum(IncidentHourly.count), conditions))
+    for edge_from, edge_to, inclusive in edges:
+        conditions = [
+            Incident.detected_at >= edge_from,
+            Incident.detected_at <= edge_to if inclusive else Incident.detected_at < edge_to,
+        ]
+        sources.append((Incident, func.count(Incident.id), conditions))
+
+    for model, _, conditions in sources:
+        if camera_id:
+            conditions.append(model.camera_id == camera_id)
+        if category:
+            conditions.append(model.category == category)
+    return sources
+
+
+async def counts_by(db: AsyncSession, fields: Sequence[str], start: Optional[datetime] = None,
+                    end: Optional[datetime] = None, camera_id: Optional[int] = None,
+                    category: Optional[str] = None) -> Counter:
+    """Exact incident counts grouped by ``fields`` (camera_id, category, severity) over [start, end]."""
+    totals = Counter()
+    for model, count, conditions in _sources(start, end, camera_id, category):
+        cols = [getattr(model, f) for f in fields]
+        query = select(*cols, count).where(*conditions).group_by(*cols)
+        for row in (await db.execute(query)).all():
+            if row[-1]:
+                totals[tuple(row[:-1])] += int(row[-1])
+    return totals
+
+
+# grouping(camera_id, category, severity) bitmask -> the breakdown that row belongs to
+_GROUPING_SETS = {0b011: "by_camera", 0b101: "by_category", 0b110: "by_severity", 0b111: "total"}
+
+
+async def summary_counts(db: AsyncSession, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                         camera_id: Optional[int] = None, category: Optional[str] = None) -> Dict[str, Any]:
+    """Total plus per-camera, per-category and per-severity counts over [start, end].
+
+    On PostgreSQL each source is one GROUP BY GROUPING SETS query; other
+    dialects group by all three columns and add up the margins here.
+    """
+    summary = {"total": 0, "by_camera": Counter(), "by_category": Counter(), "by_severity": Counter()}
+    grouping_sets = db.get_bind().dialect.name == "postgresql"
+
+    for model, count, conditions in _sources(start, end, camera_id, category):
+        cols = [model.camera_id, model.category, model.severity]
+        if grouping_sets:
+            query = (
+                select(*cols, func.grouping(*cols), count)
+                .where(*conditions)
+                .group_by(func.grouping_sets(*(tuple_(c) for c in cols), tuple_()))
+            )
+            for cam_id, cat, severity, mask, n in (await db.execute(query)).all():
+                target = _GROUPING_SETS[mask]
+                if target == "total":
+                    summary["total"] += int(n or 0)
+                else:
+                    summary[target][{"by_camera": cam_id, "by_category": cat, "by_severity": severity}[target]] += int(n or 0)
+        else:
+            query = select(*cols, count).where(*conditions).group_by(*cols)
+            for cam_id, cat, severity, n in (await db.execute(query)).all():
+                n = int(n or 0)
+                summary["total"] += n
+                summary["by_camera"][cam_id] += n
+                summary["by_category"][cat] += n
+                summary["by_severity"][severity] += n
+    return summary
+
+
+class SummaryCache:
+    """Report summaries keyed by their filters.
+
+    A summary stays cached until an incident is written inside its window
+    (matching its camera and category filters), so closed past periods are
+    answered from memory indefinitely. Windows that reach the present also
+    expire after ``live_ttl`` seconds, covering incidents written by other
+    processes.
+
+    Every invalidation bumps ``generation``. Readers take it before querying
+    and pass it to ``put``, which drops the result if a write was
+    invalidated meanwhile (the query may not have seen it).
+    """
+
+    def __init__(self, max_entries: int = 256, live_ttl: float = 30.0, live_margin: timedelta = timedelta(minutes=5)):
+        self.max_entries = max_entries
+        self.live_ttl = live_ttl
+        self.live_margin = live_margin
+        self._entries: "OrderedDict[tuple, Tuple[Dict[str, Any], Optional[float]]]" = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(start: Optional[datetime], end: Optional[datetime], camera_id: Optional[int],
+            category: Optional[str]) -> tuple:
+        return (
+            _utc_naive(start) if start else None,
+            _utc_naive(end) if end else None,
+            camera_id or None,
+            category or None,
+        )
+
+    def get(self, key: tuple) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        if entry is not None:
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: tuple, summary: Dict[str, Any], generation: Optional[int] = None):
+        if generation is not None and generation != self.generation:
+            return
+        end = key[1]
+        live = end is None or end > datetime.utcnow() - self.live_margin
+        self._entries[key] = (summary, time.monotonic() + self.live_ttl if live else None)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, rows: Sequence[Dict[str, Any]]):
+        """Drop summaries whose window and filters contain any of the newly written incidents."""
+        if not rows:
+            return
+        self.generation += 1
+        if not self._entries:
+            return
+        times: Dict[Tuple[int, str], List[datetime]] = {}
+        for row in rows:
+            if row.get("detected_at") is not None:
+                times.setdefault((row["camera_id"], row["category"]), []).append(_utc_naive(row["detected_at"]))
+        for group in times.values():
+            group.sort()
+
+        stale = []
+        for key in self._entries:
+            start, end, camera_id, category = key
+            for (cam_id, cat), group in times.items():
+                if (camera_id and cam_id != camera_id) or (category and cat != category):
+                    continue
+                i = bisect.bisect_left(group, start) if start else 0
+                if i < len(group) and (end is None or group[i] <= end):
+                    stale.append(key)
+                    break
+        for key in stale:
+            del self._entries[key]
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+
+
+# Global summary cache, invalidated by the incident writer
+summary_cache = SummaryCache()
+
+
+async def hourly_series(db: AsyncSession, hours: int = 24, camera_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Incident counts for each of the last ``hours`` hours (UTC), oldest first, gaps as zero."""
+    current = hour_floor(datetime.utcnow())
+    since = current - timedelta(hours=hours - 1)
+    query = (
+        select(IncidentHourly.hour, func.sum(IncidentHourly.count))
+        .where(IncidentHourly.hour >= since.replace(tzinfo=timezone.utc))
+        .group_by(IncidentHourly.hour)
+    )
+    if camera_id:
+        query = query.where(IncidentHourly.camera_id == camera_id)
+
+    counts = Counter()
+    for hour, count in (await db.execute(query)).all():
+        counts[hour_floor(_utc_naive(hour))] += int(count or 0)
+    return [
+        {"hour": (since + timedelta(hours=i)).isoformat(), "count": counts.get(since + timedelta(hours=i), 0)}
+        for i in range(hours)
+    ]
@@ -7,7 +7,9 @@ import cv2
 import numpy as np
 import asyncio
 import logging
-from typing import Optional, Tuple, Generator, AsyncGenerator
+import threading
+import time
+from typing import Optional, Tuple, Generator, AsyncGenerator, Dict, Any
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -22,7 +24,7 @@ def open_video_stream(source: str, timeout: int = 10) -> Optional[cv2.VideoCaptu
             cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG)
         
         if not cap.isOpened():
-            logger.error(f"Failed to open video source: {source}")
+            logger.error("Failed to open video source: %s", source)
             return None
         
         # Set buffer size to reduce latency for RTSP streams
@@ -30,7 +32,7 @@ def open_video_stream(source: str, timeout: int = 10) -> Optional[cv2.VideoCaptu
         
         return cap
     except Exception as e:
-        logger.error(f"Error opening video source {source}: {e}")
+        logger.error("Error opening video source %s: %s", source, e)
         return None
 
 
@@ -84,6 +86,177 @@ async def async_frame_generator(source: str, target_fps: float = 15.0) -> AsyncG
         cap.release()
 
 
+class LatestFrameReader:
+    """Decodes a stream on its own thread and keeps only the newest frame.
+
+    The single-slot buffer means a slow consumer always gets the most recent
+    frame instead of working through a backlog; every decoded frame that is
+    overwritten before it was taken is counted as dropped.
+    """
+
+    def __init__(self, source: str, reconnect_delay: float = 1.0, max_failures: int = 5):
+        self.source = source
+        self.reconnect_delay = reconnect_delay
+        self.max_failures = max_failures
+
+        self._cap: Optional[cv2.VideoCapture] = None
+        self._lock = threading.Lock()
+        self._frame: Optional[np.ndarray] = None
+        self._seq = 0
+        self._taken_seq = 0
+        self._frame_time = 0.0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event: Optional[asyncio.Event] = None
+
+        self.frames_read = 0
+        self.frames_taken = 0
+        self.frames_dropped = 0
+        self.read_failures = 0
+        self.reconnects = 0
+        self.started_at: Optional[float] = None
+
+    def open(self) -> bool:
+        """Open the stream (blocking; call from a worker thread on the live path)."""
+        self._cap = open_video_stream(self.source)
+        return self._cap is not None
+
+    def start(self) -> bool:
+        """Start the capture thread, opening the stream first if needed.
+
+        Call from the event loop that will await next_frame().
+        """
+        if self._cap is None and not self.open():
+            return False
+        try:
+            self._loop = asyncio.get_running_loop()
+            self._event = asyncio.Event()
+        except RuntimeError:
+            self._loop = None
+        self._running = True
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name=f"capture-{self.source}", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Stop the capture thread and release the stream.
+
+        The capture thread releases the stream itself on its way out, so a
+        thread still blocked in ``read()`` (e.g. a stalled RTSP source) is
+        never raced by a release from here.
+        """
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            if self._thread.is_alive():
+                logger.warning("Capture thread for %s is still blocked; it will release the stream on exit", self.source)
+            self._thread = None
+        elif self._cap is not None:
+            # Opened but never started
+            self._cap.release()
+            self._cap = None
+        self._notify()
+
+    def _notify(self):
+        if self._loop is not None and self._event is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._event.set)
+            except RuntimeError:
+                # Event loop already closed
+                pass
+
+    def _run(self):
+        try:
+            self._capture_loop()
+        finally:
+            cap, self._cap = self._cap, None
+            if cap is not None:
+                cap.release()
+
+    def _capture_loop(self):
+        failures = 0
+        while self._running:
+            ret, frame = self._cap.read()
+            if not ret:
+                self.read_failures += 1
+                failures += 1
+                if failures >= self.max_failures:
+                    self._reconnect()
+                    failures = 0
+                else:
+                    time.sleep(self.reconnect_delay)
+                continue
+
+            failures = 0
+            with self._lock:
+                if self._seq != self._taken_seq:
+                    self.frames_dropped += 1
+                self._frame = frame
+                self._seq += 1
+                self._frame_time = time.time()
+                self.frames_read += 1
+            self._notify()
+
+    def _reconnect(self):
+        logger.warning("Reconnecting to video source: %s", self.source)
+        if self._cap is not None:
+            self._cap.release()
+        while self._running:
+            cap = open_video_stream(self.source)
+            if cap is not None:
+                self._cap = cap
+                self.reconnects += 1
+                return
+            time.sleep(self.reconnect_delay)
+
+    def latest(self) -> Tuple[Optional[np.ndarray], int]:
+        """Take the newest frame if one arrived since the last call, else (None, seq)."""
+        with self._lock:
+            if self._seq == self._taken_seq:
+                return None, self._seq
+            self._taken_seq = self._seq
+            self.frames_taken += 1
+            return self._frame, self._seq
+
+    async def next_frame(self, timeout: float = 5.0) -> Optional[np.ndarray]:
+        """Wait until a frame newer than the last one taken is available."""
+        deadline = time.monotonic() + timeout
+        while self._running:
+            frame, _ = self.latest()
+            if frame is not None:
+                return frame
+            self._event.clear()
+            # Re-check after clearing so a frame that landed in between isn't missed
+            frame, _ = self.latest()
+            if frame is not None:
+                return frame
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(self._event.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Capture counters for monitoring."""
+        elapsed = time.time() - self.started_at if self.started_at else 0
+        return {
+            "running": self._running,
+            "frames_read": self.frames_read,
+            "frames_taken": self.frames_taken,
+            "frames_dropped": self.frames_dropped,
+            "drop_ratio": round(self.frames_dropped / self.frames_read, 4) if self.frames_read else 0,
+            "decode_fps": round(self.frames_read / elapsed, 1) if elapsed > 0 else 0,
+            "last_frame_age_ms": round((time.time() - self._frame_time) * 1000, 1) if self._frame_time else None,
+            "read_failures": self.read_failures,
+            "reconnects": self.reconnects,
+        }
+
+
 def resize_frame(frame: np.ndarray, width: int = 640, height: Optional[int] = None) -> np.ndarray:
     """Resize a frame maintaining aspect ratio."""
     h, w = frame.shape[:2]
@@ -206,7 +379,7 @@ def save_frame(frame: np.ndarray, path: str, quality: int = 95) -> bool:
             cv2.imwrite(path, frame)
         return True
     except Exception as e:
-        logger.error(f"Failed to save frame to {path}: {e}")
+        logger.error("Failed to save frame to %s: %s", path, e)
         return False
 
 
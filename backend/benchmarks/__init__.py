@@ -0,0 +1 @@
+# FireSight — Benchmarks Package
@@ -0,0 +1,130 @@
+"""
+FireSight — Inference Backend Benchmark
+Compares latency and agreement of exported backends (ONNX Runtime, OpenVINO,
+OpenVINO INT8) against the PyTorch weights on the same frames. Agreement is
+measured against the PyTorch detections: a box counts as matched when a box
+of the same class overlaps it with IoU >= --iou.
+
+Usage (from backend/):
+    python -m benchmarks.inference_backends --video sample.mp4
+    python -m benchmarks.inference_backends --models general fire_smoke \\
+        --backends onnx openvino openvino_int8 --images models/calibration --frames 50
+"""
+
+import argparse
+import glob
+import os
+import time
+import cv2
+import numpy as np
+
+from app.config import settings
+from app.detection.backends import BACKENDS, IMAGE_EXTENSIONS, export_model
+from app.detection.model_registry import MODEL_PATH_SETTINGS, model_registry
+from app.detection.plan import result_arrays
+from app.detection.tracker import iou_matrix, optimal_assignment
+
+
+def load_frames(video: str = None, images: str = None, n_frames: int = 50):
+    """Frames spread evenly through a video, or images from a directory."""
+    if images:
+        paths = sorted(
+            p for p in glob.glob(os.path.join(images, "**", "*"), recursive=True)
+            if p.lower().endswith(IMAGE_EXTENSIONS)
+        )[:n_frames]
+        return [f for f in (cv2.imread(p) for p in paths) if f is not None]
+
+    cap = cv2.VideoCapture(video)
+    if not cap.isOpened():
+        raise SystemExit(f"Cannot open video: {video}")
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or n_frames
+    frames = []
+    for index in np.linspace(0, max(total - 1, 0), n_frames).astype(int):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+        ret, frame = cap.read()
+        if ret:
+            frames.append(frame)
+    cap.release()
+    return frames
+
+
+def run_model(model, frames, conf: float, imgsz: int):
+    """Per-frame (cls, scores, xyxy) arrays and latencies in ms."""
+    model(frames[0], verbose=False, conf=conf, imgsz=imgsz)  # warmup
+    outputs, timings = [], []
+    for frame in frames:
+        started = time.perf_counter()
+        results = model(frame, verbose=False, conf=conf, imgsz=imgsz)
+        timings.append((time.perf_counter() - started) * 1000.0)
+        outputs.append(result_arrays(results[0]))
+    return outputs, np.array(timings)
+
+
+def agreement(reference, candidate, iou_threshold: float):
+    """Precision/recall of ``candidate`` boxes against the PyTorch boxes."""
+    matched = ref_total = cand_total = 0
+    conf_deltas = []
+    for (ref_cls, ref_scores, ref_boxes), (cls, scores, boxes) in zip(reference, candidate):
+        ref_total += len(ref_cls)
+        cand_total += len(cls)
+        iou = iou_matrix(ref_boxes, boxes)
+        if iou.size:
+            iou[ref_cls[:, None] != cls[None, :]] = 0
+        rows, cols = optimal_assignment(iou, iou_threshold)
+        matched += len(rows)
+        conf_deltas.extend(np.abs(ref_scores[rows] - scores[cols]).tolist())
+    return {
+        "recall": matched / ref_total if ref_total else 1.0,
+        "precision": matched / cand_total if cand_total else 1.0,
+        "conf_delta": float(np.mean(conf_deltas)) if conf_deltas else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare inference backends against PyTorch")
+    parser.add_argument("--video", help="Video to sample frames from")
+    parser.add_argument("--images", help="Directory of images to use instead of a video")
+    parser.add_argument("--models", nargs="+", default=list(MODEL_PATH_SETTINGS))
+    parser.add_argument("--backends", nargs="+", default=[b for b in BACKENDS if b != "pytorch"])
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--conf", type=float, default=settings.DEFAULT_CONFIDENCE)
+    parser.add_argument("--iou", type=float, default=0.5)
+    args = parser.parse_args()
+    if not args.video and not args.images:
+        parser.error("one of --video or --images is required")
+
+    from ultralytics import YOLO
+
+    frames = load_frames(args.video, args.images, args.frames)
+    if not frames:
+        raise SystemExit("No frames to benchmark")
+    imgsz = settings.INFERENCE_IMAGE_SIZE
+    print(f"{len(frames)} frames at imgsz={imgsz}, conf={args.conf}\n")
+    print(f"{'model':<12} {'backend':<14} {'mean ms':>9} {'p95 ms':>9} {'speedup':>8} "
+          f"{'recall':>7} {'precision':>9} {'|dconf|':>8}")
+
+    for name in args.models:
+        weights = getattr(settings, MODEL_PATH_SETTINGS[name])
+        if not os.path.exists(weights):
+            print(f"{name:<12} (weights not found: {weights})")
+            continue
+        reference, ref_times = run_model(YOLO(weights), frames, args.conf, imgsz)
+        print(f"{name:<12} {'pytorch':<14} {ref_times.mean():>9.2f} {np.percentile(ref_times, 95):>9.2f} "
+              f"{1.0:>8.2f} {1.0:>7.3f} {1.0:>9.3f} {0.0:>8.4f}")
+
+        checksum = model_registry.checksum(name)
+        for backend in args.backends:
+            try:
+                path = export_model(name, weights, checksum, backend, imgsz)
+                outputs, times = run_model(YOLO(path, task="detect"), frames, args.conf, imgsz)
+            except Exception as e:
+                print(f"{name:<12} {backend:<14} failed: {e}")
+                continue
+            score = agreement(reference, outputs, args.iou)
+            print(f"{name:<12} {backend:<14} {times.mean():>9.2f} {np.percentile(times, 95):>9.2f} "
+                  f"{ref_times.mean() / times.mean():>8.2f} {score['recall']:>7.3f} "
+                  f"{score['precision']:>9.3f} {score['conf_delta']:>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+FireSight — Tracker Scaling Benchmark
+Times IoUTracker.update() on synthetic scenes with many simultaneous objects
+(busy yard cameras routinely show 500+).
+
+Usage (from backend/):
+    python -m benchmarks.tracker_scaling
+    python -m benchmarks.tracker_scaling --objects 100 500 1000 --frames 100
+"""
+
+import argparse
+import time
+import numpy as np
+
+from app.detection.batch import DetectionBatch, category_id
+from app.detection.tracker import IoUTracker
+
+
+def make_scene(n_objects: int, width: int = 1920, height: int = 1080, seed: int = 0):
+    """Random boxes with per-object velocities."""
+    rng = np.random.default_rng(seed)
+    sizes = rng.uniform(20, 80, size=(n_objects, 2))
+    origins = rng.uniform(0, 1, size=(n_objects, 2)) * ([width, height] - sizes)
+    velocities = rng.normal(0, 2, size=(n_objects, 2))
+    return rng, origins, sizes, velocities
+
+
+def frame_detections(rng, origins, sizes, velocities, frame_idx: int, drop_rate: float = 0.05):
+    """Detections for one frame: moved boxes with jitter and a few misses."""
+    pos = origins + velocities * frame_idx + rng.normal(0, 1.0, size=origins.shape)
+    boxes = np.hstack([pos, pos + sizes])
+    boxes = boxes[rng.uniform(size=len(boxes)) >= drop_rate]
+    n = len(boxes)
+    return DetectionBatch(boxes, np.full(n, 0.9), np.zeros(n), np.full(n, category_id("human")), np.zeros(n))
+
+
+def run(n_objects: int, n_frames: int) -> dict:
+    rng, origins, sizes, velocities = make_scene(n_objects)
+    frames = [frame_detections(rng, origins, sizes, velocities, i) for i in range(n_frames)]
+
+    tracker = IoUTracker()
+    timings = []
+    for dets in frames:
+        started = time.perf_counter()
+        tracker.update(dets)
+        timings.append(time.perf_counter() - started)
+
+    timings = np.array(timings[1:]) * 1000.0  # first frame only creates tracks
+    return {
+        "objects": n_objects,
+        "mean_ms": timings.mean(),
+        "p95_ms": np.percentile(timings, 95),
+        "tracks": len(tracker),
+        "ids_issued": tracker.next_id - 1,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IoUTracker scaling benchmark")
+    parser.add_argument("--objects", type=int, nargs="+", default=[50, 100, 250, 500, 1000])
+    parser.add_argument("--frames", type=int, default=60)
+    args = parser.parse_args()
+
+    print(f"{'objects':>8} {'mean ms':>10} {'p95 ms':>10} {'tracks':>8} {'ids issued':>11}")
+    for n in args.objects:
+        r = run(n, args.frames)
+        print(f"{r['objects']:>8} {r['mean_ms']:>10.2f} {r['p95_ms']:>10.2f} {r['tracks']:>8} {r['ids_issued']:>11}")
+
+
+if __name__ == "__main__":
+    main()
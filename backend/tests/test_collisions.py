@@ -0,0 +1,71 @@
+"""
+FireSight — Collision pair search tests
+The spatial-hash candidate search used for busy frames must find exactly the
+pairs the dense all-pairs overlap test finds.
+"""
+
+import numpy as np
+import pytest
+
+from app.detection.event_rules import EventRulesEngine
+
+THRESHOLD = EventRulesEngine.ACCIDENT_OVERLAP
+
+
+def _reference_overlap(a, b):
+    """Scalar intersection over the smaller box, as the original accident rule computed it."""
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    min_area = min((a[2] - a[0]) * (a[3] - a[1]), (b[2] - b[0]) * (b[3] - b[1]))
+    return inter / max(min_area, 1)
+
+
+def _reference_pairs(boxes, threshold):
+    n = len(boxes)
+    return {
+        (i, j) for i in range(n) for j in range(i + 1, n)
+        if _reference_overlap(boxes[i], boxes[j]) > threshold
+    }
+
+
+def _dense_pairs(boxes, threshold):
+    rows, cols = np.nonzero(np.triu(EventRulesEngine._pairwise_overlap(boxes) > threshold, k=1))
+    return set(zip(rows.tolist(), cols.tolist()))
+
+
+def _traffic(rng, n):
+    """Vehicles of mixed sizes, bunched into queues so many boxes touch."""
+    centres = rng.uniform(0, 1920, size=(max(n // 10, 1), 2))
+    xy = centres[rng.integers(0, len(centres), size=n)] + rng.normal(0, 60, size=(n, 2))
+    wh = rng.lognormal(mean=4.0, sigma=0.5, size=(n, 2))
+    # A few very large boxes (buses, plant) stress the cell size
+    wh[rng.random(n) < 0.02] *= 6
+    return np.hstack([xy, xy + wh]).astype(np.float32)
+
+
+def _pairs(boxes, threshold):
+    rows, cols = EventRulesEngine._overlapping_pairs(boxes, threshold)
+    assert np.all(rows < cols)
+    return set(zip(rows.tolist(), cols.tolist()))
+
+
+@pytest.mark.parametrize("n", [130, 300, 600])
+@pytest.mark.parametrize("seed", range(3))
+def test_spatial_hash_matches_dense(n, seed):
+    assert n >= EventRulesEngine.SPATIAL_HASH_MIN_BOXES
+    boxes = _traffic(np.random.default_rng(seed), n)
+    found = _pairs(boxes, THRESHOLD)
+    assert found == _dense_pairs(boxes, THRESHOLD)
+    assert found, "scene should contain overlapping pairs"
+
+
+@pytest.mark.parametrize("n", [20, 130])
+def test_pairs_match_scalar_reference(n):
+    boxes = _traffic(np.random.default_rng(42), n)
+    assert _pairs(boxes, THRESHOLD) == _reference_pairs(boxes.tolist(), THRESHOLD)
+
+
+def test_identical_and_degenerate_boxes():
+    boxes = np.array([[10, 10, 50, 50]] * 140 + [[5, 5, 5, 5]] * 5, dtype=np.float32)
+    assert _pairs(boxes, THRESHOLD) == _dense_pairs(boxes, THRESHOLD)
@@ -0,0 +1,106 @@
+"""
+FireSight — Tracker assignment tests
+Pins the vectorised IoU matrix and the component-split optimal assignment to
+straightforward dense references.
+"""
+
+import numpy as np
+import pytest
+from scipy.optimize import linear_sum_assignment
+
+from app.detection.tracker import iou_matrix, optimal_assignment
+
+THRESHOLD = 0.3
+
+
+def _reference_iou(a, b):
+    """Scalar IoU, as the original tracker computed it."""
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0
+
+
+def _reference_greedy(iou, threshold):
+    """The original tracker's greedy highest-IoU-first assignment."""
+    iou = iou.astype(np.float64).copy()
+    pairs = set()
+    while iou.size:
+        r, c = np.unravel_index(iou.argmax(), iou.shape)
+        if iou[r, c] < threshold:
+            break
+        pairs.add((int(r), int(c)))
+        iou[r, :] = -1
+        iou[:, c] = -1
+    return pairs
+
+
+def _dense_assignment(iou, threshold):
+    """Hungarian on the full matrix: most viable matches, then highest total IoU."""
+    cost = np.where(iou >= threshold, 1.0 - iou, 1e6)
+    r, c = linear_sum_assignment(cost)
+    keep = iou[r, c] >= threshold
+    return r[keep], c[keep]
+
+
+def _scene(rng, n_tracks, n_dets, jitter):
+    """Tracks plus detections that mostly follow them, with crowding and clutter."""
+    xy = rng.uniform(0, 600, size=(n_tracks, 2))
+    wh = rng.uniform(20, 80, size=(n_tracks, 2))
+    tracks = np.hstack([xy, xy + wh])
+    follow = tracks[rng.integers(0, n_tracks, size=n_dets)] + rng.normal(0, jitter, size=(n_dets, 4))
+    follow[:, 2:] = np.maximum(follow[:, 2:], follow[:, :2] + 1)
+    return tracks.astype(np.float32), follow.astype(np.float32)
+
+
+def _boxes(rng, n):
+    xy = rng.uniform(0, 500, size=(n, 2))
+    return np.hstack([xy, xy + rng.uniform(1, 120, size=(n, 2))])
+
+
+def test_iou_matrix_matches_scalar_reference():
+    rng = np.random.default_rng(0)
+    a, b = _boxes(rng, 40), _boxes(rng, 55)
+    expected = np.array([[_reference_iou(x, y) for y in b] for x in a])
+    np.testing.assert_allclose(iou_matrix(a, b), expected, atol=1e-5)
+
+
+def test_iou_matrix_empty_inputs():
+    assert iou_matrix(np.empty((0, 4)), _boxes(np.random.default_rng(1), 3)).shape == (0, 3)
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_assignment_matches_dense_hungarian(seed):
+    rng = np.random.default_rng(seed)
+    tracks, dets = _scene(rng, n_tracks=int(rng.integers(5, 60)), n_dets=int(rng.integers(5, 60)), jitter=8.0)
+    iou = iou_matrix(tracks, dets)
+
+    rows, cols = optimal_assignment(iou, THRESHOLD)
+    dense_rows, dense_cols = _dense_assignment(iou, THRESHOLD)
+
+    # One-to-one, all viable
+    assert len(set(rows.tolist())) == len(rows)
+    assert len(set(cols.tolist())) == len(cols)
+    assert np.all(iou[rows, cols] >= THRESHOLD)
+    # Same optimum as solving the whole matrix at once (ties may pick different pairs)
+    assert len(rows) == len(dense_rows)
+    assert iou[rows, cols].sum() == pytest.approx(iou[dense_rows, dense_cols].sum(), abs=1e-4)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_uncontested_scenes_match_greedy(seed):
+    """With well separated objects every match is uncontested, so nothing changes from greedy."""
+    rng = np.random.default_rng(seed)
+    grid = np.stack(np.meshgrid(np.arange(8), np.arange(8)), axis=-1).reshape(-1, 2) * 100.0
+    tracks = np.hstack([grid, grid + 50]).astype(np.float32)
+    dets = tracks[rng.permutation(len(tracks))[:40]] + rng.normal(0, 3, size=(40, 4)).astype(np.float32)
+    iou = iou_matrix(tracks, dets)
+
+    rows, cols = optimal_assignment(iou, THRESHOLD)
+    assert set(zip(rows.tolist(), cols.tolist())) == _reference_greedy(iou, THRESHOLD)
+
+
+def test_no_viable_pairs():
+    rows, cols = optimal_assignment(np.full((3, 4), 0.1, dtype=np.float32), THRESHOLD)
+    assert len(rows) == len(cols) == 0
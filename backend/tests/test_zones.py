@@ -0,0 +1,93 @@
+"""
+FireSight — Zone raster tests
+ZoneMap membership must agree with the even-odd ray cast the zone rules used
+before, except for points within a pixel of a zone edge.
+"""
+
+import numpy as np
+import pytest
+
+from app.detection.zones import ZoneMap, MAX_ZONES
+
+# A point is classified by its pixel (up to a pixel diagonal away), and the
+# rasteriser decides edge pixels to within about half a pixel: two pixels in all
+EDGE_TOLERANCE = 2.0
+
+
+def _reference_inside(point, polygon):
+    """The original scalar ray-casting test."""
+    if len(polygon) < 3:
+        return False
+    inside = False
+    x, y = point
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        xi, yi = polygon[i]
+        xj, yj = polygon[j]
+        if ((yi > y) != (yj > y)) and (x < (xj - xi) * (y - yi) / (yj - yi) + xi):
+            inside = not inside
+        j = i
+    return inside
+
+
+def _edge_distance(points, polygon):
+    """Distance from each point to the nearest polygon edge."""
+    a = np.asarray(polygon, dtype=np.float64)
+    b = np.roll(a, -1, axis=0)
+    d = b - a
+    t = np.einsum("pkj,kj->pk", points[:, None, :] - a[None], d) / np.maximum((d * d).sum(axis=1), 1e-12)
+    closest = a[None] + np.clip(t, 0, 1)[..., None] * d[None]
+    return np.linalg.norm(points[:, None, :] - closest, axis=2).min(axis=1)
+
+
+def _polygon(rng, fractional):
+    """Random star-shaped (often concave) polygon."""
+    k = int(rng.integers(3, 12))
+    angles = np.sort(rng.uniform(0, 2 * np.pi, k))
+    radii = rng.uniform(40, 200, k)
+    centre = rng.uniform(200, 600, 2)
+    points = centre + np.stack([np.cos(angles), np.sin(angles)], axis=1) * radii[:, None]
+    return (points if fractional else np.round(points)).tolist()
+
+
+@pytest.mark.parametrize("fractional", [False, True])
+@pytest.mark.parametrize("seed", range(5))
+def test_membership_matches_ray_cast_away_from_edges(seed, fractional):
+    rng = np.random.default_rng(seed)
+    polygons = [_polygon(rng, fractional) for _ in range(6)]
+    zone_map = ZoneMap([{"name": f"z{i}", "points": p} for i, p in enumerate(polygons)])
+    points = rng.uniform(0, 850, size=(4000, 2))
+
+    membership = zone_map.membership(points)
+    for z, polygon in enumerate(polygons):
+        expected = np.array([_reference_inside(p, polygon) for p in points.tolist()])
+        differ = membership[:, z] != expected
+        assert np.all(_edge_distance(points[differ], polygon) <= EDGE_TOLERANCE)
+        assert differ.mean() < 0.01
+
+
+def test_counts_and_indices():
+    square = [[0, 0], [100, 0], [100, 100], [0, 100]]
+    zone_map = ZoneMap([
+        {"name": "yard", "type": "restricted", "points": square},
+        {"name": "off", "type": "restricted", "active": False, "points": square},
+        {"name": "gate", "type": "monitoring", "points": [[50, 50], [150, 50], [150, 150], [50, 150]]},
+    ])
+    assert [z["name"] for z in zone_map.zones] == ["yard", "gate"]
+    assert zone_map.indices("restricted") == [0]
+    points = np.array([[10, 10], [75, 75], [140, 140], [500, 500]], dtype=np.float32)
+    assert zone_map.counts(points) == {"yard": 2, "gate": 2}
+    assert zone_map.masks(points).tolist() == [0b01, 0b11, 0b10, 0]
+
+
+def test_zones_beyond_the_limit_are_dropped():
+    square = [[0, 0], [10, 0], [10, 10], [0, 10]]
+    zone_map = ZoneMap([{"name": f"z{i}", "points": square} for i in range(MAX_ZONES + 3)])
+    assert len(zone_map) == MAX_ZONES
+    assert zone_map.membership(np.array([[5, 5]])).all()
+
+
+def test_empty_zone_map():
+    zone_map = ZoneMap([])
+    assert zone_map.membership(np.array([[1.0, 1.0]])).shape == (1, 0)
+    assert zone_map.masks(np.empty((0, 2))).shape == (0,)